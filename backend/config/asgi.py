@@ -14,3 +14,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+# gunicorn --preload: config/wsgi.py ile aynı; modeller fork öncesi yüklenir.
+if os.getenv("WISE_PRELOAD_BEFORE_FORK", "0") == "1":
+    from yolo_models.model_registry import freeze_models, preload_models
+
+    preload_models()
+    freeze_models()
@@ -112,13 +112,73 @@ WSGI_APPLICATION = 'config.wsgi.application'
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10 MB
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10 MB
 
-# Veritabanı (gelişmiş için PostgreSQL önerilir)
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+# Fotoğraf yükleme (users/uploads.py): dosyalar belleğe alınmadan depolamaya akıtılır
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))  # dosya başına
+UPLOAD_ALLOWED_TYPES = ["image/jpeg", "image/png", "image/webp"]
+UPLOAD_STREAM_WORKERS = int(os.getenv("UPLOAD_STREAM_WORKERS", "8"))         # süreç başına eşzamanlı yazım
+
+# ASGI: G/Ç ağırlıklı uçlar için async görünümler (users/async_views.py), bkz. gunicorn.conf.py WISE_ASGI
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", os.getenv("WISE_ASGI", "0")) == "1"
+ASYNC_INFERENCE_WORKERS = int(os.getenv("ASYNC_INFERENCE_WORKERS", "2"))  # worker başına çıkarım thread'i
+
+# Toplu analiz (POST /api/analysis/batch/)
+BATCH_ANALYSIS_MAX_IMAGES = int(os.getenv("BATCH_ANALYSIS_MAX_IMAGES", "50"))
+BATCH_ANALYSIS_WORKERS = int(os.getenv("BATCH_ANALYSIS_WORKERS", "8"))  # eşzamanlı indirme / kırpma
+
+# Asenkron analiz kuyruğu (users/jobs.py)
+ANALYSIS_JOB_WORKERS = int(os.getenv("ANALYSIS_JOB_WORKERS", "2"))        # süreç başına çıkarım thread'i
+ANALYSIS_JOB_QUEUE_SIZE = int(os.getenv("ANALYSIS_JOB_QUEUE_SIZE", "64"))  # dolunca 503 + Retry-After
+ANALYSIS_JOB_TTL_HOURS = int(os.getenv("ANALYSIS_JOB_TTL_HOURS", "24"))    # biten işlerin saklanma süresi
+ANALYSIS_JOB_STALE_MINUTES = int(os.getenv("ANALYSIS_JOB_STALE_MINUTES", "30"))  # bu süreden eski bitmemiş iş failed olur
+
+# Fotoğraf dizini (users/photo_index.py): bucket ile uzlaştırma aralığı, 0 = yalnızca manage.py reconcile_photos
+PHOTO_INDEX_RECONCILE_SECONDS = int(os.getenv("PHOTO_INDEX_RECONCILE_SECONDS", "600"))
+
+# Veritabanı
+# DB_ENGINE=postgres: üretim profili (kalıcı bağlantılar ya da psycopg havuzu)
+# DB_ENGINE=sqlite (varsayılan): tek makine; WAL (yalnızca sunucuda), synchronous=NORMAL ve
+# busy_timeout bağlantı açılırken users/apps.py içindeki connection_created kancasıyla ayarlanır.
+DB_ENGINE = os.getenv("DB_ENGINE", "sqlite")
+
+if DB_ENGINE == "postgres":
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv("POSTGRES_DB", "wise"),
+            'USER': os.getenv("POSTGRES_USER", "wise"),
+            'PASSWORD': os.getenv("POSTGRES_PASSWORD", ""),
+            'HOST': os.getenv("POSTGRES_HOST", "localhost"),
+            'PORT': os.getenv("POSTGRES_PORT", "5432"),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
     }
-}
+    if os.getenv("DB_POOL", "0") == "1":
+        # psycopg 3 havuzu (Django 5.1+); havuz kalıcı bağlantılarla birlikte kullanılamaz
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+            'max_size': int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            'timeout': float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        }
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv("DB_CONN_MAX_AGE", "600"))  # saniye
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv("SQLITE_PATH", os.path.join(BASE_DIR, 'db.sqlite3')),
+            'OPTIONS': {
+                # yazma kilidi transaction başında alınır; okuma->yazma yükseltmesinde kilitlenme olmaz
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+
+# WAL dosya başlığına kalıcı yazılır: yalnızca sunucu açar (gunicorn.conf.py SQLITE_WAL=1 varsayar);
+# manage.py komutları ve testler depodaki db.sqlite3'ü değiştirmesin diye varsayılan kapalı
+SQLITE_WAL = os.getenv("SQLITE_WAL", "0") == "1"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
 
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# gunicorn --preload: modeller fork öncesi master süreçte yüklenir ve
+# worker'lar ağırlıkları copy-on-write olarak paylaşır.
+if os.getenv("WISE_PRELOAD_BEFORE_FORK", "0") == "1":
+    from yolo_models.model_registry import freeze_models, preload_models
+
+    preload_models()
+    freeze_models()
@@ -0,0 +1,49 @@
+# gunicorn.conf.py
+# gunicorn bu dosyayı çalışma dizininden otomatik okur: `gunicorn config.wsgi`
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+# SQLite WAL yalnızca sunucu süreçlerinde (bkz. config/settings.py SQLITE_WAL)
+os.environ.setdefault("SQLITE_WAL", "1")
+
+# WISE_ASGI=1: uvicorn worker'ları + config.asgi (async görünümler, bkz. users/async_views.py)
+# `gunicorn config.asgi` ile başlatın; threads ayarı bu modda kullanılmaz.
+if os.getenv("WISE_ASGI", "0") == "1":
+    worker_class = "uvicorn_worker.UvicornWorker"
+
+# threads > 1 (gthread): aynı worker'daki eşzamanlı istekler mikro-batch'lenebilir (yolo_models/batcher.py)
+threads = int(os.getenv("GUNICORN_THREADS", "1"))
+
+# Modeller worker açılışında yüklensin (ilk isteğe yükleme maliyeti binmesin)
+PRELOAD_MODELS = os.getenv("WISE_PRELOAD_MODELS", "1") == "1"
+
+# WISE_PRELOAD_BEFORE_FORK=1: uygulama (ve modeller, bkz. config/wsgi.py) master
+# süreçte yüklenir; worker'lar ağırlık sayfalarını copy-on-write paylaşır.
+preload_app = os.getenv("WISE_PRELOAD_BEFORE_FORK", "0") == "1"
+
+
+def post_worker_init(worker):
+    if not PRELOAD_MODELS:
+        return
+    from yolo_models.model_registry import preload_models
+
+    stats = preload_models()  # preload_app ile zaten yüklüyse no-op
+    for name, info in stats.items():
+        worker.log.info("model %s: %s", name, info)
+
+    from yolo_models.memory_report import process_memory
+
+    mem = process_memory()
+    worker.log.info(
+        "worker %s bellek: shared=%.1fMB private=%.1fMB",
+        worker.pid, mem.get("shared", 0) / 2**20, mem.get("private", 0) / 2**20,
+    )
+
+
+def worker_exit(server, worker):
+    # Ertelenmiş kırpıntı yüklemeleri (WISE_DEFER_UPLOADS=1) kaybolmasın
+    from yolo_models.storage import flush
+
+    flush(timeout=30)
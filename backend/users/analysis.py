@@ -0,0 +1,261 @@
+# users/analysis.py
+"""
+Analiz akışı: görseli indir, tabakları kırp/sınıflandır, sonuçları kaydet.
+Senkron AnalyzeFoodView, toplu analiz (AnalyzeBatchView) ve arka plan iş
+kuyruğu (users/jobs.py) kullanır.
+"""
+import datetime
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.dateparse import parse_date
+
+from . import result_cache, rollups
+from .models import AnalysisResult
+from yolo_models.cropper import crop_and_save, detect_plates
+from yolo_models.image_loader import analysis_images, fetch_image_bytes
+
+
+def parse_analysis_date(value):
+    """yyyy-MM-dd metnini date'e çevirir; geçersizse ValueError fırlatır."""
+    if isinstance(value, datetime.date):
+        return value
+    parsed = parse_date(str(value or "").strip())
+    if parsed is None:
+        raise ValueError(f"Geçersiz tarih (yyyy-MM-dd bekleniyor): {value}")
+    return parsed
+
+
+def analyze_and_store(image_url, analysis_date):
+    """(yanıt gövdesi, HTTP durum kodu) döner."""
+    day = parse_analysis_date(analysis_date)
+    print("🔗 Görsel indiriliyor:", image_url)
+    data = fetch_image_bytes(image_url)
+    if not data:
+        return {"error": "Görsel indirilemedi."}, 400
+
+    # Aynı baytlar aynı modellerle daha önce analiz edildiyse çıkarım atlanır
+    digest = result_cache.image_hash(data)
+    results = cached_results(digest, analysis_date)
+    cached = results is not None
+    if not cached:
+        results = run_inference(image_url, data, analysis_date)
+
+    return finish_analysis(image_url, day, digest, results, cached)
+
+
+def run_inference(image_url, data, analysis_date):
+    """Çözme + tespit + kırpma/sınıflandırma/yükleme; veritabanına dokunmaz (executor'da çalışabilir)."""
+    img0, crop_image = analysis_images(data)
+    print("✂️ Görsel kırpılıyor ve analiz ediliyor...")
+    return crop_and_save(img0, original_filename=image_url.split("/")[-1], analysis_date=analysis_date,
+                         crop_image=crop_image)
+
+
+def analyze_batch(image_urls, analysis_date):
+    """
+    Çok görselli analiz; (sıra, image_url, yanıt gövdesi, HTTP durum kodu)
+    demetlerini görseller bittikçe üretir.
+
+    Görseller eşzamanlı indirilir, önbellekte olanlar hemen döner, kalanların
+    tabak tespiti tek seferde (detect_plates) yapılır; kırpıntılar eşzamanlı
+    işlendiği için sınıflandırıcı batcher'ları onları kategori bazında tüm
+    görseller arasında gruplar. Veritabanı yazımları çağıran thread'de yapılır.
+    Aşamalar async karşılığıyla (users/async_views.py) paylaşılır.
+    """
+    day = parse_analysis_date(analysis_date)
+    workers = max(1, min(settings.BATCH_ANALYSIS_WORKERS, len(image_urls)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-analysis") as pool:
+        # 1) Eşzamanlı indirme
+        downloads = {pool.submit(fetch_image_bytes, url): i for i, url in enumerate(image_urls)}
+        pending = {}
+        for future in as_completed(downloads):
+            i = downloads[future]
+            try:
+                data, error = future.result(), None
+            except Exception as e:
+                data, error = None, e
+            digest, response = download_outcome(image_urls[i], day, analysis_date, data, error)
+            if response is not None:
+                yield (i, image_urls[i], *response)
+            else:
+                pending[i] = (digest, data)
+
+        if not pending:
+            return
+
+        # 2) Çözme (eşzamanlı) + tüm görseller için tek tespit geçişi
+        indices = sorted(pending)
+        failed, order, decoded = split_decoded(indices, pool.map(decode_images, [pending[i][1] for i in indices]))
+        for i, body, status in failed:
+            yield i, image_urls[i], body, status
+        if not order:
+            return
+        detections = detect_plates([img0 for img0, _ in decoded])
+
+        # 3) Kırpma + sınıflandırma + kırpıntı yükleme; görsel bittikçe kaydet ve döndür
+        crops = {
+            pool.submit(crop_images, image_urls[i], analysis_date, images, det): i
+            for i, images, det in zip(order, decoded, detections)
+        }
+        for future in as_completed(crops):
+            i = crops[future]
+            try:
+                results, error = future.result(), None
+            except Exception as e:
+                traceback.print_exc()
+                results, error = None, e
+            yield (i, image_urls[i], *crop_outcome(image_urls[i], day, pending[i][0], results, error))
+
+
+# --- Toplu analiz aşamaları (senkron analyze_batch ve async _analyze_batch ortak kullanır) ---
+def download_outcome(image_url, day, analysis_date, data, error=None):
+    """
+    İndirme sonrası: önbellekte yoksa (digest, None), görsel burada bittiyse
+    (None, (yanıt gövdesi, HTTP durum kodu)) döner. Veritabanına dokunur.
+    """
+    if error is not None:
+        return None, ({"error": f"Görsel indirilemedi: {str(error)}"}, 400)
+    if not data:
+        return None, ({"error": "Görsel indirilemedi."}, 400)
+    digest = result_cache.image_hash(data)
+    results = cached_results(digest, analysis_date)
+    if results is not None:
+        return None, finish_analysis(image_url, day, digest, results, True)
+    return digest, None
+
+
+def split_decoded(indices, decoded_all):
+    """decode_images çıktılarını ayırır: (hata satırları, sıralar, görüntü çiftleri)."""
+    failed, order, decoded = [], [], []
+    for i, images in zip(indices, decoded_all):
+        if isinstance(images, Exception):
+            failed.append((i, {"error": f"Görsel açılamadı: {str(images)}"}, 400))
+            continue
+        order.append(i)
+        decoded.append(images)
+    return failed, order, decoded
+
+
+def crop_images(image_url, analysis_date, images, detections):
+    """Hazır tespitlerle kırpma + sınıflandırma + yükleme; veritabanına dokunmaz (executor'da çalışır)."""
+    img0, crop_image = images
+    return crop_and_save(img0, original_filename=image_url.split("/")[-1], analysis_date=analysis_date,
+                         crop_image=crop_image, detections=detections)
+
+
+def crop_outcome(image_url, day, digest, results, error=None):
+    """Kırpma sonrası (yanıt gövdesi, HTTP durum kodu); başarılıysa sonuçları kaydeder."""
+    if error is not None:
+        return {"error": f"Sunucu hatası: {str(error)}"}, 500
+    return finish_analysis(image_url, day, digest, results, False)
+
+
+def decode_images(data):
+    """analysis_images; hata fırlatmak yerine istisnayı döner (toplu analizde görsel başına hata için)."""
+    try:
+        return analysis_images(data)
+    except Exception as e:
+        return e
+
+
+def cached_results(digest, analysis_date):
+    """Önbellekteki sonuçlar (bu analizin tarihiyle); yoksa None."""
+    results = result_cache.get(digest)
+    if results is not None:
+        print("♻️ Önbellekten:", digest[:12])
+        for result in results:
+            result["analysis_date"] = analysis_date
+    return results
+
+
+def finish_analysis(image_url, day, digest, results, cached):
+    """Kırpıntı sonuçlarını kaydeder, önbelleğe alır; (yanıt gövdesi, HTTP durum kodu) döner."""
+    if not results:
+        if not cached:
+            result_cache.put(digest, results)
+        return {"error": "Hiçbir yemek tespit edilemedi."}, 200
+
+    rows = []
+    for result in results:
+        rows.append((result, AnalysisResult(
+            image_url=result.get("image_url", image_url),
+            food_category=result.get("food_category", ""),
+            food_type=result.get("food_type", ""),
+            is_waste=result.get("is_waste", False),
+            analysis_date=day,
+        )))
+    store_results(rows)
+    if not cached:
+        result_cache.put(digest, results)
+
+    return {"message": "Analiz tamamlandı", "results": results, "cached": cached}, 200
+
+
+UPSERT_FIELDS = ["food_category", "food_type", "is_waste", "analysis_date"]
+
+
+def store_results(rows):
+    """
+    (sonuç sözlüğü, kaydedilmemiş AnalysisResult) çiftlerini tek transaction'da
+    image_url üzerinden toplu upsert eder ve günlük özeti günceller. Toplu yazım
+    düşerse satırlar tek tek denenir; hatalı olanın sözlüğüne "db_error" yazılır.
+    """
+    latest = {}
+    for result, obj in rows:
+        latest[obj.image_url] = (result, obj)  # aynı URL iki kez gelirse sonuncusu kazanır (eski sıralı davranış)
+
+    if not latest:
+        return
+
+    try:
+        with transaction.atomic():
+            _upsert([obj for _, obj in latest.values()])
+    except Exception as db_err:
+        # Toplu yazım düştü: hangi satırın sorunlu olduğunu bulmak için tek tek dene
+        print("💥 Toplu DB yazımı başarısız, satır satır deneniyor:", db_err)
+        for result, obj in latest.values():
+            try:
+                with transaction.atomic():
+                    _upsert([obj])
+            except Exception as e:
+                print("💥 DB Hatası:", e)
+                result["db_error"] = str(e)
+
+
+def _upsert(objs):
+    """Çağıran transaction içinde: anahtarları kilitle, önceki değerleri oku, upsert et, özeti düzelt."""
+    urls = [obj.image_url for obj in objs]
+    _lock_keys(urls)
+    previous = (
+        AnalysisResult.objects.select_for_update()
+        .filter(image_url__in=urls)
+        .values_list("analysis_date", "food_category", "is_waste")
+    )
+    # yeniden analiz edilen kırpıntıların eski değerleri özetten düşülür
+    changes = [(*row, -1) for row in previous]
+    AnalysisResult.objects.bulk_create(
+        objs, update_conflicts=True, unique_fields=["image_url"], update_fields=UPSERT_FIELDS
+    )
+    changes += [(obj.analysis_date, obj.food_category, obj.is_waste, 1) for obj in objs]
+    rollups.apply(changes)
+
+
+def _lock_keys(urls):
+    """
+    Aynı image_url'leri yazan transaction'ları sıraya sokar: henüz olmayan
+    satırlar select_for_update ile kilitlenemediği için eşzamanlı iki ilk ekleme
+    ikisi de "önceki yok" okuyup özeti iki kez artırırdı. PostgreSQL'de
+    transaction ömürlü advisory kilitler (kilitlenmeyi önlemek için sıralı)
+    alınır; SQLite'ta yazıcılar zaten tektir (transaction_mode=IMMEDIATE).
+    """
+    if connection.vendor != "postgresql" or not urls:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(h) FROM "
+            "(SELECT DISTINCT hashtext(u) AS h FROM unnest(%s::text[]) AS u ORDER BY h) AS keys",
+            [urls],
+        )
@@ -0,0 +1,22 @@
+from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Her yeni SQLite bağlantısında eşzamanlı yazma ayarlarını uygular."""
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        if settings.SQLITE_WAL:
+            cursor.execute("PRAGMA journal_mode=WAL;")     # okuyucular yazarı beklemez (dosyada kalıcı)
+            cursor.execute("PRAGMA synchronous=NORMAL;")   # WAL'da commit başına fsync gerekmez
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS};")  # kilitte hemen hata verme
+
+
+class UsersConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'users'
+
+    def ready(self):
+        connection_created.connect(configure_sqlite, dispatch_uid="users.configure_sqlite")
@@ -0,0 +1,260 @@
+# users/async_views.py
+"""
+G/Ç ağırlıklı uç noktaların async (ASGI) karşılıkları.
+
+ASYNC_VIEWS=1 iken users/urls.py yükleme, fotoğraf listesi ve analiz
+uçlarını buraya yönlendirir; yanıt biçimleri senkron görünümlerle aynıdır
+(DRF görünümleri gibi CSRF muaftır).
+Görsel indirme httpx.AsyncClient ile event loop üzerinde yapılır. Google
+Cloud Storage istemcisi senkron olduğundan depolama ağırlıklı çağrılar
+paylaşılan tek thread yerine sync_to_async(thread_sensitive=False) ile ayrı
+thread'lerde çalışır; böylece tek worker çok sayıda yavaş GCS çağrısını aynı
+anda bekleyebilir. Yalnızca veritabanına dokunan kısa çağrılar varsayılan
+(thread_sensitive) thread'de kalır; CPU ağırlıklı çıkarım ayrı, sınırlı bir
+executor'da çalışır.
+
+Not: Django'nun ASGIHandler'ı istek gövdesini görünüm çalışmadan önce
+tamamen okur (FILE_UPLOAD_MAX_MEMORY_SIZE üstü diske taşan geçici dosyaya).
+Bu yüzden ASYNC_VIEWS=1 iken yüklemeler depolamaya gövde geldikçe değil,
+gövde alındıktan sonra akıtılır; ağdan okurken akıtma yalnızca WSGI'deki
+UploadPhotoView'da geçerlidir.
+"""
+import asyncio
+import json
+import os
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.request import Request
+
+from yolo_models.cropper import detect_plates
+from yolo_models.image_loader import fetch_image_bytes_async
+from yolo_models.storage import get_storage
+from . import jobs, result_cache, uploads
+from .analysis import (cached_results, crop_images, crop_outcome, decode_images, download_outcome, finish_analysis,
+                       parse_analysis_date, run_inference, split_decoded)
+from .views import photo_listing
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _inference_executor():
+    """Çıkarım thread'leri; süreç başına (fork sonrası yeniden) oluşturulur."""
+    global _executor, _executor_pid
+    if _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=settings.ASYNC_INFERENCE_WORKERS,
+                                               thread_name_prefix="inference")
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def _storage_io(fn):
+    """Depolama (GCS) ağırlıklı senkron çağrı; ayrı thread'de çalışır, eşzamanlı çağrılar üst üste biner."""
+    return sync_to_async(fn, thread_sensitive=False)
+
+
+async def _in_executor(fn, *args, **kwargs):
+    return await asyncio.get_running_loop().run_in_executor(_inference_executor(), lambda: fn(*args, **kwargs))
+
+
+def _json_body(request):
+    try:
+        return json.loads(request.body or b"{}")
+    except ValueError:
+        return None
+
+
+def _invalid_date(analysis_date):
+    """Geçersiz analysis_date için 400 yanıtı; geçerliyse None."""
+    try:
+        parse_analysis_date(analysis_date)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    return None
+
+
+def _require_url_and_date(image_url, analysis_date):
+    if not image_url or not analysis_date:
+        return JsonResponse({"error": "image_url ve analysis_date alanları zorunludur."}, status=400)
+    return _invalid_date(analysis_date)
+
+
+# ========== FOTOĞRAF YÜKLEME ==========
+@csrf_exempt
+async def upload_photos(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    handler = uploads.StreamingStorageUploadHandler(request)
+    request.upload_handlers = [handler]
+    # multipart ayrıştırma + akış yazıcılarına aktarım senkron: ayrı thread'de
+    files = await _storage_io(lambda: request.FILES.getlist("photos"))()
+    if handler.errors:
+        await _storage_io(handler.discard)()
+        status, message = handler.errors[0]
+        return JsonResponse({"error": message}, status=status)
+    if not files:
+        return JsonResponse({"error": "Fotoğraf bulunamadı."}, status=400)
+
+    try:
+        uploaded_urls = await _storage_io(uploads.finalize)(files)
+    except Exception as e:
+        await _storage_io(handler.discard)()
+        return JsonResponse({"error": f"Dosya yüklenemedi: {str(e)}"}, status=500)
+
+    return JsonResponse({"message": "Ükleme başarılı!", "uploaded_urls": uploaded_urls}, status=200)
+
+
+# ========== FOTOĞRAF LİSTESİ ==========
+@csrf_exempt
+async def photo_list(request):
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+
+    etag, data = await _storage_io(photo_listing)(Request(request))
+    response = HttpResponse(status=304) if data is None else JsonResponse(data, safe=False)
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+# ========== ANALİZ ==========
+@csrf_exempt
+async def analyze_food(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    body = _json_body(request)
+    if body is None:
+        return JsonResponse({"error": "Geçersiz JSON."}, status=400)
+    image_url, analysis_date = body.get("image_url"), body.get("analysis_date")
+    invalid = _require_url_and_date(image_url, analysis_date)
+    if invalid:
+        return invalid
+
+    try:
+        data, status = await _analyze(image_url, analysis_date)
+        return JsonResponse(data, status=status)
+    except Exception as e:
+        traceback.print_exc()
+        return JsonResponse({"error": f"Sunucu hatası: {str(e)}"}, status=500)
+
+
+async def _analyze(image_url, analysis_date):
+    day = parse_analysis_date(analysis_date)
+    print("🔗 Görsel indiriliyor:", image_url)
+    data = await fetch_image_bytes_async(image_url)
+    if not data:
+        return {"error": "Görsel indirilemedi."}, 400
+
+    digest = result_cache.image_hash(data)
+    results = await sync_to_async(cached_results)(digest, analysis_date)
+    cached = results is not None
+    if not cached:
+        results = await _in_executor(run_inference, image_url, data, analysis_date)
+    return await sync_to_async(finish_analysis)(image_url, day, digest, results, cached)
+
+
+# ========== TOPLU ANALİZ ==========
+@csrf_exempt
+async def analyze_batch(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    body = _json_body(request)
+    if body is None:
+        return JsonResponse({"error": "Geçersiz JSON."}, status=400)
+
+    image_urls = list(body.get("image_urls") or [])
+    store = await _storage_io(get_storage)()
+    image_urls += [store.url(name) for name in body.get("upload_ids") or []]
+    analysis_date = body.get("analysis_date")
+    if not image_urls or not analysis_date:
+        return JsonResponse({"error": "image_urls (veya upload_ids) ve analysis_date alanları zorunludur."}, status=400)
+    if len(image_urls) > settings.BATCH_ANALYSIS_MAX_IMAGES:
+        return JsonResponse({"error": f"En fazla {settings.BATCH_ANALYSIS_MAX_IMAGES} görsel gönderilebilir."},
+                            status=400)
+    invalid = _invalid_date(analysis_date)
+    if invalid:
+        return invalid
+
+    async def lines():
+        async for index, image_url, data, status in _analyze_batch(image_urls, analysis_date):
+            row = {"index": index, "image_url": image_url, "status": status, **data}
+            yield json.dumps(row, ensure_ascii=False) + "\n"
+
+    return StreamingHttpResponse(lines(), content_type="application/x-ndjson; charset=utf-8")
+
+
+async def _analyze_batch(image_urls, analysis_date):
+    """analysis.analyze_batch'in async karşılığı: aynı aşama fonksiyonları, indirmeler event loop'ta."""
+    day = parse_analysis_date(analysis_date)
+
+    async def download(i):
+        try:
+            return i, await fetch_image_bytes_async(image_urls[i]), None
+        except Exception as e:
+            return i, None, e
+
+    pending = {}
+    for next_download in asyncio.as_completed([download(i) for i in range(len(image_urls))]):
+        i, data, error = await next_download
+        digest, response = await sync_to_async(download_outcome)(image_urls[i], day, analysis_date, data, error)
+        if response is not None:
+            yield (i, image_urls[i], *response)
+        else:
+            pending[i] = (digest, data)
+
+    if not pending:
+        return
+
+    indices = sorted(pending)
+    decoded_all = await asyncio.gather(*(_in_executor(decode_images, pending[i][1]) for i in indices))
+    failed, order, decoded = split_decoded(indices, decoded_all)
+    for i, body, status in failed:
+        yield i, image_urls[i], body, status
+    if not order:
+        return
+    detections = await _in_executor(detect_plates, [img0 for img0, _ in decoded])
+
+    async def crop(i, images, det):
+        try:
+            return i, await _in_executor(crop_images, image_urls[i], analysis_date, images, det), None
+        except Exception as e:
+            traceback.print_exc()
+            return i, None, e
+
+    for next_crop in asyncio.as_completed([crop(i, images, det) for i, images, det in zip(order, decoded, detections)]):
+        i, results, error = await next_crop
+        yield (i, image_urls[i],
+               *await sync_to_async(crop_outcome)(image_urls[i], day, pending[i][0], results, error))
+
+
+# ========== ASENKRON ANALİZ İŞİ ==========
+@csrf_exempt
+async def create_analysis_job(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    body = _json_body(request)
+    if body is None:
+        return JsonResponse({"error": "Geçersiz JSON."}, status=400)
+    image_url, analysis_date = body.get("image_url"), body.get("analysis_date")
+    invalid = _require_url_and_date(image_url, analysis_date)
+    if invalid:
+        return invalid
+
+    try:
+        job = await sync_to_async(jobs.submit)(image_url, analysis_date)
+    except jobs.QueueFull:
+        response = JsonResponse({"error": "Analiz kuyruğu dolu, lütfen tekrar deneyin."}, status=503)
+        response["Retry-After"] = "5"
+        return response
+
+    return JsonResponse({"job_id": str(job.id), "status": job.status, "queue_depth": jobs.queue_depth()}, status=202)
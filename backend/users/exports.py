@@ -0,0 +1,74 @@
+# users/exports.py
+"""
+AnalysisResult için akışlı dışa aktarma (NDJSON / CSV).
+
+Satırlar values() ile sunucu tarafı cursor'dan (.iterator()) okunur ve
+parça parça yazılır; model nesnesi ya da serializer oluşturulmaz, bellek
+kullanımı tablo boyutundan bağımsız kalır.
+"""
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+
+FIELDS = ("id", "image_url", "food_category", "food_type", "is_waste", "created_at", "analysis_date")
+CHUNK_ROWS = 2000   # veritabanından tek seferde çekilen satır
+FLUSH_ROWS = 500    # istemciye tek parçada yazılan satır
+
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _datetime(value):
+    # DRF DateTimeField çıktısıyla aynı: UTC için 'Z'
+    value = value.isoformat()
+    return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+
+def _rows(queryset):
+    for row in queryset.values_list(*FIELDS).iterator(chunk_size=CHUNK_ROWS):
+        row = dict(zip(FIELDS, row))
+        row["created_at"] = _datetime(row["created_at"])
+        row["analysis_date"] = row["analysis_date"].isoformat()
+        yield row
+
+
+def _ndjson(queryset):
+    lines = []
+    for row in _rows(queryset):
+        lines.append(json.dumps(row, ensure_ascii=False))
+        if len(lines) >= FLUSH_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+class _Echo:
+    """csv.writer için yazılanı geri döndüren sahte dosya."""
+
+    def write(self, value):
+        return value
+
+
+def _csv(queryset):
+    writer = csv.writer(_Echo())
+    lines = [writer.writerow(FIELDS)]
+    for row in _rows(queryset):
+        lines.append(writer.writerow([row[field] for field in FIELDS]))
+        if len(lines) >= FLUSH_ROWS:
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
+
+
+STREAMS = {"ndjson": _ndjson, "csv": _csv}
+
+
+def stream_results(queryset, export_format, filename="analysis-results"):
+    response = StreamingHttpResponse(STREAMS[export_format](queryset), content_type=CONTENT_TYPES[export_format])
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{export_format}"'
+    return response
@@ -0,0 +1,117 @@
+# users/jobs.py
+"""
+Süreç içi analiz iş kuyruğu.
+
+POST /api/analysis/jobs/ işi sınırlı bir kuyruğa koyar ve hemen iş kimliğini
+döner; çıkarım worker thread'leri kuyruğu boşaltır. İş durumu veritabanında
+(AnalysisJob) tutulur, böylece hangi gunicorn worker'ı sorgulanırsa
+sorgulansın sonuç okunabilir. Kuyruk süreç içinde olduğundan worker ölünce
+içindeki işler kaybolur; ANALYSIS_JOB_STALE_MINUTES'tan eski bitmemiş işler
+temizlikte "failed" olarak kapatılır.
+"""
+import os
+import queue
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .analysis import analyze_and_store, parse_analysis_date
+from .models import AnalysisJob
+
+
+class QueueFull(Exception):
+    """Kuyruk dolu: istemci Retry-After sonrası tekrar denemeli."""
+
+
+_queue = None
+_pid = None
+_lock = threading.Lock()
+_last_prune = None
+
+
+def _ensure_workers():
+    """Kuyruğu ve worker thread'lerini süreç başına bir kez (fork sonrası dahil) başlatır."""
+    global _queue, _pid
+    if _pid == os.getpid():
+        return
+    with _lock:
+        if _pid == os.getpid():
+            return
+        _queue = queue.Queue(maxsize=settings.ANALYSIS_JOB_QUEUE_SIZE)
+        for n in range(settings.ANALYSIS_JOB_WORKERS):
+            threading.Thread(target=_worker, name=f"analysis-job-{n}", daemon=True).start()
+        _pid = os.getpid()
+    _prune()  # süreç açılışında: önceki (ölmüş) worker'lardan kalan işler
+
+
+def queue_depth():
+    return _queue.qsize() if _queue is not None and _pid == os.getpid() else 0
+
+
+def submit(image_url, analysis_date):
+    """İşi kuyruğa alır; kuyruk doluysa QueueFull fırlatır."""
+    _ensure_workers()
+    if _queue.full():
+        raise QueueFull()
+
+    job = AnalysisJob.objects.create(image_url=image_url, analysis_date=parse_analysis_date(analysis_date))
+    try:
+        _queue.put_nowait(job.id)
+    except queue.Full:
+        job.delete()
+        raise QueueFull()
+    return job
+
+
+def _worker():
+    while True:
+        job_id = _queue.get()
+        try:
+            _run(job_id)
+        finally:
+            _queue.task_done()
+
+
+def _run(job_id):
+    close_old_connections()
+    try:
+        job = AnalysisJob.objects.get(pk=job_id)
+        job.status = "running"
+        job.started_at = timezone.now()
+        job.save(update_fields=["status", "started_at"])
+
+        try:
+            body, status = analyze_and_store(job.image_url, job.analysis_date.isoformat())
+            job.result, job.status_code, job.status = body, status, "done"
+        except Exception as e:
+            traceback.print_exc()
+            job.error, job.status_code, job.status = f"Sunucu hatası: {str(e)}", 500, "failed"
+
+        job.finished_at = timezone.now()
+        job.save(update_fields=["result", "status_code", "status", "error", "finished_at"])
+        _prune()
+    except Exception:
+        traceback.print_exc()
+    finally:
+        close_old_connections()
+
+
+def _prune():
+    """
+    Saatte en fazla bir kez: worker'ı ölmüş (zaman aşımına uğramış) işleri
+    failed olarak kapatır, süresi dolmuş işleri siler.
+    """
+    global _last_prune
+    now = timezone.now()
+    if _last_prune and now - _last_prune < timedelta(hours=1):
+        return
+    _last_prune = now
+    AnalysisJob.objects.filter(
+        status__in=["queued", "running"],
+        created_at__lt=now - timedelta(minutes=settings.ANALYSIS_JOB_STALE_MINUTES),
+    ).update(status="failed", status_code=500, error="İş zaman aşımına uğradı (worker sonlandı).", finished_at=now)
+    AnalysisJob.objects.filter(finished_at__lt=now - timedelta(hours=settings.ANALYSIS_JOB_TTL_HOURS)).delete()
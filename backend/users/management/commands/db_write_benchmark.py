@@ -0,0 +1,85 @@
+import datetime
+import multiprocessing
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from users.analysis import store_results
+from users.models import AnalysisResult, DailyAnalysis
+
+BENCH_URL = "https://loadtest.invalid/"
+BENCH_CATEGORY = "loadtest"
+BENCH_DATE = datetime.date(1970, 1, 1)
+
+
+def _worker(args):
+    """Gunicorn worker'ı gibi: ayrı süreç, ayrı bağlantı, analiz başına bir toplu yazım."""
+    worker, analyses, crops = args
+    connections.close_all()  # fork'tan gelen bağlantıyı kullanma
+    latencies, errors = [], 0
+    for n in range(analyses):
+        rows = []
+        for c in range(crops):
+            result = {}
+            rows.append((result, AnalysisResult(
+                image_url=f"{BENCH_URL}{worker}/{n}/{c}/{uuid.uuid4().hex}.jpg",
+                food_category=BENCH_CATEGORY,
+                food_type="loadtest",
+                is_waste=bool(c % 2),
+                analysis_date=BENCH_DATE,
+            )))
+        start = time.perf_counter()
+        store_results(rows)
+        latencies.append(time.perf_counter() - start)
+        errors += sum(1 for result, _ in rows if "db_error" in result)
+    connections.close_all()
+    return latencies, errors
+
+
+class Command(BaseCommand):
+    help = "Eşzamanlı süreçlerle analiz sonucu yazma verimini ölçer (DB_ENGINE / SQLITE_WAL karşılaştırması için)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Eşzamanlı yazan süreç sayısı")
+        parser.add_argument("--analyses", type=int, default=100, help="Süreç başına analiz sayısı")
+        parser.add_argument("--crops", type=int, default=4, help="Analiz başına kırpıntı (satır) sayısı")
+        parser.add_argument("--keep", action="store_true", help="Test satırlarını silme")
+
+    def handle(self, *args, **options):
+        workers, analyses, crops = options["workers"], options["analyses"], options["crops"]
+
+        mode = connection.vendor
+        if mode == "sqlite":
+            with connection.cursor() as cursor:
+                journal = cursor.execute("PRAGMA journal_mode;").fetchone()[0]
+                synchronous = cursor.execute("PRAGMA synchronous;").fetchone()[0]
+            mode = f"sqlite journal_mode={journal} synchronous={synchronous}"
+        self.stdout.write(f"Veritabanı: {mode}")
+        self.stdout.write(f"{workers} süreç x {analyses} analiz x {crops} kırpıntı")
+
+        connections.close_all()
+        start = time.perf_counter()
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            outputs = pool.map(_worker, [(w, analyses, crops) for w in range(workers)])
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(latency for worker_latencies, _ in outputs for latency in worker_latencies)
+        errors = sum(worker_errors for _, worker_errors in outputs)
+        rows = workers * analyses * crops
+
+        self.stdout.write(f"Süre: {elapsed:.2f} s")
+        self.stdout.write(f"Yazılan satır: {rows - errors} / {rows}  ({(rows - errors) / elapsed:.1f} satır/s)")
+        self.stdout.write(f"Analiz/s: {len(latencies) / elapsed:.1f}")
+        self.stdout.write(
+            f"Gecikme ms  p50={statistics.median(latencies) * 1000:.1f}  "
+            f"p95={latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}  max={latencies[-1] * 1000:.1f}"
+        )
+        style = self.style.ERROR if errors else self.style.SUCCESS
+        self.stdout.write(style(f"Hatalı satır (ör. database is locked): {errors}"))
+
+        if not options["keep"]:
+            AnalysisResult.objects.filter(image_url__startswith=BENCH_URL).delete()
+            DailyAnalysis.objects.filter(analysis_date=BENCH_DATE, food_category=BENCH_CATEGORY).delete()
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from users.models import DailyAnalysis
+from users.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "DailyAnalysis günlük özetlerini AnalysisResult tablosundan yeniden hesaplar."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuild()
+        self.stdout.write(self.style.SUCCESS(f"{DailyAnalysis.objects.count()} günlük özet satırı oluşturuldu."))
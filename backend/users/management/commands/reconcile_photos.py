@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from users.photo_index import PREFIX, reconcile
+
+
+class Command(BaseCommand):
+    help = "UploadedPhoto dizinini bucket içeriğiyle uzlaştırır (periyodik çalıştırılmak üzere)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", default=PREFIX, help="Uzlaştırılacak nesne öneki")
+
+    def handle(self, *args, **options):
+        added, updated, removed = reconcile(options["prefix"])
+        self.stdout.write(self.style.SUCCESS(f"{added} eklendi, {updated} güncellendi, {removed} silindi."))
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.2 on 2026-10-18 10:05
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def rebuild_rollups(apps, schema_editor):
+    AnalysisResult = apps.get_model('users', 'AnalysisResult')
+    DailyAnalysis = apps.get_model('users', 'DailyAnalysis')
+
+    DailyAnalysis.objects.all().delete()  # eski tablo hiç doldurulmuyordu
+    rows = (
+        AnalysisResult.objects.values('analysis_date', 'food_category')
+        .annotate(
+            total=Count('id'),
+            waste=Count('id', filter=Q(is_waste=True)),
+            no_waste=Count('id', filter=Q(is_waste=False)),
+        )
+        .order_by()
+    )
+    DailyAnalysis.objects.bulk_create([
+        DailyAnalysis(
+            analysis_date=row['analysis_date'],
+            food_category=row['food_category'],
+            waste_count=row['waste'],
+            no_waste_count=row['no_waste'],
+            total_analysis=row['total'],
+        )
+        for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_analysisjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyanalysis',
+            name='analysis_date',
+            field=models.CharField(default='', max_length=20),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='dailyanalysis',
+            name='food_category',
+            field=models.CharField(default='', max_length=50),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='dailyanalysis',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(rebuild_rollups, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dailyanalysis',
+            constraint=models.UniqueConstraint(fields=('analysis_date', 'food_category'), name='uniq_daily_analysis_date_category'),
+        ),
+    ]
@@ -0,0 +1,128 @@
+# Generated by Django 5.2.2 on 2026-10-18 10:40
+
+import datetime
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+# Eski CharField değerlerinde görülen biçimler; ilki frontend'in gönderdiği yyyy-MM-dd
+DATE_FORMATS = ('%Y-%m-%d', '%d.%m.%Y', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d', '%Y.%m.%d')
+
+
+def _parse(value):
+    value = (value or '').strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value[:10], fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def backfill_analysis_day(apps, schema_editor):
+    """Metin tarihleri DateField'a taşır; çözülemeyenler kayıt gününe düşer."""
+    AnalysisResult = apps.get_model('users', 'AnalysisResult')
+    batch = []
+    for row in AnalysisResult.objects.only('id', 'analysis_date', 'created_at').iterator(chunk_size=2000):
+        row.analysis_day = _parse(row.analysis_date) or row.created_at.date()
+        batch.append(row)
+        if len(batch) >= 2000:
+            AnalysisResult.objects.bulk_update(batch, ['analysis_day'])
+            batch = []
+    if batch:
+        AnalysisResult.objects.bulk_update(batch, ['analysis_day'])
+
+
+def rebuild_rollups(apps, schema_editor):
+    """Birden çok metin biçimi aynı güne düşebildiği için özet baştan hesaplanır."""
+    AnalysisResult = apps.get_model('users', 'AnalysisResult')
+    DailyAnalysis = apps.get_model('users', 'DailyAnalysis')
+
+    DailyAnalysis.objects.all().delete()
+    rows = (
+        AnalysisResult.objects.values('analysis_date', 'food_category')
+        .annotate(
+            total=Count('id'),
+            waste=Count('id', filter=Q(is_waste=True)),
+            no_waste=Count('id', filter=Q(is_waste=False)),
+        )
+        .order_by()
+    )
+    DailyAnalysis.objects.bulk_create([
+        DailyAnalysis(
+            analysis_date=row['analysis_date'],
+            food_category=row['food_category'],
+            waste_count=row['waste'],
+            no_waste_count=row['no_waste'],
+            total_analysis=row['total'],
+        )
+        for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_dailyanalysis_rollup'),
+    ]
+
+    operations = [
+        # AnalysisResult.analysis_date: CharField -> DateField (geçici sütun üzerinden)
+        migrations.AddField(
+            model_name='analysisresult',
+            name='analysis_day',
+            field=models.DateField(null=True),
+        ),
+        migrations.RunPython(backfill_analysis_day, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='analysisresult',
+            name='analysis_date',
+        ),
+        migrations.RenameField(
+            model_name='analysisresult',
+            old_name='analysis_day',
+            new_name='analysis_date',
+        ),
+        migrations.AlterField(
+            model_name='analysisresult',
+            name='analysis_date',
+            field=models.DateField(),
+        ),
+        # DailyAnalysis.analysis_date: özet tablosu yeni sütundan yeniden kurulur
+        migrations.RemoveConstraint(
+            model_name='dailyanalysis',
+            name='uniq_daily_analysis_date_category',
+        ),
+        migrations.RemoveField(
+            model_name='dailyanalysis',
+            name='analysis_date',
+        ),
+        migrations.AddField(
+            model_name='dailyanalysis',
+            name='analysis_date',
+            field=models.DateField(null=True),
+        ),
+        migrations.RunPython(rebuild_rollups, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='dailyanalysis',
+            name='analysis_date',
+            field=models.DateField(),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyanalysis',
+            constraint=models.UniqueConstraint(fields=('analysis_date', 'food_category'), name='uniq_daily_analysis_date_category'),
+        ),
+        # Listeleme, tekilleştirme ve kategori/israf sorguları için indeksler
+        migrations.AddIndex(
+            model_name='analysisresult',
+            index=models.Index(fields=['analysis_date', 'created_at'], name='result_date_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='analysisresult',
+            index=models.Index(fields=['image_url'], name='result_image_url_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='analysisresult',
+            index=models.Index(fields=['food_category', 'is_waste'], name='result_category_waste_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.2 on 2026-10-18 11:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_analysis_date_datefield_and_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='analysisresult',
+            index=models.Index(fields=['created_at', 'id'], name='result_created_id_idx'),
+        ),
+    ]
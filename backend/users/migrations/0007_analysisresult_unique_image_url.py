@@ -0,0 +1,65 @@
+# Generated by Django 5.2.2 on 2026-10-18 11:50
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def dedupe_image_urls(apps, schema_editor):
+    """Aynı image_url için yalnızca en son yazılan satırı tutar (update_or_create'in göreceği satır)."""
+    AnalysisResult = apps.get_model('users', 'AnalysisResult')
+    DailyAnalysis = apps.get_model('users', 'DailyAnalysis')
+
+    duplicates = (
+        AnalysisResult.objects.exclude(image_url=None)
+        .values('image_url')
+        .annotate(n=Count('id'), keep=Max('id'))
+        .filter(n__gt=1)
+        .order_by()
+    )
+    removed = 0
+    for row in duplicates.iterator():
+        removed += AnalysisResult.objects.filter(image_url=row['image_url']).exclude(id=row['keep']).delete()[0]
+    if not removed:
+        return
+
+    # silinen satırlar günlük özetten de düşmeli
+    DailyAnalysis.objects.all().delete()
+    rows = (
+        AnalysisResult.objects.values('analysis_date', 'food_category')
+        .annotate(
+            total=Count('id'),
+            waste=Count('id', filter=Q(is_waste=True)),
+            no_waste=Count('id', filter=Q(is_waste=False)),
+        )
+        .order_by()
+    )
+    DailyAnalysis.objects.bulk_create([
+        DailyAnalysis(
+            analysis_date=row['analysis_date'],
+            food_category=row['food_category'],
+            waste_count=row['waste'],
+            no_waste_count=row['no_waste'],
+            total_analysis=row['total'],
+        )
+        for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_analysisresult_created_id_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_image_urls, migrations.RunPython.noop),
+        # benzersizlik kısıtı kendi indeksini getirir
+        migrations.RemoveIndex(
+            model_name='analysisresult',
+            name='result_image_url_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='analysisresult',
+            constraint=models.UniqueConstraint(fields=('image_url',), name='uniq_analysis_result_image_url'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.2 on 2026-10-18 12:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_analysisresult_unique_image_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadedPhoto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=500, unique=True)),
+                ('size', models.BigIntegerField(blank=True, null=True)),
+                ('content_type', models.CharField(blank=True, default='', max_length=100)),
+                ('uploaded_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('indexed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.2 on 2026-10-18 16:05
+
+from django.db import migrations, models
+from django.utils.dateparse import parse_date
+
+
+def backfill_analysis_day(apps, schema_editor):
+    """Metin tarihleri DateField'a taşır; çözülemeyenler kayıt gününe düşer (iş kayıtları kısa ömürlü)."""
+    AnalysisJob = apps.get_model('users', 'AnalysisJob')
+    batch = []
+    for job in AnalysisJob.objects.only('id', 'analysis_date', 'created_at').iterator(chunk_size=2000):
+        try:
+            job.analysis_day = parse_date((job.analysis_date or '').strip())
+        except ValueError:
+            job.analysis_day = None
+        job.analysis_day = job.analysis_day or job.created_at.date()
+        batch.append(job)
+        if len(batch) >= 2000:
+            AnalysisJob.objects.bulk_update(batch, ['analysis_day'])
+            batch = []
+    if batch:
+        AnalysisJob.objects.bulk_update(batch, ['analysis_day'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_analysiscache'),
+    ]
+
+    operations = [
+        # AnalysisJob.analysis_date: CharField -> DateField (0005'teki AnalysisResult geçişi gibi geçici sütun üzerinden)
+        migrations.AddField(
+            model_name='analysisjob',
+            name='analysis_day',
+            field=models.DateField(null=True),
+        ),
+        migrations.RunPython(backfill_analysis_day, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='analysisjob',
+            name='analysis_date',
+        ),
+        migrations.RenameField(
+            model_name='analysisjob',
+            old_name='analysis_day',
+            new_name='analysis_date',
+        ),
+        migrations.AlterField(
+            model_name='analysisjob',
+            name='analysis_date',
+            field=models.DateField(),
+        ),
+    ]
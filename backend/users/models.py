@@ -1,4 +1,7 @@
+import uuid
+
 from django.db import models
+from django.utils import timezone
 
 # TEKİL ANALİZ KAYDI (her fotoğraf analizi için bir satır)
 class AnalysisResult(models.Model):
@@ -7,12 +10,75 @@ class AnalysisResult(models.Model):
     food_type = models.CharField(max_length=100)      # ör: 'mercimek-corbasi', 'et-sote', vs.
     is_waste = models.BooleanField()
     created_at = models.DateTimeField(auto_now_add=True)
-    analysis_date = models.CharField(max_length=20)
+    analysis_date = models.DateField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["analysis_date", "created_at"], name="result_date_created_idx"),  # tarihli listeleme
+            models.Index(fields=["created_at", "id"], name="result_created_id_idx"),               # keyset sayfalama / dışa aktarma
+            models.Index(fields=["food_category", "is_waste"], name="result_category_waste_idx"),
+        ]
+        constraints = [
+            # kırpıntı anahtarı: toplu upsert (bulk_create update_conflicts) bunun üzerinden çalışır
+            models.UniqueConstraint(fields=["image_url"], name="uniq_analysis_result_image_url"),
+        ]
 
     def __str__(self):
         return f"{self.food_category} | {self.food_type} - {'israf-var' if self.is_waste else 'israf-yok'}"
 
 
+# ASENKRON ANALİZ İŞİ (POST /api/analysis/jobs/ ile kuyruğa alınır, durum buradan okunur)
+class AnalysisJob(models.Model):
+    STATUS_CHOICES = [
+        ("queued", "queued"),
+        ("running", "running"),
+        ("done", "done"),
+        ("failed", "failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    image_url = models.URLField(max_length=500)
+    analysis_date = models.DateField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued")
+    result = models.JSONField(null=True, blank=True)       # analyze_and_store() yanıt gövdesi
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.id} | {self.status}"
+
+
+# YÜKLENEN FOTOĞRAF DİZİNİ (/api/photos/ her istekte bucket'ı listelemek yerine buradan okur)
+class UploadedPhoto(models.Model):
+    name = models.CharField(max_length=500, unique=True)   # depolama nesne adı, ör: 'uploads/<uuid>_foto.jpg'
+    size = models.BigIntegerField(null=True, blank=True)
+    content_type = models.CharField(max_length=100, blank=True, default="")
+    uploaded_at = models.DateTimeField(default=timezone.now)
+    indexed_at = models.DateTimeField(auto_now=True)        # ETag için: dizin en son ne zaman değişti
+
+    def __str__(self):
+        return self.name
+
+
+# ANALİZ ÖNBELLEĞİ (aynı görsel baytları + aynı model ağırlıkları -> aynı kırpıntı sonuçları)
+class AnalysisCache(models.Model):
+    image_hash = models.CharField(max_length=64)          # görsel baytlarının SHA-256'sı
+    model_fingerprint = models.CharField(max_length=64)   # model_registry.model_fingerprint()
+    results = models.JSONField()                          # crop_and_save() çıktısı
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["image_hash", "model_fingerprint"], name="uniq_analysis_cache_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.image_hash[:12]} @ {self.model_fingerprint[:12]}"
+
+
 # # HAFTALIK MENÜ BAŞLIĞI
 # class WeeklyMenu(models.Model):
 #     start_date = models.DateField()   # Haftanın başlangıç tarihi (örn: 2024-06-03)
@@ -41,15 +107,20 @@ class AnalysisResult(models.Model):
 #         return f"{self.date}: {self.main_dish}"
 
 
-# GÜNLÜK ÖZET ANALİZ (istenirse, günlük toplam/istatistik için)
+# GÜNLÜK ÖZET ANALİZ (gün + kategori başına toplamlar; her AnalysisResult yazımında artımlı güncellenir)
 class DailyAnalysis(models.Model):
-    
-
+    analysis_date = models.DateField()   # AnalysisResult.analysis_date ile aynı değer
+    food_category = models.CharField(max_length=50)
     waste_count = models.IntegerField(default=0)
     no_waste_count = models.IntegerField(default=0)
     total_analysis = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
-    # Ek alanlar eklenebilir (örn: notlar, ekstra istatistikler)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["analysis_date", "food_category"], name="uniq_daily_analysis_date_category"),
+        ]
 
     def __str__(self):
-        return f"{self.daily_menu.date} Analiz: {self.total_analysis} ({self.waste_count} israf, {self.no_waste_count} israf-yok)"
+        return f"{self.analysis_date} {self.food_category} Analiz: {self.total_analysis} ({self.waste_count} israf, {self.no_waste_count} israf-yok)"
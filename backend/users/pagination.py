@@ -0,0 +1,91 @@
+# users/pagination.py
+"""
+Keyset (cursor) sayfalama; varsayılan anahtar (created_at, id).
+
+OFFSET'in aksine her sayfa indeksten doğrudan okunur; derin sayfalar da ilk
+sayfa kadar ucuzdur. Yalnızca ?cursor= veya ?page_size= verildiğinde devreye
+girer, aksi halde uç nokta eskisi gibi düz liste döner.
+"""
+import base64
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    page_size = 100
+    max_page_size = 1000
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Geçersiz cursor."
+    ordering = ("-created_at", "-id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None  # sayfalama istenmedi: düz liste
+
+        self.request = request
+        self.size = self._page_size(params.get(self.page_size_query_param))
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = params.get(self.cursor_query_param)
+        if cursor:
+            try:
+                raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+                queryset = self.after(queryset, raw)
+            except (TypeError, ValueError, UnicodeError):
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = list(queryset[:self.size + 1])
+        self.has_next = len(rows) > self.size
+        rows = rows[:self.size]
+        self.last = rows[-1] if rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.size)
+        raw = self.position(self.last)
+        return replace_query_param(url, self.cursor_query_param,
+                                   base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii"))
+
+    def _page_size(self, value):
+        try:
+            size = int(value)
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    # --- sıralama anahtarı: alt sınıflar ordering, position ve after'ı değiştirir ---
+    def position(self, obj):
+        """Son satırın cursor metni."""
+        return f"{obj.created_at.isoformat()}|{obj.pk}"
+
+    def after(self, queryset, raw):
+        """Cursor metninden sonraki satırlar; bozuk cursor için ValueError."""
+        created_at, pk = raw.rsplit("|", 1)
+        created_at, pk = parse_datetime(created_at), int(pk)
+        if created_at is None:
+            raise ValueError(raw)
+        return queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+
+class NameKeysetPagination(KeysetPagination):
+    """Benzersiz "name" alanına göre artan sıralı keyset sayfalama (fotoğraf dizini)."""
+    ordering = ("name",)
+
+    def position(self, obj):
+        return obj.name
+
+    def after(self, queryset, raw):
+        return queryset.filter(name__gt=raw)
@@ -0,0 +1,114 @@
+# users/photo_index.py
+"""
+Yüklenen fotoğrafların yerel dizini (UploadedPhoto).
+
+/api/photos/ artık her istekte bucket'ı baştan sona listelemez; UploadPhotoView
+yazdığı her nesneyi dizine ekler, uzlaştırma (reconcile) ise bucket'ta
+dışarıdan eklenen/silinen nesneleri dizine yansıtır. Uzlaştırma
+`manage.py reconcile_photos` ile (cron) ya da liste isteği sırasında dizin
+PHOTO_INDEX_RECONCILE_SECONDS'tan eskiyse arka planda çalışır.
+"""
+import hashlib
+import os
+import threading
+import time
+import traceback
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.http import quote_etag
+
+from yolo_models.storage import get_storage
+from .models import UploadedPhoto
+
+PREFIX = "uploads/"
+DELETE_BATCH = 500  # SQLite değişken sınırının altında
+
+_lock = threading.Lock()
+_pid = None
+_last_reconcile = None   # time.monotonic()
+_running = False
+
+
+def record_upload(name, size=None, content_type=""):
+    """Yeni yüklenen nesneyi dizine ekler."""
+    UploadedPhoto.objects.update_or_create(name=name, defaults={"size": size, "content_type": content_type or ""})
+
+
+def reconcile(prefix=PREFIX):
+    """
+    Bucket listesini dizinle karşılaştırır; yalnızca yeni ve boyutu değişen
+    nesneleri yazar, bucket'ta artık olmayanları siler. (eklenen, güncellenen,
+    silinen) sayılarını döner.
+    """
+    global _last_reconcile
+    started = timezone.now()
+    known = dict(UploadedPhoto.objects.filter(name__startswith=prefix).values_list("name", "size"))
+
+    seen, new, changed = set(), [], []
+    for name, size, content_type, created in get_storage().list_info(prefix):
+        seen.add(name)
+        if name in known and known[name] == size:
+            continue
+        photo = UploadedPhoto(name=name, size=size, content_type=content_type, uploaded_at=created or started)
+        (changed if name in known else new).append(photo)
+
+    # listeleme sırasında yüklenenler (indexed_at >= started) silinmez
+    gone = list(known.keys() - seen)
+    with transaction.atomic():
+        if new or changed:
+            UploadedPhoto.objects.bulk_create(
+                new + changed, update_conflicts=True, unique_fields=["name"],
+                update_fields=["size", "content_type", "uploaded_at", "indexed_at"], batch_size=1000,
+            )
+        for i in range(0, len(gone), DELETE_BATCH):
+            UploadedPhoto.objects.filter(name__in=gone[i:i + DELETE_BATCH], indexed_at__lt=started).delete()
+
+    _last_reconcile = time.monotonic()
+    return len(new), len(changed), len(gone)
+
+
+def ensure_fresh():
+    """
+    Dizin eskiyse uzlaştırır: dizin boşsa (ilk kurulum) istek içinde, değilse
+    arka plan thread'inde; istek beklemez.
+    """
+    global _pid, _last_reconcile, _running
+    interval = settings.PHOTO_INDEX_RECONCILE_SECONDS
+    if interval <= 0:
+        return
+    with _lock:
+        if _pid != os.getpid():  # fork sonrası durum devralınmaz
+            _pid, _last_reconcile, _running = os.getpid(), None, False
+        if _running or (_last_reconcile is not None and time.monotonic() - _last_reconcile < interval):
+            return
+        _running = True
+
+    if not UploadedPhoto.objects.exists():
+        try:
+            reconcile()
+        finally:
+            _running = False
+        return
+    threading.Thread(target=_reconcile_in_background, name="photo-reconcile", daemon=True).start()
+
+
+def _reconcile_in_background():
+    global _running, _last_reconcile
+    try:
+        reconcile()
+    except Exception:
+        traceback.print_exc()
+        _last_reconcile = time.monotonic()  # hata durumunda da bir süre bekle
+    finally:
+        _running = False
+        close_old_connections()
+
+
+def etag(queryset, variant=""):
+    """Dizin durumundan (satır sayısı + son değişiklik) ve sorgudan türetilen ETag."""
+    state = queryset.aggregate(n=Count("id"), changed=Max("indexed_at"))
+    raw = f"{state['n']}|{state['changed']}|{variant}"
+    return quote_etag(hashlib.sha1(raw.encode("utf-8")).hexdigest())
@@ -0,0 +1,61 @@
+# users/result_cache.py
+"""
+Analiz sonucu önbelleği (AnalysisCache).
+
+Anahtar (görsel baytlarının SHA-256'sı, model parmak izi). Parmak izi model
+kayıt defterindeki ağırlık dosyalarının içeriğinden türetildiği için bir
+ağırlık değiştiğinde eski kayıtlar kendiliğinden geçersiz olur; bunlar
+ilk fırsatta silinir.
+"""
+import copy
+import hashlib
+import threading
+
+from django.db import IntegrityError
+
+from yolo_models.model_registry import model_fingerprint
+from yolo_models import storage
+from .models import AnalysisCache
+
+_pruned_for = None
+_prune_lock = threading.Lock()
+
+
+def image_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def get(digest):
+    """Önbellekteki kırpıntı sonuçlarının kopyası; yoksa None."""
+    fingerprint = model_fingerprint()
+    _prune_stale(fingerprint)
+    entry = AnalysisCache.objects.filter(image_hash=digest, model_fingerprint=fingerprint).only("results").first()
+    return copy.deepcopy(entry.results) if entry is not None else None
+
+
+def put(digest, results):
+    """
+    Yalnızca hatasız analizleri saklar. Ertelenmiş yüklemelerde kırpıntıların
+    gerçekten yazıldığı bilinmediği için önbelleğe alınmaz.
+    """
+    if storage.DEFER_UPLOADS or any(result.get("error") or result.get("db_error") for result in results):
+        return
+    cached = [{k: v for k, v in result.items() if k != "analysis_date"} for result in results]
+    try:
+        AnalysisCache.objects.update_or_create(
+            image_hash=digest, model_fingerprint=model_fingerprint(), defaults={"results": cached}
+        )
+    except IntegrityError:
+        pass  # aynı görsel eşzamanlı analiz edildi; diğer kayıt yeterli
+
+
+def _prune_stale(fingerprint):
+    """Parmak izi değiştiğinde (süreç başına bir kez) eski modellere ait kayıtları siler."""
+    global _pruned_for
+    if _pruned_for == fingerprint:
+        return
+    with _prune_lock:
+        if _pruned_for == fingerprint:
+            return
+        AnalysisCache.objects.exclude(model_fingerprint=fingerprint).delete()
+        _pruned_for = fingerprint
@@ -0,0 +1,68 @@
+# users/rollups.py
+"""
+DailyAnalysis günlük özetlerinin bakımı.
+
+Her AnalysisResult ekleme/güncellemesi aynı transaction içinde ilgili
+(gün, kategori) satırını F() ifadeleriyle artırır; dashboard sorguları
+tüm AnalysisResult tablosu yerine bu küçük tabloyu okur.
+"""
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import AnalysisResult, DailyAnalysis
+
+
+def record(analysis_date, food_category, is_waste, delta=1):
+    """(gün, kategori) özetine delta kadar sonuç ekler (çıkarmak için delta=-1)."""
+    apply([(analysis_date, food_category, is_waste, delta)])
+
+
+def apply(changes):
+    """
+    (gün, kategori, israf mı, delta) değişikliklerini uygular. Aynı satıra
+    düşen değişiklikler birleştirilir; her (gün, kategori) için tek UPDATE.
+    """
+    totals = {}
+    for analysis_date, food_category, is_waste, delta in changes:
+        waste, no_waste = totals.get((analysis_date, food_category), (0, 0))
+        totals[(analysis_date, food_category)] = (waste + (delta if is_waste else 0),
+                                                  no_waste + (0 if is_waste else delta))
+
+    now = timezone.now()
+    for (analysis_date, food_category), (waste, no_waste) in totals.items():
+        if not waste and not no_waste:
+            continue
+        DailyAnalysis.objects.get_or_create(analysis_date=analysis_date, food_category=food_category)
+        DailyAnalysis.objects.filter(analysis_date=analysis_date, food_category=food_category).update(
+            waste_count=F("waste_count") + waste,
+            no_waste_count=F("no_waste_count") + no_waste,
+            total_analysis=F("total_analysis") + waste + no_waste,
+            updated_at=now,
+        )
+
+
+def rebuild(result_model=AnalysisResult, daily_model=DailyAnalysis):
+    """Özetleri AnalysisResult tablosundan baştan hesaplar (migration ve onarım için)."""
+    daily_model.objects.all().delete()
+    rows = (
+        result_model.objects.values("analysis_date", "food_category")
+        .annotate(
+            total=Count("id"),
+            waste=Count("id", filter=Q(is_waste=True)),
+            no_waste=Count("id", filter=Q(is_waste=False)),
+        )
+        .order_by()
+    )
+    daily_model.objects.bulk_create(
+        [
+            daily_model(
+                analysis_date=row["analysis_date"],
+                food_category=row["food_category"],
+                waste_count=row["waste"],
+                no_waste_count=row["no_waste"],
+                total_analysis=row["total"],
+            )
+            for row in rows
+        ],
+        batch_size=500,
+    )
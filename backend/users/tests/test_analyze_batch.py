@@ -0,0 +1,56 @@
+import json
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+
+class SystemCheckTests(SimpleTestCase):
+    def test_check(self):
+        out = StringIO()
+        call_command("check", stdout=out)
+        self.assertIn("no issues", out.getvalue())
+
+
+class AnalyzeBatchViewTests(TestCase):
+    url = "/api/analysis/batch/"
+
+    def post(self, body):
+        return self.client.post(self.url, json.dumps(body), content_type="application/json")
+
+    def test_requires_images_and_date(self):
+        self.assertEqual(self.post({"analysis_date": "2024-05-01"}).status_code, 400)
+        self.assertEqual(self.post({"image_urls": ["https://x/a.jpg"]}).status_code, 400)
+
+    def test_invalid_date(self):
+        self.assertEqual(self.post({"image_urls": ["https://x/a.jpg"], "analysis_date": "01.05.2024"}).status_code, 400)
+
+    @override_settings(BATCH_ANALYSIS_MAX_IMAGES=2)
+    def test_image_limit(self):
+        response = self.post({"image_urls": ["https://x/a.jpg", "https://x/b.jpg"], "upload_ids": ["uploads/c.jpg"],
+                              "analysis_date": "2024-05-01"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("2", response.json()["error"])
+
+    def test_streams_ndjson_rows(self):
+        rows = [(1, "https://x/b.jpg", {"error": "Görsel indirilemedi."}, 400),
+                (0, "https://x/a.jpg", {"results": []}, 200)]
+        with mock.patch("users.views.analyze_batch", return_value=iter(rows)) as analyze:
+            response = self.post({"image_urls": ["https://x/a.jpg", "https://x/b.jpg"], "analysis_date": "2024-05-01"})
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response["Content-Type"].startswith("application/x-ndjson"))
+            lines = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        analyze.assert_called_once_with(["https://x/a.jpg", "https://x/b.jpg"], "2024-05-01")
+        self.assertEqual(lines, [
+            {"index": 1, "image_url": "https://x/b.jpg", "status": 400, "error": "Görsel indirilemedi."},
+            {"index": 0, "image_url": "https://x/a.jpg", "status": 200, "results": []},
+        ])
+
+    def test_upload_ids_resolve_to_storage_urls(self):
+        with mock.patch("users.views.analyze_batch", return_value=iter(())) as analyze, \
+                mock.patch("users.views.get_storage") as get_storage:
+            get_storage.return_value.url.side_effect = lambda name: f"/media/{name}"
+            response = self.post({"upload_ids": ["uploads/a.jpg"], "analysis_date": "2024-05-01"})
+            b"".join(response.streaming_content)
+        analyze.assert_called_once_with(["/media/uploads/a.jpg"], "2024-05-01")
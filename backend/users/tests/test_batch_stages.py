@@ -0,0 +1,69 @@
+import asyncio
+import time
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+
+from users import analysis, async_views
+from users.models import AnalysisResult
+
+URLS = ["https://x/missing.jpg", "https://x/broken.jpg", "https://x/plate.jpg"]
+DATA = {URLS[1]: b"broken", URLS[2]: b"plate"}
+
+
+def fetch(url):
+    if url not in DATA:
+        raise OSError("404")
+    return DATA[url]
+
+
+async def fetch_async(url):
+    return fetch(url)
+
+
+def decode(data):
+    return ValueError("bozuk") if data == b"broken" else ("img0", lambda: "crop")
+
+
+def crop(image_url, analysis_date, images, detections):
+    return [{"image_url": "https://x/crops/1.jpg", "food_category": "corba", "food_type": "mercimek", "is_waste": False}]
+
+
+class BatchStagesTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch("users.result_cache.model_fingerprint", return_value="test")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assert_rows(self, rows):
+        rows = {i: (url, body.get("error", body.get("message")), status) for i, url, body, status in rows}
+        self.assertEqual(rows, {
+            0: (URLS[0], "Görsel indirilemedi: 404", 400),
+            1: (URLS[1], "Görsel açılamadı: bozuk", 400),
+            2: (URLS[2], "Analiz tamamlandı", 200),
+        })
+        self.assertEqual(AnalysisResult.objects.get().food_category, "corba")
+
+    def test_sync_batch(self):
+        with mock.patch.object(analysis, "fetch_image_bytes", side_effect=fetch), \
+                mock.patch.object(analysis, "decode_images", side_effect=decode), \
+                mock.patch.object(analysis, "detect_plates", side_effect=lambda images: [[]] * len(images)), \
+                mock.patch.object(analysis, "crop_images", side_effect=crop):
+            self.assert_rows(list(analysis.analyze_batch(URLS, "2025-05-01")))
+
+    async def test_async_batch(self):
+        with mock.patch.object(async_views, "fetch_image_bytes_async", side_effect=fetch_async), \
+                mock.patch.object(async_views, "decode_images", side_effect=decode), \
+                mock.patch.object(async_views, "detect_plates", side_effect=lambda images: [[]] * len(images)), \
+                mock.patch.object(async_views, "crop_images", side_effect=crop):
+            rows = [row async for row in async_views._analyze_batch(URLS, "2025-05-01")]
+        await sync_to_async(self.assert_rows)(rows)
+
+    async def test_storage_calls_overlap(self):
+        def slow():
+            time.sleep(0.3)
+
+        start = time.monotonic()
+        await asyncio.gather(*(async_views._storage_io(slow)() for _ in range(4)))
+        self.assertLess(time.monotonic() - start, 0.9)  # paylaşılan thread'de sırayla 1.2 sn sürerdi
@@ -0,0 +1,60 @@
+import datetime
+import queue
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from users import jobs
+from users.models import AnalysisJob
+
+DAY = datetime.date(2025, 5, 1)
+
+
+def job(status, age, **fields):
+    created = AnalysisJob.objects.create(image_url="https://x/1.jpg", analysis_date=DAY, status=status, **fields)
+    AnalysisJob.objects.filter(pk=created.pk).update(created_at=timezone.now() - age)  # auto_now_add'i geç
+    return created.pk
+
+
+@override_settings(ANALYSIS_JOB_STALE_MINUTES=30, ANALYSIS_JOB_TTL_HOURS=24)
+class AnalysisJobTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(jobs, "_last_prune", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_prune_fails_jobs_orphaned_by_a_dead_worker(self):
+        stale_queued = job("queued", datetime.timedelta(hours=2))
+        stale_running = job("running", datetime.timedelta(hours=2), started_at=timezone.now())
+        fresh = job("queued", datetime.timedelta(minutes=5))
+        done = job("done", datetime.timedelta(hours=2), finished_at=timezone.now())
+
+        jobs._prune()
+
+        for pk in (stale_queued, stale_running):
+            orphan = AnalysisJob.objects.get(pk=pk)
+            self.assertEqual((orphan.status, orphan.status_code), ("failed", 500))
+            self.assertIsNotNone(orphan.finished_at)
+        self.assertEqual(AnalysisJob.objects.get(pk=fresh).status, "queued")
+        self.assertEqual(AnalysisJob.objects.get(pk=done).status, "done")
+
+    def test_prune_deletes_expired_jobs(self):
+        expired = job("done", datetime.timedelta(days=3), finished_at=timezone.now() - datetime.timedelta(days=2))
+        jobs._prune()
+        self.assertFalse(AnalysisJob.objects.filter(pk=expired).exists())
+
+    def test_submit_stores_a_date(self):
+        with mock.patch.object(jobs, "_ensure_workers"), mock.patch.object(jobs, "_queue", queue.Queue()) as q:
+            created = jobs.submit("https://x/1.jpg", "2025-05-01")
+        self.assertEqual(AnalysisJob.objects.get(pk=created.pk).analysis_date, DAY)
+        self.assertEqual(q.get_nowait(), created.pk)
+
+    def test_run_passes_the_date_as_text(self):
+        pk = job("queued", datetime.timedelta(0))
+        body = {"message": "Analiz tamamlandı", "results": [], "cached": False}
+        with mock.patch.object(jobs, "analyze_and_store", return_value=(body, 200)) as analyze, \
+                mock.patch.object(jobs, "close_old_connections"):
+            jobs._run(pk)
+        analyze.assert_called_once_with("https://x/1.jpg", "2025-05-01")
+        self.assertEqual(AnalysisJob.objects.get(pk=pk).status, "done")
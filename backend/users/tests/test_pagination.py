@@ -0,0 +1,65 @@
+import base64
+import datetime
+from urllib.parse import parse_qs, urlsplit
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from users.models import AnalysisResult, UploadedPhoto
+from users.pagination import NameKeysetPagination
+
+DAY = datetime.date(2025, 5, 1)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        AnalysisResult.objects.bulk_create(
+            AnalysisResult(image_url=f"https://x/{i}.jpg", food_category="corba", food_type="mercimek",
+                           is_waste=bool(i % 2), analysis_date=DAY)
+            for i in range(7)
+        )
+        # aynı created_at değerleri: sıra id ile ayrışmalı
+        base = timezone.now()
+        for i, pk in enumerate(AnalysisResult.objects.order_by("id").values_list("id", flat=True)):
+            AnalysisResult.objects.filter(pk=pk).update(created_at=base - datetime.timedelta(seconds=i // 3))
+
+    def test_cursor_round_trip_visits_every_row_once(self):
+        expected = list(AnalysisResult.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        url, seen, pages = "/api/analysis-results/?page_size=2", [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            seen += [row["id"] for row in body["results"]]
+            url, pages = body["next"], pages + 1
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, 4)
+
+    def test_cursor_is_position_of_last_row(self):
+        body = self.client.get("/api/analysis-results/?page_size=3").json()
+        last = AnalysisResult.objects.get(pk=body["results"][-1]["id"])
+        [cursor] = parse_qs(urlsplit(body["next"]).query)["cursor"]
+        raw = base64.urlsafe_b64decode(cursor).decode("utf-8")
+        self.assertEqual(raw, f"{last.created_at.isoformat()}|{last.pk}")
+
+    def test_invalid_cursor(self):
+        for cursor in ("bm90LWEtY3Vyc29y", "%%%", base64.urlsafe_b64encode(b"2025-05-01T00:00:00|x").decode()):
+            self.assertEqual(self.client.get(f"/api/analysis-results/?cursor={cursor}").status_code, 404)
+
+    def test_without_params_returns_plain_list(self):
+        body = self.client.get("/api/analysis-results/").json()
+        self.assertIsInstance(body, list)
+        self.assertEqual(len(body), 7)
+
+    def test_name_keyset_round_trip(self):
+        names = [f"uploads/{i:02d}.jpg" for i in range(5)]
+        UploadedPhoto.objects.bulk_create(UploadedPhoto(name=name) for name in reversed(names))
+        factory, seen, url = APIRequestFactory(), [], "/api/photos/?page_size=2"
+        while url:
+            paginator = NameKeysetPagination()
+            page = paginator.paginate_queryset(UploadedPhoto.objects.all(), Request(factory.get(url)))
+            seen += [photo.name for photo in page]
+            url = paginator.get_next_link()
+        self.assertEqual(seen, names)
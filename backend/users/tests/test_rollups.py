@@ -0,0 +1,54 @@
+import datetime
+from unittest import mock
+
+from django.test import TestCase
+
+from users import analysis
+from users.models import AnalysisResult, DailyAnalysis
+
+DAY = datetime.date(2025, 5, 1)
+
+
+def result(url, category="corba", is_waste=False, day=DAY):
+    return AnalysisResult(image_url=url, food_category=category, food_type="mercimek", is_waste=is_waste,
+                          analysis_date=day)
+
+
+class UpsertRollupTests(TestCase):
+    def counts(self):
+        return {
+            (row.analysis_date, row.food_category): (row.waste_count, row.no_waste_count, row.total_analysis)
+            for row in DailyAnalysis.objects.all()
+            if row.total_analysis or row.waste_count or row.no_waste_count
+        }
+
+    def store(self, *objs):
+        analysis.store_results([({}, obj) for obj in objs])
+
+    def test_first_insert_counts_once(self):
+        self.store(result("https://x/1.jpg"), result("https://x/2.jpg", is_waste=True))
+        self.assertEqual(self.counts(), {(DAY, "corba"): (1, 1, 2)})
+        self.assertEqual(AnalysisResult.objects.count(), 2)
+
+    def test_reanalysis_moves_the_count(self):
+        self.store(result("https://x/1.jpg"))
+        self.store(result("https://x/1.jpg", category="pilav", is_waste=True))
+        self.assertEqual(self.counts(), {(DAY, "pilav"): (1, 0, 1)})
+        self.assertEqual(AnalysisResult.objects.get().food_category, "pilav")
+
+    def test_single_row_reanalysis(self):
+        self.store(result("https://x/1.jpg"))
+        self.store(result("https://x/1.jpg"))
+        self.assertEqual(self.counts(), {(DAY, "corba"): (0, 1, 1)})
+
+    def test_mixed_batch_counts_new_rows_and_moves_existing(self):
+        self.store(result("https://x/1.jpg"))
+        self.store(result("https://x/1.jpg", is_waste=True), result("https://x/2.jpg"))
+        self.assertEqual(self.counts(), {(DAY, "corba"): (1, 1, 2)})
+        self.assertEqual(AnalysisResult.objects.count(), 2)
+
+    def test_keys_are_locked_before_the_pre_read(self):
+        calls = []
+        with mock.patch.object(analysis, "_lock_keys", side_effect=lambda urls: calls.append(sorted(urls))):
+            self.store(result("https://x/2.jpg"), result("https://x/1.jpg"))
+        self.assertEqual(calls, [["https://x/1.jpg", "https://x/2.jpg"]])
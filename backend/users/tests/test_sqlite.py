@@ -0,0 +1,23 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from users.apps import configure_sqlite
+
+
+class ConfigureSqliteTests(SimpleTestCase):
+    def pragmas(self):
+        connection = mock.MagicMock(vendor="sqlite")
+        configure_sqlite(None, connection)
+        cursor = connection.cursor.return_value.__enter__.return_value
+        return [call.args[0] for call in cursor.execute.call_args_list]
+
+    def test_wal_is_off_by_default(self):
+        # manage.py komutları ve testler depodaki db.sqlite3 başlığını WAL'a çevirmemeli
+        pragmas = self.pragmas()
+        self.assertFalse(any("journal_mode" in p for p in pragmas))
+        self.assertTrue(any("busy_timeout" in p for p in pragmas))
+
+    @override_settings(SQLITE_WAL=True)
+    def test_server_enables_wal(self):
+        self.assertIn("PRAGMA journal_mode=WAL;", self.pragmas())
@@ -0,0 +1,88 @@
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from yolo_models import storage
+from users.models import UploadedPhoto
+
+JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 1020
+
+
+class UploadPhotoViewTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.previous = storage.get_storage() if storage._storage is not None else None
+        self.store = storage.LocalStorage(self.root, base_url="/media/")
+        storage.set_storage(self.store)
+
+    def tearDown(self):
+        storage.set_storage(self.previous)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def upload(self, *files):
+        return self.client.post("/api/upload/", {"photos": list(files)})
+
+    def test_upload_is_content_addressed_and_indexed(self):
+        response = self.upload(SimpleUploadedFile("a.jpg", JPEG, content_type="image/jpeg"))
+        self.assertEqual(response.status_code, 200)
+        [url] = response.json()["uploaded_urls"]
+        name = url.removeprefix("/media/")
+        self.assertRegex(name, r"^uploads/[0-9a-f]{64}\.jpg$")
+        print("RESP", list(self.store.list())); self.assertEqual(list(self.store.list("incoming/")), [])
+        self.assertTrue(UploadedPhoto.objects.filter(name=name, size=len(JPEG)).exists())
+
+    def test_duplicate_upload_reuses_object(self):
+        first = self.upload(SimpleUploadedFile("a.jpg", JPEG, content_type="image/jpeg")).json()
+        second = self.upload(SimpleUploadedFile("b.jpg", JPEG, content_type="image/jpeg")).json()
+        self.assertEqual(first["uploaded_urls"], second["uploaded_urls"])
+        self.assertEqual(len(list(self.store.list("uploads/"))), 1)
+        print("RESP", list(self.store.list())); self.assertEqual(list(self.store.list("incoming/")), [])
+
+    @override_settings(UPLOAD_MAX_BYTES=512)
+    def test_oversized_file_is_rejected(self):
+        response = self.upload(SimpleUploadedFile("big.jpg", JPEG, content_type="image/jpeg"))
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(list(self.store.list()), [])
+        self.assertFalse(UploadedPhoto.objects.exists())
+
+    def test_declared_type_not_allowed(self):
+        response = self.upload(SimpleUploadedFile("a.gif", b"GIF89a" + b"\x00" * 64, content_type="image/gif"))
+        self.assertEqual(response.status_code, 415)
+
+    def test_content_not_an_image(self):
+        response = self.upload(SimpleUploadedFile("a.jpg", b"<html></html>", content_type="image/jpeg"))
+        self.assertEqual(response.status_code, 415)
+        self.assertEqual(list(self.store.list()), [])
+
+    def test_rejected_file_discards_accepted_ones(self):
+        response = self.upload(
+            SimpleUploadedFile("a.jpg", JPEG, content_type="image/jpeg"),
+            SimpleUploadedFile("b.jpg", b"not an image", content_type="image/jpeg"),
+        )
+        self.assertEqual(response.status_code, 415)
+        self.assertEqual(list(self.store.list()), [])  # yanıt silmeler bittikten sonra döner
+
+    @override_settings(UPLOAD_MAX_BYTES=300 * 1024)
+    def test_rejected_temp_object_is_deleted_before_response(self):
+        delete, deleted = self.store.delete, []
+
+        def slow_delete(name):
+            time.sleep(0.2)
+            delete(name)
+            deleted.append(name)
+
+        with mock.patch.object(self.store, "delete", side_effect=slow_delete):
+            # ilk parça yazıcıya verildikten sonra reddedilir
+            big = JPEG + b"\x00" * (400 * 1024)
+            response = self.upload(SimpleUploadedFile("big.jpg", big, content_type="image/jpeg"))
+            self.assertEqual(response.status_code, 413)
+            self.assertEqual(len(deleted), 1)
+            self.assertTrue(deleted[0].startswith("incoming/"))
+        self.assertEqual(list(self.store.list()), [])
+
+    def test_missing_file(self):
+        self.assertEqual(self.client.post("/api/upload/", {}).status_code, 400)
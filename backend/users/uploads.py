@@ -0,0 +1,246 @@
+# users/uploads.py
+"""
+Fotoğraf yüklemelerini belleğe almadan depolamaya akıtan upload handler.
+
+Multipart gövdesi okunurken her dosyanın parçaları sınırlı bir kuyruk
+üzerinden arka plan yazıcısına verilir; yazıcı parçaları GCS resumable
+yüklemesine (ya da yerel dosyaya) geçici bir adla yazar. Böylece bir dosya
+depolamaya yazılırken sonraki dosya ağdan okunmaya devam eder. İçerik
+SHA-256'sı akış sırasında hesaplanır; dosya bitince nesne sunucu tarafında
+`uploads/<sha256><uzantı>` adına taşınır (aynı içerik zaten varsa geçici
+nesne silinir).
+
+İstek başına bellek: dosya başına en fazla QUEUE_CHUNKS parça + depolama
+istemcisinin tamponu; dosya boyutu ve sayısından bağımsız.
+"""
+import hashlib
+import os
+import queue
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+
+from yolo_models import storage
+from . import photo_index
+from .models import UploadedPhoto
+
+FIELD_NAME = "photos"
+INCOMING_PREFIX = "incoming/"     # uploads/ dışında: fotoğraf dizinine karışmaz
+CHUNK_SIZE = 256 * 1024           # multipart ayrıştırıcının handler'a verdiği parça
+QUEUE_CHUNKS = 4                  # dosya başına yazıcıyı bekleyen en fazla parça
+
+EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp"}
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Akış yazıcıları; süreç başına (fork sonrası yeniden) oluşturulur."""
+    global _executor, _executor_pid
+    if _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=settings.UPLOAD_STREAM_WORKERS,
+                                               thread_name_prefix="upload-stream")
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def sniff_content_type(head):
+    """Dosyanın ilk baytlarından gerçek görsel türü; tanınmazsa None."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+class UploadRejected(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+_END = object()
+_ABORT = object()
+
+
+class _StreamWriter:
+    """Kuyruktaki parçaları arka planda depolama nesnesine yazar."""
+
+    def __init__(self, name, content_type):
+        self.name = name
+        self.queue = queue.Queue(maxsize=QUEUE_CHUNKS)
+        self.future = storage.track(_get_executor().submit(self._run, content_type))  # flush() da bekler
+
+    def _run(self, content_type):
+        finished = False
+        try:
+            with storage.get_storage().open_write(self.name, content_type=content_type) as f:
+                while True:
+                    chunk = self.queue.get()
+                    if chunk is _END or chunk is _ABORT:
+                        finished = True
+                    if chunk is _END:
+                        return self.name
+                    if chunk is _ABORT:
+                        raise UploadRejected(499, "Yükleme iptal edildi.")
+                    f.write(chunk)
+        except BaseException:
+            if not finished:
+                self._drain()  # üretici dolu kuyrukta takılmasın
+            storage.get_storage().delete(self.name)
+            raise
+
+    def _drain(self):
+        while self.queue.get() not in (_END, _ABORT):
+            pass
+
+    def write(self, chunk):
+        self.queue.put(chunk)
+
+    def close(self):
+        self.queue.put(_END)
+
+    def abort(self):
+        """Yazımı iptal eder; geçici nesne silinene kadar bekler (hata yanıtı ondan sonra döner)."""
+        self.queue.put(_ABORT)
+        wait([self.future])
+
+
+class StreamedFile:
+    """request.FILES içinde UploadedFile yerine duran, depolamaya akıtılmış dosya."""
+
+    def __init__(self, name, content_type, size, sha256, writer):
+        self.name = name
+        self.content_type = content_type
+        self.size = size
+        self.sha256 = sha256
+        self.writer = writer
+
+    @property
+    def blob_name(self):
+        return f"uploads/{self.sha256}{EXTENSIONS[self.content_type]}"
+
+    def close(self):
+        pass
+
+
+class StreamingStorageUploadHandler(FileUploadHandler):
+    chunk_size = CHUNK_SIZE
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.errors = []
+        self.files = []
+        self.writer = None
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self.writer = None
+        if field_name != FIELD_NAME:
+            raise SkipFile()
+        if content_type not in settings.UPLOAD_ALLOWED_TYPES and content_type != "application/octet-stream":
+            self._reject(415, f"Desteklenmeyen dosya türü: {file_name} ({content_type})")
+        if content_length and content_length > settings.UPLOAD_MAX_BYTES:
+            self._reject(413, f"Dosya çok büyük: {file_name}")
+
+        self.size = 0
+        self.digest = hashlib.sha256()
+        self.sniffed = None
+
+    def receive_data_chunk(self, raw_data, start):
+        if start == 0:
+            self.sniffed = sniff_content_type(raw_data[:16])
+            if self.sniffed not in settings.UPLOAD_ALLOWED_TYPES:
+                self._reject(415, f"Dosya geçerli bir görsel değil: {self.file_name}")
+            self.writer = _StreamWriter(f"{INCOMING_PREFIX}{uuid.uuid4().hex}", self.sniffed)
+
+        self.size += len(raw_data)
+        if self.size > settings.UPLOAD_MAX_BYTES:
+            self._reject(413, f"Dosya çok büyük: {self.file_name} (en fazla {settings.UPLOAD_MAX_BYTES} bayt)")
+
+        self.digest.update(raw_data)
+        self.writer.write(raw_data)
+        return None  # parça tüketildi
+
+    def file_complete(self, file_size):
+        if self.writer is None:  # boş dosya
+            self.errors.append((400, f"Boş dosya: {self.file_name}"))
+            return None
+        self.writer.close()
+        uploaded = StreamedFile(self.file_name, self.sniffed, self.size, self.digest.hexdigest(), self.writer)
+        self.writer = None
+        self.files.append(uploaded)
+        return uploaded
+
+    def upload_interrupted(self):
+        self.discard()
+
+    def _reject(self, status, message):
+        """Dosyayı reddeder; kalan baytları ayrıştırıcı atlar, diğer dosyalar okunmaya devam eder."""
+        if self.writer is not None:
+            self.writer.abort()
+            self.writer = None
+        self.errors.append((status, message))
+        raise SkipFile(message)
+
+    def discard(self):
+        """Akış sırasında yazılmış tüm geçici nesneleri siler; silinmeleri bitene kadar bekler."""
+        if self.writer is not None:
+            self.writer.abort()
+            self.writer = None
+        wait([storage.submit_upload(_discard, uploaded) for uploaded in self.files])
+
+
+def _discard(uploaded):
+    try:
+        name = uploaded.writer.future.result()
+    except Exception:
+        return  # yazıcı hata verdiyse geçici nesneyi zaten sildi
+    storage.get_storage().delete(name)
+
+
+def _finalize(uploaded, exists):
+    """Yazımın bitmesini bekler, geçici nesneyi içerik adresli adına taşır."""
+    temp_name = uploaded.writer.future.result()
+    store = storage.get_storage()
+    if exists:
+        store.delete(temp_name)  # aynı içerik zaten yüklenmiş
+        return store.url(uploaded.blob_name)
+    return store.move(temp_name, uploaded.blob_name)
+
+
+def finalize(files):
+    """Tüm dosyaları eşzamanlı sonlandırır ve dizine ekler; URL'leri yükleme sırasıyla döner."""
+    existing = set(
+        UploadedPhoto.objects.filter(name__in=[f.blob_name for f in files]).values_list("name", flat=True)
+    )
+    futures = [storage.submit_upload(_finalize, uploaded, uploaded.blob_name in existing) for uploaded in files]
+    urls, error = [], None
+    for uploaded, future in zip(files, futures):
+        try:
+            urls.append(future.result())
+        except Exception as e:
+            traceback.print_exception(e)
+            error = error or e
+            continue
+        if uploaded.blob_name in existing:
+            continue
+        try:
+            photo_index.record_upload(uploaded.blob_name, uploaded.size, uploaded.content_type)
+        except Exception as e:
+            # yükleme başarılı; dizin bir sonraki uzlaştırmada yakalar
+            print("🚨 Fotoğraf dizini güncellenemedi:", e)
+    if error is not None:
+        raise error
+    return urls
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 
 
@@ -9,7 +10,9 @@ from .views import (
     UploadPhotoView, PhotoListView,
     AnalyzeFoodView,
   ListAnalysisResultsView,
-    DashboardSummaryView,DeleteAnalysisResultsView
+    DashboardSummaryView,DeleteAnalysisResultsView,
+    ModelStatusView, AnalysisJobCreateView, AnalysisJobStatusView,
+    DailySummaryView, AnalyzeBatchView
 
 
 )
@@ -21,9 +24,30 @@ urlpatterns = [
     path('upload/', csrf_exempt (UploadPhotoView.as_view()), name='upload'),
     path("photos/",  csrf_exempt (PhotoListView.as_view()), name="photo-list"),
     path('analysis/', AnalyzeFoodView.as_view(), name='analyze'),
+    path('analysis/batch/', AnalyzeBatchView.as_view(), name='analyze-batch'),
+    path('analysis/jobs/', AnalysisJobCreateView.as_view(), name='analysis-job-create'),
+    path('analysis/jobs/<uuid:job_id>/', AnalysisJobStatusView.as_view(), name='analysis-job-status'),
     path('analysis-results/', ListAnalysisResultsView.as_view()),
     path('dashboard-summary/', DashboardSummaryView.as_view(), name='dashboard-summary'),
+    path('daily-summary/', DailySummaryView.as_view(), name='daily-summary'),
+    path('model-status/', ModelStatusView.as_view(), name='model-status'),
     path('delete-analysis-results/', csrf_exempt(DeleteAnalysisResultsView.as_view()), name='delete-analysis-results'),
 ]
 
+# ASGI (uvicorn) altında G/Ç ağırlıklı uçlar async görünümlere yönlenir; URL ve adlar aynı kalır
+if settings.ASYNC_VIEWS:
+    from . import async_views
+
+    ASYNC_ROUTES = {
+        'upload': async_views.upload_photos,
+        'photo-list': async_views.photo_list,
+        'analyze': async_views.analyze_food,
+        'analyze-batch': async_views.analyze_batch,
+        'analysis-job-create': async_views.create_analysis_job,
+    }
+    urlpatterns = [
+        path(str(p.pattern), ASYNC_ROUTES[p.name], name=p.name) if p.name in ASYNC_ROUTES else p
+        for p in urlpatterns
+    ]
+
 
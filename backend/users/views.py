@@ -1,13 +1,12 @@
-import os
-import json
-import uuid
-import base64
 import datetime
-from datetime import date, timedelta
+import json
 
+from django.conf import settings
 from django.contrib.auth import authenticate, get_user_model
+from django.http import StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from django.utils.http import parse_etags
 from dotenv import load_dotenv
 
 from rest_framework.views import APIView
@@ -16,34 +15,29 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.permissions import AllowAny
 from rest_framework.generics import ListAPIView
 from rest_framework.decorators import parser_classes
+from rest_framework.exceptions import ValidationError
 
-from google.cloud import storage
-from google.oauth2 import service_account
+from django.db import transaction
+from django.db.models import Sum
 
-from .models import AnalysisResult
-from .serializers import AnalysisResultSerializer
-from yolo_models.cropper import crop_and_save
-from yolo_models.image_loader import load_image_from_url
+from .models import AnalysisJob, AnalysisResult, DailyAnalysis, UploadedPhoto
+from .serializers import AnalysisResultSerializer, DailyAnalysisSerializer
+from .analysis import analyze_and_store, analyze_batch, parse_analysis_date
+from . import jobs, photo_index, uploads
+from .exports import STREAMS, stream_results
+from .pagination import KeysetPagination, NameKeysetPagination
+from yolo_models.model_registry import model_stats
+from yolo_models.memory_report import process_memory
+from yolo_models.batcher import batcher_stats
+from yolo_models.storage import get_storage
 
 load_dotenv()
 User = get_user_model()
 
 # === Ortak Ayarlar ===
-BUCKET_NAME = "wise-uploads"
 DAYS_TR = ["Pazartesi", "Salı", "Çarşamba", "Perşembe", "Cuma", "Cumartesi", "Pazar"]
 gun = DAYS_TR[datetime.datetime.now().weekday()]
 
-# === GCS Bağlantısı ===
-try:
-    base64_creds = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")
-    creds_json = json.loads(base64.b64decode(base64_creds).decode("utf-8"))
-    credentials = service_account.Credentials.from_service_account_info(creds_json)
-    gcs_client = storage.Client(credentials=credentials)
-    bucket = gcs_client.bucket(BUCKET_NAME)
-except Exception as e:
-    print("🚨 GCS bağlantı hatası:", str(e))
-    bucket = None
-
 # ========== LOGIN ==========
 @method_decorator(csrf_exempt, name='dispatch')
 @parser_classes([JSONParser])
@@ -81,22 +75,26 @@ class UploadPhotoView(APIView):
     parser_classes = [MultiPartParser, FormParser]
     permission_classes = [AllowAny]
 
+    def initialize_request(self, request, *args, **kwargs):
+        # Dosyalar belleğe/diske alınmadan, okunurken depolamaya akıtılır
+        self.upload_handler = uploads.StreamingStorageUploadHandler(request)
+        request.upload_handlers = [self.upload_handler]
+        return super().initialize_request(request, *args, **kwargs)
+
     def post(self, request):
         files = request.FILES.getlist('photos')
+        if self.upload_handler.errors:
+            self.upload_handler.discard()
+            status, message = self.upload_handler.errors[0]
+            return Response({'error': message}, status=status)
         if not files:
             return Response({'error': 'Fotoğraf bulunamadı.'}, status=400)
 
-        uploaded_urls = []
-
-        for file in files:
-            try:
-                blob_name = f"uploads/{uuid.uuid4()}_{file.name}"
-                blob = bucket.blob(blob_name)
-                blob.upload_from_file(file, content_type=file.content_type)
-                url = f"https://storage.googleapis.com/{BUCKET_NAME}/{blob_name}"
-                uploaded_urls.append(url)
-            except Exception as e:
-                return Response({"error": f"Dosya yüklenemedi: {str(e)}"}, status=500)
+        try:
+            uploaded_urls = uploads.finalize(files)
+        except Exception as e:
+            self.upload_handler.discard()
+            return Response({"error": f"Dosya yüklenemedi: {str(e)}"}, status=500)
 
         return Response({'message': 'Ükleme başarılı!', 'uploaded_urls': uploaded_urls}, status=200)
 
@@ -111,56 +109,127 @@ class AnalyzeFoodView(APIView):
 
         if not image_url or not analysis_date:
             return Response({"error": "image_url ve analysis_date alanları zorunludur."}, status=400)
+        try:
+            parse_analysis_date(analysis_date)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
 
         try:
-            print("🔗 Görsel indiriliyor:", image_url)
-            img0 = load_image_from_url(image_url)
-            if img0 is None:
-                return Response({"error": "Görsel indirilemedi."}, status=400)
-
-            original_filename = image_url.split("/")[-1]
-            print("✂️ Görsel kırpılıyor ve analiz ediliyor...")
-            results = crop_and_save(img0, original_filename=original_filename, analysis_date=analysis_date)
-
-            if not results:
-                return Response({"error": "Hiçbir yemek tespit edilemedi."}, status=200)
-
-            analysis_results = []
-            for result in results:
-                try:
-                    obj, created = AnalysisResult.objects.update_or_create(
-                        image_url=result.get("image_url", image_url),
-                        defaults={
-                            "food_category": result.get("food_category", ""),
-                            "food_type": result.get("food_type", ""),
-                            "is_waste": result.get("is_waste", False),
-                            "analysis_date": analysis_date
-                        }
-                    )
-                    analysis_results.append(result)
-                except Exception as db_err:
-                    print("💥 DB Hatası:", db_err)
-                    result["db_error"] = str(db_err)
-                    analysis_results.append(result)
-
-            return Response({"message": "Analiz tamamlandı", "results": analysis_results}, status=200)
+            body, status = analyze_and_store(image_url, analysis_date)
+            return Response(body, status=status)
 
         except Exception as e:
             import traceback
             traceback.print_exc()
             return Response({"error": f"Sunucu hatası: {str(e)}"}, status=500)
 
+# ========== TOPLU ANALİZ ==========
+@parser_classes([JSONParser])
+class AnalyzeBatchView(APIView):
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        image_urls = list(request.data.get("image_urls") or [])
+        store = get_storage()
+        image_urls += [store.url(name) for name in request.data.get("upload_ids") or []]
+        analysis_date = request.data.get("analysis_date")
+
+        if not image_urls or not analysis_date:
+            return Response({"error": "image_urls (veya upload_ids) ve analysis_date alanları zorunludur."}, status=400)
+        if len(image_urls) > settings.BATCH_ANALYSIS_MAX_IMAGES:
+            return Response({"error": f"En fazla {settings.BATCH_ANALYSIS_MAX_IMAGES} görsel gönderilebilir."},
+                            status=400)
+        try:
+            parse_analysis_date(analysis_date)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        def lines():
+            # Her görsel bittiğinde bir NDJSON satırı; istemci sonuçları sırayla beklemez
+            try:
+                for index, image_url, data, status in analyze_batch(image_urls, analysis_date):
+                    row = {"index": index, "image_url": image_url, "status": status, **data}
+                    yield json.dumps(row, ensure_ascii=False) + "\n"
+            except Exception as e:
+                import traceback
+                traceback.print_exc()
+                yield json.dumps({"error": f"Sunucu hatası: {str(e)}", "status": 500}, ensure_ascii=False) + "\n"
+
+        return StreamingHttpResponse(lines(), content_type="application/x-ndjson; charset=utf-8")
+
+# ========== ASENKRON ANALİZ ==========
+@parser_classes([JSONParser])
+class AnalysisJobCreateView(APIView):
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        image_url = request.data.get("image_url")
+        analysis_date = request.data.get("analysis_date")
+
+        if not image_url or not analysis_date:
+            return Response({"error": "image_url ve analysis_date alanları zorunludur."}, status=400)
+        try:
+            parse_analysis_date(analysis_date)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        try:
+            job = jobs.submit(image_url, analysis_date)
+        except jobs.QueueFull:
+            response = Response({"error": "Analiz kuyruğu dolu, lütfen tekrar deneyin."}, status=503)
+            response["Retry-After"] = "5"
+            return response
+
+        return Response({
+            "job_id": str(job.id),
+            "status": job.status,
+            "queue_depth": jobs.queue_depth(),
+        }, status=202)
+
+
+@parser_classes([JSONParser])
+class AnalysisJobStatusView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request, job_id):
+        job = AnalysisJob.objects.filter(pk=job_id).first()
+        if job is None:
+            return Response({"error": "İş bulunamadı."}, status=404)
+
+        data = {"job_id": str(job.id), "status": job.status, "image_url": job.image_url}
+        if job.status == "done":
+            data.update({"status_code": job.status_code, **(job.result or {})})
+        elif job.status == "failed":
+            data.update({"status_code": job.status_code, "error": job.error})
+        return Response(data)
+
 # ========== ANALİZ SONUÇLARI ==========
+def _date_param(name, value):
+    """Sorgu parametresini date'e çevirir; geçersizse 400 döner."""
+    try:
+        return parse_analysis_date(value)
+    except ValueError as e:
+        raise ValidationError({name: str(e)})
+
 @parser_classes([JSONParser])
 class ListAnalysisResultsView(ListAPIView):
     serializer_class = AnalysisResultSerializer
     permission_classes = [AllowAny]
+    pagination_class = KeysetPagination  # yalnızca ?cursor= / ?page_size= ile
+
+    def list(self, request, *args, **kwargs):
+        export = request.query_params.get('export')
+        if export:
+            if export not in STREAMS:
+                raise ValidationError({'export': f"Desteklenen biçimler: {', '.join(STREAMS)}"})
+            return stream_results(self.get_queryset(), export)
+        return super().list(request, *args, **kwargs)
 
     def get_queryset(self):
-        queryset = AnalysisResult.objects.all().order_by('-created_at')
+        queryset = AnalysisResult.objects.all().order_by('-created_at', '-id')
         analysis_date = self.request.query_params.get('analysis_date')
         if analysis_date:
-            queryset = queryset.filter(analysis_date=analysis_date)
+            queryset = queryset.filter(analysis_date=_date_param('analysis_date', analysis_date))
         return queryset
 
 @parser_classes([JSONParser])
@@ -168,10 +237,15 @@ class DashboardSummaryView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
-        qs = AnalysisResult.objects.all()
-        total = qs.count()
-        waste = qs.filter(is_waste=True).count()
-        no_waste = qs.filter(is_waste=False).count()
+        # Günlük özet tablosundan okunur; AnalysisResult büyüdükçe yavaşlamaz
+        qs = DailyAnalysis.objects.all()
+        analysis_date = request.query_params.get('analysis_date')
+        if analysis_date:
+            qs = qs.filter(analysis_date=_date_param('analysis_date', analysis_date))
+        sums = qs.aggregate(total=Sum('total_analysis'), waste=Sum('waste_count'), no_waste=Sum('no_waste_count'))
+        total = sums['total'] or 0
+        waste = sums['waste'] or 0
+        no_waste = sums['no_waste'] or 0
         percent = round((waste / total) * 100, 1) if total else 0
         return Response({
             "total": total,
@@ -180,16 +254,61 @@ class DashboardSummaryView(APIView):
             "percent": percent
         })
 
+@parser_classes([JSONParser])
+class DailySummaryView(ListAPIView):
+    serializer_class = DailyAnalysisSerializer
+    permission_classes = [AllowAny]
+
+    def get_queryset(self):
+        queryset = DailyAnalysis.objects.all().order_by('analysis_date', 'food_category')
+        params = self.request.query_params
+        if params.get('analysis_date'):
+            queryset = queryset.filter(analysis_date=_date_param('analysis_date', params['analysis_date']))
+        if params.get('start'):
+            queryset = queryset.filter(analysis_date__gte=_date_param('start', params['start']))
+        if params.get('end'):
+            queryset = queryset.filter(analysis_date__lte=_date_param('end', params['end']))
+        if params.get('food_category'):
+            queryset = queryset.filter(food_category=params['food_category'])
+        return queryset
+
 @parser_classes([JSONParser])
 class PhotoListView(APIView):
+    """Yerel dizinden okur; ?cursor= / ?page_size= ile sayfalı, ETag ile koşullu."""
+
+    def get(self, request):
+        etag, data = photo_listing(request)
+        response = Response(status=304) if data is None else Response(data)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'  # her seferinde doğrula, değişmediyse 304
+        return response
+
+
+def photo_listing(request):
+    """(ETag, gövde) döner; If-None-Match eşleşirse gövde None (304). request bir DRF Request'tir."""
+    photo_index.ensure_fresh()
+    queryset = UploadedPhoto.objects.filter(name__startswith=photo_index.PREFIX).order_by('name')
+
+    etag = photo_index.etag(queryset, request.GET.urlencode())
+    if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+    if etag in if_none_match or '*' in if_none_match:
+        return etag, None
+
+    store = get_storage()
+    paginator = NameKeysetPagination()
+    page = paginator.paginate_queryset(queryset, request)
+    if page is None:
+        names = queryset.values_list('name', flat=True).iterator(chunk_size=2000)
+        return etag, [{"id": name, "url": store.url(name)} for name in names]
+    return etag, {"next": paginator.get_next_link(), "results": [{"id": p.name, "url": store.url(p.name)} for p in page]}
+
+# ========== MODEL DURUMU ==========
+@parser_classes([JSONParser])
+class ModelStatusView(APIView):
+    permission_classes = [AllowAny]
+
     def get(self, request):
-        prefix = "uploads/"
-        blobs = bucket.list_blobs(prefix=prefix)
-        image_urls = [
-            {"id": blob.name, "url": f"https://storage.googleapis.com/{BUCKET_NAME}/{blob.name}"}
-            for blob in blobs
-        ]
-        return Response(image_urls)
+        return Response({"models": model_stats(), "memory": process_memory(), "batching": batcher_stats()})
 
 # ========== ANALİZ SONUÇLARINI TEMİZLEME ==========
 @parser_classes([JSONParser])
@@ -197,5 +316,7 @@ class DeleteAnalysisResultsView(APIView):
     permission_classes = [AllowAny]
 
     def delete(self, request):
-        AnalysisResult.objects.all().delete()
+        with transaction.atomic():
+            AnalysisResult.objects.all().delete()
+            DailyAnalysis.objects.all().delete()
         return Response({"message": "Tüm analiz sonuçları silindi."}, status=200)
@@ -0,0 +1,120 @@
+# yolo_models/batcher.py
+"""
+İstekler arası dinamik mikro-batch'leme.
+
+Eşzamanlı istekler tek tek model çağırmak yerine kuyruğa girer; arka plandaki
+tek thread en fazla WISE_BATCH_MAX_WAIT_MS bekleyip en fazla
+WISE_BATCH_MAX_SIZE görüntüyü toplar, modeli bir kez çalıştırır ve sonuçları
+bekleyen isteklere dağıtır.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+ENABLED = os.getenv("WISE_MICRO_BATCHING", "1") == "1"
+MAX_BATCH_SIZE = int(os.getenv("WISE_BATCH_MAX_SIZE", "16"))    # batch başına en fazla görüntü
+MAX_WAIT_MS = float(os.getenv("WISE_BATCH_MAX_WAIT_MS", "10"))  # ilk istekten sonra bekleme süresi
+
+_batchers = []
+
+
+class MicroBatcher:
+    """
+    fn(items) -> results (aynı sırada) fonksiyonunun önüne konan batcher.
+    size_fn her öğenin kaç görüntü saydığını döner (varsayılan 1).
+    """
+
+    def __init__(self, fn, name="batcher", max_batch_size=None, max_wait_ms=None, size_fn=None):
+        self.fn = fn
+        self.name = name
+        self.max_batch_size = max_batch_size or MAX_BATCH_SIZE
+        self.max_wait = (MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000
+        self.size_fn = size_fn or (lambda item: 1)
+        self._queue = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._images = 0
+        _batchers.append(self)
+
+    def _ensure_thread(self):
+        """Batch thread'ini süreç başına bir kez (fork sonrası dahil) başlatır."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            threading.Thread(target=self._loop, name=f"batcher-{self.name}", daemon=True).start()
+            self._pid = os.getpid()
+
+    def submit(self, item):
+        future = Future()
+        if not ENABLED:
+            try:
+                future.set_result(self.fn([item])[0])
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        self._ensure_thread()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item, timeout=None):
+        return self.submit(item).result(timeout)
+
+    def _collect(self):
+        """İlk öğeyi bekler, sonra süre veya boyut sınırına kadar toplar."""
+        first = self._queue.get()
+        batch, size = [first], self.size_fn(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(entry)
+            size += self.size_fn(entry[0])
+        return batch, size
+
+    def _loop(self):
+        while True:
+            batch, size = self._collect()
+            items = [item for item, _ in batch]
+            futures = [future for _, future in batch]
+            try:
+                results = list(self.fn(items))
+                if len(results) != len(items):
+                    raise RuntimeError(f"{self.name}: {len(items)} öğe için {len(results)} sonuç döndü")
+                for future, result in zip(futures, results):
+                    future.set_result(result)
+            except Exception as e:
+                # Sonucu atanmamış hiçbir istek sonsuza dek beklememeli
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            self._batches += 1
+            self._images += size
+
+    def stats(self):
+        return {
+            "batches": self._batches,
+            "images": self._images,
+            "avg_batch_size": round(self._images / self._batches, 2) if self._batches else 0,
+            "pending": self._queue.qsize() if self._queue is not None and self._pid == os.getpid() else 0,
+        }
+
+
+def batcher_stats():
+    return {
+        "enabled": ENABLED,
+        "max_batch_size": MAX_BATCH_SIZE,
+        "max_wait_ms": MAX_WAIT_MS,
+        "batchers": {b.name: b.stats() for b in _batchers},
+    }
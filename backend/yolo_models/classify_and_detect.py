@@ -1,50 +1,17 @@
 import os
 import sys
-import json
-import base64
 import pathlib
-import requests
-from pathlib import Path
-from io import BytesIO
 from PIL import Image
 import torch
-from google.cloud import storage
-from google.oauth2 import service_account
+
+from yolo_models.batcher import MicroBatcher
+from yolo_models.image_loader import load_image_from_url
+from yolo_models.model_registry import TYPE_MODELS, WASTE_MODELS, get_fused_model, load_model
 
 # Windows uyumu
 if sys.platform == "win32":
     pathlib.PosixPath = pathlib.WindowsPath
 
-# GCS Ayarları
-BUCKET_NAME = "wise-uploads"
-GCS_PREFIX = "processed"
-
-# GCS Bağlantısı
-try:
-    base64_creds = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")
-    creds_json = json.loads(base64.b64decode(base64_creds).decode("utf-8"))
-    credentials = service_account.Credentials.from_service_account_info(creds_json)
-    gcs_client = storage.Client(credentials=credentials)
-    bucket = gcs_client.bucket(BUCKET_NAME)
-except Exception as e:
-    print("🚨 GCS bağlantı hatası:", str(e))
-    bucket = None
-
-
-loaded_models = {}
-
-# === Model yükleme ===
-def load_model(model_filename):
-    if model_filename not in loaded_models:
-        model_path = Path("yolov5/weights") / model_filename
-        if not model_path.exists():
-            raise FileNotFoundError(f"Model bulunamadı: {model_path}")
-        model = torch.hub.load('ultralytics/yolov5', 'custom', path=str(model_path), force_reload=False)
-        model.eval()
-        loaded_models[model_filename] = model
-    return loaded_models[model_filename]
-
-
 # === Lazy transform ===
 def get_transform():
     import torchvision.transforms as transforms  # Lazy import
@@ -87,20 +54,76 @@ FOOD_TYPES = {
     },
 }
 
-TYPE_MODELS = {
-    "ana-yemek": "wiseMainTypeCls-yolo5.pt",
-    "corba": "wiseTypeSoup.pt",
-    "ek-yemek": "wiseExtraTypeCls-yolo5.pt",
-    "yan-yemek": "wiseSideTypeCls-yolo5.pt"
-}
+# === Toplu sınıflandırma ===
+def classify_batch(tensors, category):
+    """
+    Aynı kategorideki kırpıntıları tek bir tensörde birleştirip tür ve israf
+    modellerinden birer kez geçirir. Sonuçlar giriş sırasıyla döner.
+    """
+    if category not in TYPE_MODELS or category not in WASTE_MODELS:
+        return [{"error": f"Geçersiz kategori: {category}"} for _ in range(len(tensors))]
+
+    batch = tensors if isinstance(tensors, torch.Tensor) else torch.cat(list(tensors), 0)
 
-WASTE_MODELS = {
-    "ana-yemek": "wiseMainCls-yolo5.pt",
-    "corba": "wiseSoup.pt",
-    "ek-yemek": "wiseExtraCls-yolo5.pt",
-    "yan-yemek": "wiseSideCls-yolo5.pt"
+    fused_model = get_fused_model(category)
+    if fused_model is not None:
+        # Ortak gövde: tür ve israf çıktıları tek ileri geçişte
+        with torch.no_grad():
+            type_out, waste_out = fused_model(batch)
+    else:
+        type_model = load_model(TYPE_MODELS[category])
+        waste_model = load_model(WASTE_MODELS[category])
+        with torch.no_grad():
+            type_out = type_model(batch)
+            waste_out = waste_model(batch)
+
+    type_probs = torch.nn.functional.softmax(type_out, dim=1)
+    type_conf, type_idx = type_probs.max(dim=1)
+    waste_probs = torch.nn.functional.softmax(waste_out, dim=1)
+    waste_conf, waste_idx = waste_probs.max(dim=1)
+
+    results = []
+    for t_idx, t_conf, w_idx, w_conf in zip(type_idx.tolist(), type_conf.tolist(),
+                                            waste_idx.tolist(), waste_conf.tolist()):
+        results.append({
+            "kategori": category,
+            "tur": FOOD_TYPES[category].get(t_idx, f"type_{t_idx}"),
+            "tur_confidence": round(t_conf, 4),
+            "israf": "israf-yok" if w_idx == 1 else "israf-var",
+            "israf_confidence": round(w_conf, 4),
+            "veritabanı_kayıt": True
+        })
+    return results
+
+
+# === İstekler arası mikro-batch ===
+def _classify_groups(category):
+    """Farklı isteklerden gelen kırpıntı gruplarını tek batch'te sınıflandırır."""
+    def run(groups):
+        results = classify_batch(torch.cat(groups, 0), category)
+        out, start = [], 0
+        for group in groups:
+            out.append(results[start:start + group.shape[0]])
+            start += group.shape[0]
+        return out
+    return run
+
+
+_classifier_batchers = {
+    category: MicroBatcher(_classify_groups(category), name=f"cls-{category}", size_fn=lambda t: t.shape[0])
+    for category in TYPE_MODELS
 }
 
+
+def classify_crops(tensors, category):
+    """classify_batch ile aynı sonuç; eşzamanlı isteklerin kırpıntıları birlikte işlenir."""
+    batcher = _classifier_batchers.get(category)
+    if batcher is None:
+        return classify_batch(tensors, category)
+    batch = tensors if isinstance(tensors, torch.Tensor) else torch.cat(list(tensors), 0)
+    return batcher(batch)
+
+
 # === Ana analiz fonksiyonu ===
 def analyze_image_from_url(image_url_or_path=None, category=None, tensor=None):
     try:
@@ -113,37 +136,10 @@ def analyze_image_from_url(image_url_or_path=None, category=None, tensor=None):
             if os.path.isfile(image_url_or_path):
                 image = Image.open(image_url_or_path).convert("RGB")
             else:
-                response = requests.get(image_url_or_path)
-                response.raise_for_status()
-                image = Image.open(BytesIO(response.content)).convert("RGB")
+                image = load_image_from_url(image_url_or_path)
             tensor = transform(image).unsqueeze(0)
 
-        type_model = load_model(TYPE_MODELS[category])
-        with torch.no_grad():
-            type_out = type_model(tensor)
-
-        probs = torch.nn.functional.softmax(type_out[0], dim=0)
-        type_idx = probs.argmax().item()
-        type_conf = round(probs[type_idx].item(), 4)
-        type_name = FOOD_TYPES[category].get(type_idx, f"type_{type_idx}")
-
-        waste_model = load_model(WASTE_MODELS[category])
-        with torch.no_grad():
-            waste_out = waste_model(tensor)
-
-        waste_probs = torch.nn.functional.softmax(waste_out[0], dim=0)
-        waste_idx = waste_probs.argmax().item()
-        waste_conf = round(waste_probs[waste_idx].item(), 4)
-        israf = "israf-yok" if waste_idx == 1 else "israf-var"
-
-        return {
-            "kategori": category,
-            "tur": type_name,
-            "tur_confidence": type_conf,
-            "israf": israf,
-            "israf_confidence": waste_conf,
-            "veritabanı_kayıt": True
-        }
+        return classify_batch(tensor, category)[0]
 
     except Exception as e:
         import traceback
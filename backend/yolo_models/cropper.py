@@ -1,74 +1,102 @@
-import os
-import json
-import base64
-import requests
 import numpy as np
+import torch
 from PIL import Image
 from io import BytesIO
-import torch
-from pathlib import Path
 
-from users.models import AnalysisResult
-from google.cloud import storage
-from google.oauth2 import service_account
-
-from yolo_models.classify_and_detect import analyze_image_from_url
+from yolo_models import batcher
+from yolo_models.batcher import MicroBatcher
+from yolo_models.classify_and_detect import classify_crops
+from yolo_models.model_registry import get_plate_model
+from yolo_models import storage
 
 # === Ayarlar ===
-BUCKET_NAME = "wise-uploads"
 GCS_PREFIX = "processed"
-MODEL_FILENAME = "wisePlate.pt"  # weights klasöründe olmalı
-
-# === GCS Bağlantısı ===
-creds_data = json.loads(base64.b64decode(os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")).decode("utf-8"))
-credentials = service_account.Credentials.from_service_account_info(creds_data)
-gcs_client = storage.Client(credentials=credentials)
-bucket = gcs_client.bucket(BUCKET_NAME)
-
-# === Model Yükleme (Lazy + Cache)
-_plate_model = None
-loaded_models = {}
-
-def load_model(model_filename):
-    if model_filename not in loaded_models:
-        model_path = Path("yolov5/weights") / model_filename
-        if not model_path.exists():
-            raise FileNotFoundError(f"Model bulunamadı: {model_path}")
-        model = torch.hub.load('ultralytics/yolov5', 'custom', path=str(model_path), force_reload=True, trust_repo=True)
-
-        model.eval()
-        loaded_models[model_filename] = model
-    return loaded_models[model_filename]
-
-def get_plate_model():
-    global _plate_model
-    if _plate_model is None:
-        _plate_model = load_model(MODEL_FILENAME)
-    return _plate_model
-
-def get_transform():
-    import torchvision.transforms as transforms
-    return transforms.Compose([
-        transforms.Resize((224, 224)),
-        transforms.ToTensor(),
-        transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
-    ])
+MIN_CROP_AREA = 1500  # kaynak (tam çözünürlük) piksel cinsinden en küçük kırpıntı alanı
+
+# === Tabak tespiti (istekler arası mikro-batch) ===
+def _detect_batch(images):
+    """Görüntüleri tek letterbox batch'i olarak AutoShape'ten geçirir, tespitleri görüntü başına dağıtır."""
+    results = get_plate_model()(images)
+    return [pred.cpu().numpy() for pred in results.xyxy]
+
+
+plate_batcher = MicroBatcher(_detect_batch, name="plate")
+
+
+def detect_plates(images):
+    """
+    Birden çok görüntüyü birlikte tespit eder (toplu analiz). Hepsi aynı anda
+    batcher kuyruğuna girdiği için en fazla WISE_BATCH_MAX_SIZE'lık batch'ler
+    halinde çalışır; batcher kapalıysa aynı boyutta parçalara bölünür.
+    """
+    if batcher.ENABLED:
+        futures = [plate_batcher.submit(image) for image in images]
+        return [future.result() for future in futures]
+    detections = []
+    for i in range(0, len(images), batcher.MAX_BATCH_SIZE):
+        detections += _detect_batch(images[i:i + batcher.MAX_BATCH_SIZE])
+    return detections
+
+
+# === Sınıflandırıcı girişi (PIL'siz, tek adımda) ===
+CLS_SIZE = 224
+CLS_MEAN = torch.tensor([0.485, 0.456, 0.406]).view(1, 3, 1, 1) * 255
+CLS_STD = torch.tensor([0.229, 0.224, 0.225]).view(1, 3, 1, 1) * 255
+
+
+def crops_to_tensor(img_np, boxes):
+    """
+    HWC uint8 görüntüden tüm kutuları tek roi_align çağrısıyla 224x224'e
+    yeniden örnekler ve normalize eder: (N, 3, 224, 224) float tensör.
+    """
+    from torchvision.ops import roi_align  # Lazy import
+
+    img_t = torch.from_numpy(img_np).permute(2, 0, 1).unsqueeze(0).float()  # (1,3,H,W), tek kopya
+    rois = torch.tensor(boxes, dtype=torch.float32).view(-1, 4)
+    # sampling_ratio=-1: her hücre kutu boyutuna göre örneklenir (küçültmede alan ortalaması)
+    batch = roi_align(img_t, [rois], output_size=(CLS_SIZE, CLS_SIZE), spatial_scale=1.0,
+                      sampling_ratio=-1, aligned=True)
+    return batch.sub_(CLS_MEAN).div_(CLS_STD)
+
+
+def _encode_and_upload(crop_np, blob_path):
+    """Kırpıntıyı JPEG'e çevirip depolamaya yükler (yükleme havuzunda çalışır)."""
+    buffer = BytesIO()
+    Image.fromarray(crop_np).save(buffer, format="JPEG")
+    buffer.seek(0)
+    return storage.get_storage().upload(blob_path, buffer, content_type="image/jpeg")
 
 # === Ana Fonksiyon ===
-def crop_and_save(image, original_filename="", analysis_date=None):
+def crop_and_save(image, original_filename="", analysis_date=None, crop_image=None, detections=None):
+    """
+    image üzerinde tabak tespiti yapar. crop_image (PIL görüntü ya da onu
+    döndüren fonksiyon) verilirse kırpıntılar ondan alınır; kutular onun
+    çözünürlüğüne ölçeklenir. Yalnızca geçerli tespit varsa yüklenir.
+    detections verilirse (detect_plates çıktısı) tespit adımı atlanır.
+    """
     uploaded_results = []
 
     try:
         model = get_plate_model()
-        transform = get_transform()
 
-        results = model(image)
-        detections = results.xyxy[0].cpu().numpy()
+        if detections is None:
+            detections = plate_batcher(image)
         class_names = model.names
 
+        if crop_image is not None and any(det[4] >= 0.5 for det in detections):
+            crop_image = crop_image() if callable(crop_image) else crop_image
+            sx, sy = crop_image.width / image.width, crop_image.height / image.height
+            detections = detections * np.array([sx, sy, sx, sy, 1, 1], dtype=detections.dtype)
+            image = crop_image
+
         img_np = np.array(image)
         h, w = img_np.shape[:2]
+        # alan eşiği kaynak piksellerinde: görüntü küçültülerek çözüldüyse eşik de küçülür
+        source_w, source_h = image.info.get("source_size", (w, h))
+        min_area = MIN_CROP_AREA * (w * h) / (source_w * source_h)
 
+        # 1) Geçerli tespitleri kırp (tespit sırası korunur)
+        crops = []
         for i, det in enumerate(detections):
             try:
                 x1, y1, x2, y2, conf, cls = det
@@ -81,19 +109,59 @@ def crop_and_save(image, original_filename="", analysis_date=None):
                 y2 = int(max(0, min(round(y2), h)))
 
                 area = (x2 - x1) * (y2 - y1)
-                if area < 1500 or area > (w * h * 0.8) or x2 <= x1 or y2 <= y1:
+                if area < min_area or area > (w * h * 0.8) or x2 <= x1 or y2 <= y1:
                     continue
 
-                crop = img_np[y1:y2, x1:x2]
-                if crop.size == 0:
-                    continue
+                crops.append({
+                    "index": i,
+                    "category": class_names[int(cls)],
+                    "box": (x1, y1, x2, y2),
+                    "crop_np": img_np[y1:y2, x1:x2],  # görünüm, kopya değil
+                })
 
-                pil_img = Image.fromarray(crop)
-                tensor = transform(pil_img).unsqueeze(0)
-                category = class_names[int(cls)]
+            except Exception as e:
+                import traceback
+                traceback.print_exc()
+                crops.append({"index": i, "error": str(e)})
+
+        # 2) Tüm kırpıntılar tek adımda sınıflandırıcı batch'ine; kategoriye göre grupla
+        valid = [crop for crop in crops if "error" not in crop]
+        try:
+            batch = crops_to_tensor(img_np, [crop["box"] for crop in valid]) if valid else None
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            for crop in valid:
+                crop["error"] = str(e)
+            valid = []
+
+        groups = {}
+        for k, crop in enumerate(valid):
+            groups.setdefault(crop["category"], []).append(k)
+
+        for category, rows in groups.items():
+            group = [valid[k] for k in rows]
+            try:
+                batch_results = classify_crops(batch[rows], category)
+            except Exception as e:
+                import traceback
+                traceback.print_exc()
+                batch_results = [{"error": str(e)} for _ in group]
+            for crop, result in zip(group, batch_results):
+                crop["result"] = result
+
+        # 3) Sonuçları tespit sırasıyla işle; kodlama + yükleme havuzda paralel
+        store = storage.get_storage()
+        uploads = []
+        for crop in crops:
+            try:
+                if "error" in crop:
+                    uploaded_results.append({"error": crop["error"], "analysis_date": analysis_date})
+                    continue
 
-                # Alt sınıflandırma
-                result = analyze_image_from_url(tensor=tensor, category=category)
+                i = crop["index"]
+                category = crop["category"]
+                result = crop["result"]
                 if result.get("error"):
                     result["analysis_date"] = analysis_date
                     uploaded_results.append(result)
@@ -102,15 +170,14 @@ def crop_and_save(image, original_filename="", analysis_date=None):
                 food_type = result.get("tur", "bilinmeyen")
                 israf = result.get("israf", "bilinmiyor")
 
-                # GCS'ye kaydet
+                # Depolamaya kaydet
                 new_blob_path = f"{GCS_PREFIX}/{category}/{food_type}/{israf}/{i}_{original_filename}"
-                buffer = BytesIO()
-                pil_img.save(buffer, format="JPEG")
-                buffer.seek(0)
-                blob = bucket.blob(new_blob_path)
-                blob.upload_from_file(buffer, content_type="image/jpeg")
+                if storage.DEFER_UPLOADS:
+                    storage.defer_upload(_encode_and_upload, crop["crop_np"], new_blob_path)
+                else:
+                    uploads.append((len(uploaded_results), storage.submit_upload(_encode_and_upload, crop["crop_np"], new_blob_path)))
 
-                image_url = f"https://storage.googleapis.com/{BUCKET_NAME}/{new_blob_path}"
+                image_url = store.url(new_blob_path)
 
                 result.update({
                     "image_url": image_url,
@@ -129,6 +196,15 @@ def crop_and_save(image, original_filename="", analysis_date=None):
                 traceback.print_exc()
                 uploaded_results.append({"error": str(e), "analysis_date": analysis_date})
 
+        # 4) Tüm yüklemeler bitsin (DB kayıtları bundan sonra yazılır)
+        for index, future in uploads:
+            try:
+                future.result()
+            except Exception as e:
+                import traceback
+                traceback.print_exception(e)
+                uploaded_results[index] = {"error": str(e), "analysis_date": analysis_date}
+
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -1,17 +1,320 @@
 # utils/image_loader.py
-from PIL import Image
-import requests
-from io import BytesIO
+"""
+Paylaşılan görsel indirici.
+
+Tek requests.Session (bağlantı havuzu + keep-alive), zaman aşımları ve URL +
+ETag anahtarlı LRU disk/bellek önbelleği. Aynı GCS yüklemesi tekrar analiz
+edildiğinde indirme ya hiç yapılmaz (TTL içinde) ya da 304 ile gövdesiz
+doğrulanır. Bellek katmanı her worker'da ayrı tutulduğundan varsayılan olarak
+kapalıdır (WISE_IMAGE_CACHE_MEMORY_BYTES ile açılır); worker'lar arasında
+paylaşılan disk katmanı WISE_IMAGE_CACHE_DIR ile açılır.
+
+Gövde akış halinde okunur ama çözme, gövde bittikten sonra tek seferde
+yapılır. Akıştan kademeli çözme (ImageFile.Parser) bilinçli olarak
+kullanılmaz: önbelleğe yazmak için tam baytlar zaten tutulduğundan parser
+tamponu bunların yanında ikinci bir kopya olur ve görsel başına tepe belleği
+ikiye katlar; çözme süresi de indirme süresinin yanında önemsizdir.
+"""
+import os
 import sys
+import asyncio
+import json
+import math
+import time
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+from io import BytesIO
 from pathlib import Path
 
+import requests
+from PIL import Image
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 # Ana dizini bul ve yol ekle (utils için)
 FILE = Path(__file__).resolve()
 ROOT = FILE.parents[2]
 sys.path.append(str(ROOT))
 
+# === Ayarlar ===
+CONNECT_TIMEOUT = float(os.getenv("WISE_FETCH_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("WISE_FETCH_READ_TIMEOUT", "30"))
+MAX_IMAGE_BYTES = int(os.getenv("WISE_FETCH_MAX_BYTES", str(30 * 1024 * 1024)))  # tek görsel üst sınırı
+POOL_SIZE = int(os.getenv("WISE_FETCH_POOL_SIZE", "16"))
+CHUNK_SIZE = 64 * 1024
+DETECT_SIZE = 640                                                # AutoShape zaten 640'a küçültüyor
+CROP_MAX_SIDE = int(os.getenv("WISE_CROP_MAX_SIDE", "1600"))     # kırpıntılar için orta çözünürlük
+
+CACHE_MEMORY_BYTES = int(os.getenv("WISE_IMAGE_CACHE_MEMORY_BYTES", "0"))          # 0: bellek önbelleği kapalı
+CACHE_DISK_DIR = os.getenv("WISE_IMAGE_CACHE_DIR", "")                       # boş: disk önbelleği kapalı
+CACHE_DISK_BYTES = int(os.getenv("WISE_IMAGE_CACHE_DISK_BYTES", str(2 * 1024 * 1024 * 1024)))
+CACHE_FRESH_SECONDS = float(os.getenv("WISE_IMAGE_CACHE_FRESH_SECONDS", "300"))  # bu süre içinde yeniden doğrulama yok
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+# === HTTP oturumu ===
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Süreç başına tek Session (fork sonrası yeniden oluşturulur)."""
+    global _session, _session_pid
+    if _session_pid != os.getpid():
+        with _session_lock:
+            if _session_pid != os.getpid():
+                session = requests.Session()
+                retry = Retry(total=2, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504),
+                              allowed_methods=("GET",))
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session, _session_pid = session, os.getpid()
+    return _session
+
+
+# === Önbellek ===
+class CacheEntry:
+    __slots__ = ("data", "etag", "checked_at")
+
+    def __init__(self, data, etag=None, checked_at=None):
+        self.data = data
+        self.etag = etag
+        self.checked_at = checked_at or time.time()
+
+
+class ImageCache:
+    """Bayt bütçeli LRU bellek önbelleği + isteğe bağlı disk katmanı."""
+
+    def __init__(self, memory_bytes=CACHE_MEMORY_BYTES, disk_dir=CACHE_DISK_DIR, disk_bytes=CACHE_DISK_BYTES):
+        self.memory_bytes = memory_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_bytes = disk_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def _key(url):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def get(self, url):
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+                return entry
+        entry = self._disk_get(url)
+        if entry is not None:
+            self._memory_put(url, entry)
+        return entry
+
+    def put(self, url, entry):
+        self._memory_put(url, entry)
+        self._disk_put(url, entry)
+
+    def touch(self, url):
+        """304 sonrası tazelik zamanını günceller."""
+        entry = self.get(url)
+        if entry is not None:
+            entry.checked_at = time.time()
+            self._disk_put(url, entry, write_data=False)
+
+    def _memory_put(self, url, entry):
+        if len(entry.data) > self.memory_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(url, None)
+            if old is not None:
+                self._size -= len(old.data)
+            self._entries[url] = entry
+            self._size += len(entry.data)
+            while self._size > self.memory_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.data)
+
+    def _disk_get(self, url):
+        if not self.disk_dir:
+            return None
+        key = self._key(url)
+        data_path, meta_path = self.disk_dir / f"{key}.bin", self.disk_dir / f"{key}.json"
+        try:
+            meta = json.loads(meta_path.read_text())
+            data = data_path.read_bytes()
+            os.utime(data_path)  # LRU: son kullanım
+        except (OSError, ValueError):
+            return None
+        return CacheEntry(data, meta.get("etag"), meta.get("checked_at"))
+
+    def _disk_put(self, url, entry, write_data=True):
+        if not self.disk_dir:
+            return
+        key = self._key(url)
+        try:
+            if write_data:
+                tmp = self.disk_dir / f"{key}.bin.tmp{threading.get_ident()}"
+                tmp.write_bytes(entry.data)
+                os.replace(tmp, self.disk_dir / f"{key}.bin")
+            (self.disk_dir / f"{key}.json").write_text(
+                json.dumps({"url": url, "etag": entry.etag, "checked_at": entry.checked_at})
+            )
+            if write_data:
+                self._disk_prune()
+        except OSError as e:
+            print("🚨 Görsel önbelleği yazılamadı:", e)
+
+    def _disk_prune(self):
+        files = sorted(self.disk_dir.glob("*.bin"), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in files)
+        for path in files:
+            if total <= self.disk_bytes:
+                break
+            total -= path.stat().st_size
+            path.unlink(missing_ok=True)
+            path.with_suffix(".json").unlink(missing_ok=True)
+
+
+cache = ImageCache()
+
+
+# === İndirme ===
+def _read_stream(response):
+    """Gövdeyi parça parça okur; boyut sınırını aşarsa durur."""
+    declared = int(response.headers.get("Content-Length") or 0)
+    if declared > MAX_IMAGE_BYTES:
+        raise ImageTooLarge(f"Görsel çok büyük: {declared} bayt")
+
+    buffer = bytearray()
+    for chunk in response.iter_content(CHUNK_SIZE):
+        buffer += chunk
+        if len(buffer) > MAX_IMAGE_BYTES:
+            raise ImageTooLarge(f"Görsel çok büyük: >{MAX_IMAGE_BYTES} bayt")
+    return bytes(buffer)
+
+
+def fetch_image_bytes(image_url):
+    """URL'nin ham baytları (önbellekli)."""
+    entry = cache.get(image_url)
+    if entry is not None and time.time() - entry.checked_at < CACHE_FRESH_SECONDS:
+        return entry.data
+
+    headers = {"If-None-Match": entry.etag} if entry is not None and entry.etag else {}
+    with get_session().get(image_url, headers=headers, stream=True,
+                           timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)) as response:
+        if response.status_code == 304 and entry is not None:
+            cache.touch(image_url)
+            return entry.data
+        response.raise_for_status()
+        data = _read_stream(response)
+        cache.put(image_url, CacheEntry(data, response.headers.get("ETag")))
+    return data
+
+
+# === Async indirme (ASGI görünümleri) ===
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> httpx.AsyncClient
+
+
+def get_async_client():
+    """Event loop başına tek httpx.AsyncClient (bağlantı havuzu + keep-alive)."""
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        transport = httpx.AsyncHTTPTransport(retries=2)
+        client = httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=POOL_SIZE * 4, max_keepalive_connections=POOL_SIZE),
+            follow_redirects=True,
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def _cache_call(fn, *args):
+    """Önbellek çağrısı; disk katmanı açıksa dosya G/Ç'si event loop'u bloklamasın diye thread'de çalışır."""
+    if cache.disk_dir:
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+
+async def fetch_image_bytes_async(image_url):
+    """fetch_image_bytes'ın async karşılığı; aynı önbelleği ve boyut sınırını kullanır."""
+    entry = await _cache_call(cache.get, image_url)
+    if entry is not None and time.time() - entry.checked_at < CACHE_FRESH_SECONDS:
+        return entry.data
+
+    headers = {"If-None-Match": entry.etag} if entry is not None and entry.etag else {}
+    async with get_async_client().stream("GET", image_url, headers=headers) as response:
+        if response.status_code == 304 and entry is not None:
+            await _cache_call(cache.touch, image_url)
+            return entry.data
+        response.raise_for_status()
+
+        declared = int(response.headers.get("Content-Length") or 0)
+        if declared > MAX_IMAGE_BYTES:
+            raise ImageTooLarge(f"Görsel çok büyük: {declared} bayt")
+        buffer = bytearray()
+        async for chunk in response.aiter_bytes(CHUNK_SIZE):
+            buffer += chunk
+            if len(buffer) > MAX_IMAGE_BYTES:
+                raise ImageTooLarge(f"Görsel çok büyük: >{MAX_IMAGE_BYTES} bayt")
+        data = bytes(buffer)
+    await _cache_call(cache.put, image_url, CacheEntry(data, response.headers.get("ETag")))
+    return data
+
+
 def load_image_from_url(image_url):
-    response = requests.get(image_url)
-    response.raise_for_status()
-    img = Image.open(BytesIO(response.content)).convert("RGB")
+    # Yalnızca baytlar tutulur ve bir kez çözülür; ayrıca bir ImageFile.Parser
+    # tamponu tutmak tepe bellek kullanımını ikiye katlıyordu.
+    return decode_image(fetch_image_bytes(image_url))
+
+
+# === Düşük çözünürlüklü çözme ===
+def decode_image(data, max_side=None):
+    """
+    Baytları RGB görüntüye çözer. max_side verilirse uzun kenar en fazla
+    max_side olur: JPEG önce DCT ölçekleme (Image.draft) ile uzun kenarı
+    max_side'dan küçük olmayan en küçük 1/2, 1/4, 1/8 ölçekte çözülür (tam
+    çözünürlük hiç belleğe açılmaz), kalan fark yeniden boyutlandırılır.
+    Kaynak boyutu info["source_size"] içinde tutulur.
+    """
+    img = Image.open(BytesIO(data))
+    source_size = img.size
+    if max_side and max(img.size) > max_side:
+        w, h = img.size
+        s = max_side / max(w, h)
+        if img.format == "JPEG":
+            img.draft("RGB", (math.ceil(w * s), math.ceil(h * s)))
+        img = img.convert("RGB")
+        w, h = img.size
+        s = max_side / max(w, h)
+        if s < 1:
+            img = img.resize((max(1, round(w * s)), max(1, round(h * s))), Image.BILINEAR)
+    else:
+        img = img.convert("RGB")
+    img.info["source_size"] = source_size
     return img
+
+
+def load_analysis_images(image_url):
+    """
+    (tespit görüntüsü, kırpıntı görüntüsü yükleyicisi) döner. Tespit için
+    uzun kenar dedektör boyutuna indirilir; orta çözünürlüklü kırpıntı görüntüsü
+    yalnızca çağrılırsa (yani tespit varsa) aynı baytlardan çözülür.
+    """
+    return analysis_images(fetch_image_bytes(image_url))
+
+
+def analysis_images(data):
+    """load_analysis_images'ın önceden indirilmiş baytlar için karşılığı."""
+    return decode_image(data, DETECT_SIZE), lambda: decode_image(data, CROP_MAX_SIDE)
@@ -0,0 +1,54 @@
+# yolo_models/memory_report.py
+"""
+Worker başına paylaşılan / özel bellek raporu (Linux /proc/<pid>/smaps_rollup).
+
+Kullanım:
+    python -m yolo_models.memory_report <gunicorn_master_pid>
+"""
+import os
+import sys
+
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def process_memory(pid=None):
+    """Tek bir süreç için bayt cinsinden bellek dağılımı."""
+    pid = pid or os.getpid()
+    info = {"pid": pid}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in SMAPS_FIELDS:
+                    info[key.lower()] = int(rest.split()[0]) * 1024  # kB -> bayt
+    except OSError:
+        return info
+
+    info["shared"] = info.get("shared_clean", 0) + info.get("shared_dirty", 0)
+    info["private"] = info.get("private_clean", 0) + info.get("private_dirty", 0)
+    return info
+
+
+def worker_memory(master_pid):
+    """Master süreç ve tüm worker'ları için bellek dağılımı."""
+    import psutil
+
+    master = psutil.Process(master_pid)
+    return [process_memory(master_pid)] + [process_memory(child.pid) for child in master.children()]
+
+
+def _mb(n):
+    return f"{(n or 0) / 1024 / 1024:9.1f}"
+
+
+def main(argv=None):
+    argv = argv if argv is not None else sys.argv[1:]
+    rows = worker_memory(int(argv[0])) if argv else [process_memory()]
+    print(f"{'pid':>8} {'rss MB':>9} {'pss MB':>9} {'shared MB':>9} {'private MB':>9}")
+    for r in rows:
+        print(f"{r['pid']:>8} {_mb(r.get('rss'))} {_mb(r.get('pss'))} {_mb(r.get('shared'))} {_mb(r.get('private'))}")
+    print(f"{'toplam':>8} {'':>9} {_mb(sum(r.get('pss', 0) for r in rows))} (PSS)")
+
+
+if __name__ == "__main__":
+    main()
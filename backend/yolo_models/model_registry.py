@@ -0,0 +1,298 @@
+# yolo_models/model_registry.py
+"""
+Süreç genelinde tek model kayıt defteri.
+
+Dokuz ağırlık dosyası (tabak tespit modeli + TYPE_MODELS/WASTE_MODELS içindeki
+sınıflandırıcılar) yalnızca burada yüklenir. Modeller ağ erişimi olmadan,
+depodaki `backend/yolov5` ağacından DetectMultiBackend ile kurulur.
+"""
+import gc
+import os
+import hashlib
+import sys
+import time
+import pathlib
+import threading
+from pathlib import Path
+
+# Windows uyumu
+if sys.platform == "win32":
+    pathlib.PosixPath = pathlib.WindowsPath
+
+# === Yollar ===
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+YOLOV5_DIR = BACKEND_DIR / "yolov5"
+WEIGHTS_DIR = Path(os.getenv("WISE_WEIGHTS_DIR", YOLOV5_DIR / "weights"))
+DEVICE = os.getenv("WISE_DEVICE", "")  # "" -> uygun cihazı otomatik seç
+# Tespit başlığında NMS öncesi katman başına top-k + objectness ön filtresi (0 = kapalı, tüm anchor'lar çözülür)
+DETECT_PREFILTER_TOPK = int(os.getenv("WISE_DETECT_PREFILTER_TOPK", "1000"))
+# İsteğe bağlı CPU modu: "jit" (freeze + oneDNN) ya da "compile" (torch.compile/inductor); "" = kapalı
+CPU_OPTIMIZE = os.getenv("WISE_CPU_OPTIMIZE", "")
+CPU_CACHE_DIR = Path(os.getenv("WISE_CPU_CACHE_DIR", BACKEND_DIR / ".cache" / "cpu_models"))
+# Açılışta ısıtılacak tespit girişi boyutları (YxG); AutoShape 640'a oranı koruyarak ölçekler
+CPU_WARMUP_SHAPES = [
+    tuple(int(v) for v in s.split("x")) for s in os.getenv("WISE_CPU_WARMUP_SHAPES", "480x640,640x480,640x640").split(",")
+]
+CLS_INPUT_SHAPE = (1, 3, 224, 224)  # cropper.CLS_SIZE
+
+# "onnx": ağırlığın yanında aynı adlı .onnx varsa (export.py --include onnx --dynamic) ONNX Runtime ile servis edilir
+MODEL_FORMAT = os.getenv("WISE_MODEL_FORMAT", "pt")
+# ONNX Runtime oturum ayarları; optimize edilmiş grafik WISE_CPU_CACHE_DIR altında saklanır
+ORT_OPTIONS = {
+    "intra_op_threads": int(os.getenv("WISE_ORT_INTRA_THREADS", "0")),  # 0 = ORT varsayılanı (fiziksel çekirdek)
+    "inter_op_threads": int(os.getenv("WISE_ORT_INTER_THREADS", "0")),
+    "graph_optimization": os.getenv("WISE_ORT_GRAPH_OPT", "all"),  # disable | basic | extended | all
+    "shared_arena": os.getenv("WISE_ORT_SHARED_ARENA", "1") == "1",  # dokuz oturum tek CPU arena'sını paylaşır
+    "arena_max_bytes": int(os.getenv("WISE_ORT_ARENA_MAX_MB", "0")) * 1024 * 1024,  # 0 = sınırsız
+    "arena_extend_strategy": os.getenv("WISE_ORT_ARENA_EXTEND", "same_as_requested"),
+    "io_binding": os.getenv("WISE_ORT_IO_BINDING", "1") == "1",
+}
+
+if str(YOLOV5_DIR) not in sys.path:
+    sys.path.append(str(YOLOV5_DIR))  # models/, utils/ importları için
+
+# === Ağırlıklar ===
+PLATE_MODEL = "wisePlate.pt"
+
+TYPE_MODELS = {
+    "ana-yemek": "wiseMainTypeCls-yolo5.pt",
+    "corba": "wiseTypeSoup.pt",
+    "ek-yemek": "wiseExtraTypeCls-yolo5.pt",
+    "yan-yemek": "wiseSideTypeCls-yolo5.pt"
+}
+
+WASTE_MODELS = {
+    "ana-yemek": "wiseMainCls-yolo5.pt",
+    "corba": "wiseSoup.pt",
+    "ek-yemek": "wiseExtraCls-yolo5.pt",
+    "yan-yemek": "wiseSideCls-yolo5.pt"
+}
+
+ALL_MODELS = [PLATE_MODEL, *TYPE_MODELS.values(), *WASTE_MODELS.values()]
+
+# İsteğe bağlı: tür + israf için ortak gövdeli tek model (classify/train.py --aux-data).
+# Dosya weights klasöründe varsa ilgili kategori için TYPE/WASTE çifti yerine kullanılır.
+FUSED_MODELS = {
+    "ana-yemek": "wiseMainFused-yolo5.pt",
+    "corba": "wiseSoupFused.pt",
+    "ek-yemek": "wiseExtraFused-yolo5.pt",
+    "yan-yemek": "wiseSideFused-yolo5.pt"
+}
+
+# === Kayıt defteri durumu ===
+_models = {}
+_models_pid = os.getpid()
+_stats = {}
+_locks = {name: threading.Lock() for name in ALL_MODELS}
+_registry_lock = threading.Lock()
+_file_hashes = {}  # dosya adı -> ((boyut, mtime_ns), sha256)
+
+
+def _model_lock(model_filename):
+    with _registry_lock:
+        return _locks.setdefault(model_filename, threading.Lock())
+
+
+def _tensor_bytes(model):
+    """Parametre ve buffer'ların toplam bayt boyutu."""
+    seen, total = set(), 0
+    for t in list(model.parameters()) + list(model.buffers()):
+        if t.data_ptr() in seen:
+            continue
+        seen.add(t.data_ptr())
+        total += t.numel() * t.element_size()
+    return total
+
+
+def _rss_bytes():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+def _build(model_path):
+    """Modeli yerel yolov5 ağacından kurar (torch.hub / ağ erişimi yok)."""
+    from models.common import AutoShape, DetectMultiBackend
+    from models.yolo import set_detect_prefilter
+    from utils.torch_utils import select_device
+
+    device = select_device(DEVICE)
+    backend = DetectMultiBackend(model_path, device=device, fuse=True, cpu_optimize=CPU_OPTIMIZE or None,
+                                 cache_dir=CPU_CACHE_DIR, ort_options=ORT_OPTIONS)
+    model, warmup_shapes = backend, [CLS_INPUT_SHAPE]
+    if _is_detector(backend):
+        model = AutoShape(backend, verbose=False)  # tespit modeli: PIL/numpy girişi + NMS
+        warmup_shapes = [(1, 3, *shape) for shape in CPU_WARMUP_SHAPES]
+        if DETECT_PREFILTER_TOPK > 0 and backend.pt:
+            # eşik AutoShape'in NMS eşiğiyle aynı: yalnızca NMS'in zaten eleyeceği anchor'lar çözülmez
+            set_detect_prefilter(backend.model, conf_thres=model.conf, topk=DETECT_PREFILTER_TOPK)
+    model.eval()
+    if backend.cpu_optimize:
+        # ön filtre ayarlandıktan sonra: izlenen grafiğe gömülür. --preload ile master'da bir kez yapılır.
+        backend.warmup(imgsz=warmup_shapes)
+    return model
+
+
+def _is_detector(backend):
+    """Tespit modeli mi: PyTorch'ta Detect katmanı (quantize.py INT8 dahil), ONNX'te (b, anchor, no) çıktısı."""
+    from models.yolo import Detect
+
+    if backend.pt:
+        return any(isinstance(m, Detect) for m in backend.model.modules())
+    if backend.onnx and not backend.dnn:
+        return len(backend.session.get_outputs()[0].shape) == 3  # sınıflandırıcı: (b, nc)
+    return True
+
+
+def _model_path(model_filename):
+    """Servis edilen dosya: MODEL_FORMAT=onnx iken varsa aynı adlı .onnx, yoksa .pt."""
+    path = WEIGHTS_DIR / model_filename
+    if MODEL_FORMAT == "onnx" and path.with_suffix(".onnx").exists():
+        return path.with_suffix(".onnx")
+    return path
+
+
+def _check_fork():
+    """
+    ONNX Runtime oturumları fork'u atlatmaz (thread havuzları çocuk sürece
+    geçmez): --preload ile master'da kurulanlar worker'da yeniden kurulur.
+    Optimize edilmiş grafik diskten okunduğu için bu ucuzdur.
+    """
+    global _models_pid
+    if MODEL_FORMAT != "onnx" or _models_pid == os.getpid():
+        return
+    with _registry_lock:
+        if _models_pid != os.getpid():
+            _models.clear()
+            _stats.clear()
+            _models_pid = os.getpid()
+
+
+# === Model yükleme ===
+def load_model(model_filename):
+    _check_fork()
+    model = _models.get(model_filename)
+    if model is not None:
+        return model
+
+    with _model_lock(model_filename):
+        if model_filename in _models:  # başka bir thread yüklemiş olabilir
+            return _models[model_filename]
+
+        model_path = _model_path(model_filename)
+        if not model_path.exists():
+            raise FileNotFoundError(f"Model bulunamadı: {model_path}")
+
+        rss_before = _rss_bytes()
+        t0 = time.perf_counter()
+        model = _build(model_path)
+        load_time = time.perf_counter() - t0
+        rss_after = _rss_bytes()
+
+        _stats[model_filename] = {
+            "load_seconds": round(load_time, 3),
+            "tensor_bytes": _tensor_bytes(model),
+            "rss_delta_bytes": (rss_after - rss_before) if rss_before is not None and rss_after is not None else None,
+            "loaded_at": time.time(),
+        }
+        _models[model_filename] = model
+        print(f"📦 Model yüklendi: {model_filename} ({load_time:.2f}s)")
+    return model
+
+
+def has_weights(model_filename):
+    return model_filename in _models or _model_path(model_filename).exists()
+
+
+def get_fused_model(category):
+    """Kategori için birleşik tür/israf modeli; ağırlık yoksa None."""
+    model_filename = FUSED_MODELS.get(category)
+    if model_filename is None or not has_weights(model_filename):
+        return None
+    return load_model(model_filename)
+
+
+def serving_models():
+    """Servis için gereken modeller: birleşik model varsa ilgili çift atlanır."""
+    names = [PLATE_MODEL]
+    for category in TYPE_MODELS:
+        fused = FUSED_MODELS.get(category)
+        if fused and has_weights(fused):
+            names.append(fused)
+        else:
+            names += [TYPE_MODELS[category], WASTE_MODELS[category]]
+    return names
+
+
+def get_plate_model():
+    return load_model(PLATE_MODEL)
+
+
+def preload_models(model_filenames=None):
+    """Tüm modelleri önceden yükler (örn. gunicorn worker açılışında)."""
+    for model_filename in model_filenames or serving_models():
+        try:
+            load_model(model_filename)
+        except Exception as e:
+            print(f"🚨 Model önceden yüklenemedi: {model_filename}: {e}")
+    return model_stats()
+
+
+def freeze_models():
+    """
+    Fork öncesi (gunicorn --preload) master süreçte çağrılır: modeller eval
+    modunda ve gradyansız kalır, Python nesneleri GC'nin dışına alınır. Böylece
+    worker'lar ağırlık sayfalarını copy-on-write olarak paylaşır.
+    """
+    for model in _models.values():
+        model.eval()
+        for p in model.parameters():
+            p.requires_grad_(False)
+    gc.collect()
+    gc.freeze()  # GC taraması paylaşılan sayfalara yazmasın
+
+
+def is_loaded(model_filename):
+    return model_filename in _models
+
+
+def _weights_hash(model_filename):
+    """Ağırlık dosyasının SHA-256'sı; dosya değişmedikçe (boyut + mtime) yeniden okunmaz."""
+    path = _model_path(model_filename)
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return "missing"
+    key = (stat.st_size, stat.st_mtime_ns)
+    cached = _file_hashes.get(model_filename)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    _file_hashes[model_filename] = (key, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def model_fingerprint():
+    """
+    Servis edilen ağırlık dosyalarının ortak özeti. Herhangi bir ağırlık
+    değişir, eklenir (örn. birleşik model) ya da silinirse değişir; analiz
+    önbelleği bu değerle anahtarlanır.
+    """
+    digest = hashlib.sha256()
+    for model_filename in sorted(serving_models()):
+        digest.update(f"{model_filename}:{_weights_hash(model_filename)}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def model_stats():
+    """Her model için yükleme süresi ve bellek bilgisi."""
+    return {
+        name: {"loaded": name in _models, **_stats.get(name, {})}
+        for name in dict.fromkeys(ALL_MODELS + [f for f in FUSED_MODELS.values() if has_weights(f)] + list(_models))
+    }
@@ -0,0 +1,198 @@
+# yolo_models/storage.py
+"""
+Takılabilir depolama katmanı.
+
+Varsayılan arka uç Google Cloud Storage'dır (süreç başına tek storage.Client);
+testler ve benchmark'lar için WISE_STORAGE_BACKEND=local ile yerel dosya
+sistemi kullanılabilir. Yüklemeler sınırlı bir thread havuzunda yapılır.
+"""
+import os
+import json
+import base64
+import shutil
+import mimetypes
+import threading
+import traceback
+from pathlib import Path
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, wait
+
+BUCKET_NAME = "wise-uploads"
+STORAGE_BACKEND = os.getenv("WISE_STORAGE_BACKEND", "gcs")                # "gcs" | "local"
+LOCAL_STORAGE_DIR = Path(os.getenv("WISE_LOCAL_STORAGE_DIR", Path(__file__).resolve().parents[1] / "media"))
+LOCAL_STORAGE_URL = os.getenv("WISE_LOCAL_STORAGE_URL", "/media/")
+UPLOAD_WORKERS = int(os.getenv("WISE_UPLOAD_WORKERS", "8"))
+DEFER_UPLOADS = os.getenv("WISE_DEFER_UPLOADS", "0") == "1"              # yanıtı yüklemeleri beklemeden dön
+STREAM_CHUNK_BYTES = int(os.getenv("WISE_STREAM_CHUNK_BYTES", str(1024 * 1024)))  # GCS: 256 KiB'nin katı olmalı
+
+
+class GCSStorage:
+    def __init__(self, bucket_name=BUCKET_NAME):
+        from google.cloud import storage
+        from google.oauth2 import service_account
+
+        base64_creds = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")
+        creds_json = json.loads(base64.b64decode(base64_creds).decode("utf-8"))
+        credentials = service_account.Credentials.from_service_account_info(creds_json)
+        self.client = storage.Client(credentials=credentials)
+        self.bucket_name = bucket_name
+        self.bucket = self.client.bucket(bucket_name)
+
+    def url(self, name):
+        return f"https://storage.googleapis.com/{self.bucket_name}/{name}"
+
+    def upload(self, name, fileobj, content_type=None):
+        self.bucket.blob(name).upload_from_file(fileobj, content_type=content_type)
+        return self.url(name)
+
+    def open_write(self, name, content_type=None):
+        """Resumable yükleme; bellekte en fazla STREAM_CHUNK_BYTES tutulur."""
+        return self.bucket.blob(name).open("wb", content_type=content_type, chunk_size=STREAM_CHUNK_BYTES)
+
+    def move(self, name, new_name):
+        """Sunucu tarafı kopyala + sil; baytlar bu süreçten geçmez."""
+        self.bucket.rename_blob(self.bucket.blob(name), new_name)
+        return self.url(new_name)
+
+    def delete(self, name):
+        from google.api_core.exceptions import NotFound
+
+        try:
+            self.bucket.blob(name).delete()
+        except NotFound:
+            pass
+
+    def list(self, prefix=""):
+        return (blob.name for blob in self.bucket.list_blobs(prefix=prefix))
+
+    def list_info(self, prefix=""):
+        """(ad, boyut, içerik türü, oluşturulma zamanı) listesi; fotoğraf dizini uzlaştırması için."""
+        fields = "items(name,size,contentType,timeCreated),nextPageToken"
+        return (
+            (blob.name, blob.size, blob.content_type or "", blob.time_created)
+            for blob in self.bucket.list_blobs(prefix=prefix, fields=fields)
+        )
+
+
+class LocalStorage:
+    """Dosya sistemi karşılığı (test / benchmark)."""
+
+    def __init__(self, root=LOCAL_STORAGE_DIR, base_url=LOCAL_STORAGE_URL):
+        self.root = Path(root)
+        self.base_url = base_url
+
+    def url(self, name):
+        return f"{self.base_url}{name}"
+
+    def upload(self, name, fileobj, content_type=None):
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            shutil.copyfileobj(fileobj, f)
+        return self.url(name)
+
+    def open_write(self, name, content_type=None):
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return open(path, "wb")
+
+    def move(self, name, new_name):
+        path = self.root / new_name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(self.root / name, path)
+        return self.url(new_name)
+
+    def delete(self, name):
+        (self.root / name).unlink(missing_ok=True)
+
+    def list(self, prefix=""):
+        if not self.root.exists():
+            return iter(())
+        return (
+            p.relative_to(self.root).as_posix()
+            for p in sorted(self.root.rglob("*"))
+            if p.is_file() and p.relative_to(self.root).as_posix().startswith(prefix)
+        )
+
+    def list_info(self, prefix=""):
+        for name in self.list(prefix):
+            stat = (self.root / name).stat()
+            created = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+            yield name, stat.st_size, mimetypes.guess_type(name)[0] or "", created
+
+
+BACKENDS = {"gcs": GCSStorage, "local": LocalStorage}
+
+_storage = None
+_storage_lock = threading.Lock()
+_executor = None
+_executor_pid = None
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def get_storage():
+    """Süreç genelinde tek depolama nesnesi (tek storage.Client)."""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = BACKENDS[STORAGE_BACKEND]()
+    return _storage
+
+
+def set_storage(storage):
+    """Arka ucu değiştirir (testler / benchmark'lar için)."""
+    global _storage
+    _storage = storage
+
+
+def _get_executor():
+    """Yükleme havuzu; thread'ler fork'u atlatmadığı için süreç başına oluşturulur."""
+    global _executor, _executor_pid
+    if _executor_pid != os.getpid():
+        with _storage_lock:
+            if _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="upload")
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def submit_upload(fn, *args):
+    """fn(*args) çağrısını yükleme havuzunda çalıştırır, Future döner."""
+    return track(_get_executor().submit(fn, *args))
+
+
+def track(future):
+    """Başka bir havuzda çalışan depolama işini flush()'ın beklediği kümeye ekler."""
+    with _pending_lock:
+        _pending.add(future)
+    future.add_done_callback(_done)
+    return future
+
+
+def defer_upload(fn, *args):
+    """Arka planda yükler; sonucu kimse beklemediği için hatalar loglanır."""
+    future = submit_upload(fn, *args)
+    future.add_done_callback(_log_error)
+    return future
+
+
+def _done(future):
+    with _pending_lock:
+        _pending.discard(future)
+
+
+def _log_error(future):
+    if future.exception() is not None:
+        print("🚨 Ertelenmiş yükleme hatası:")
+        traceback.print_exception(future.exception())
+
+
+def flush(timeout=None):
+    """Bekleyen (ertelenmiş ve akış halindeki) yüklemelerin bitmesini bekler."""
+    with _pending_lock:
+        pending = list(_pending)
+    if pending:
+        wait(pending, timeout=timeout)
+    return len(pending)
@@ -0,0 +1 @@
+from yolo_models import model_registry  # noqa: F401  yolov5 ağacını (models/, utils/) sys.path'e ekler
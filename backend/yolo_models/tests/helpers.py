@@ -0,0 +1,9 @@
+"""Testlerin ortak yardımcıları."""
+from yolo_models.model_registry import YOLOV5_DIR
+
+
+def tiny_detector(nc=3):
+    """Ağırlık dosyası gerektirmeyen, rastgele başlatılmış küçük yolov5n dedektörü."""
+    from models.yolo import DetectionModel
+
+    return DetectionModel(YOLOV5_DIR / "models" / "yolov5n.yaml", nc=nc).eval()
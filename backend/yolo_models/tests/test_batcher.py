@@ -0,0 +1,36 @@
+from django.test import SimpleTestCase
+
+from yolo_models.batcher import MicroBatcher
+
+
+class MicroBatcherTests(SimpleTestCase):
+    def test_results_are_dispatched_in_order(self):
+        batches = []
+        batcher = MicroBatcher(lambda items: batches.append(items) or [i * 2 for i in items], name="test-order",
+                               max_wait_ms=200)
+        futures = [batcher.submit(i) for i in range(3)]
+        self.assertEqual([f.result(5) for f in futures], [0, 2, 4])
+        self.assertEqual(sum(len(b) for b in batches), 3)
+
+    def test_short_result_list_fails_every_future(self):
+        batcher = MicroBatcher(lambda items: items[:1], name="test-short", max_wait_ms=200)
+        futures = [batcher.submit(i) for i in range(3)]
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result(5)
+
+    def test_exception_fails_every_future_and_thread_survives(self):
+        calls = []
+
+        def fn(items):
+            calls.append(items)
+            if len(calls) == 1:
+                raise ValueError("boom")
+            return items
+
+        batcher = MicroBatcher(fn, name="test-error", max_wait_ms=200)
+        futures = [batcher.submit(i) for i in range(2)]
+        for future in futures:
+            with self.assertRaises(ValueError):
+                future.result(5)
+        self.assertEqual(batcher(7, timeout=5), 7)
@@ -0,0 +1,174 @@
+import importlib.util
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import torch
+from django.test import SimpleTestCase
+
+from .helpers import tiny_detector
+
+IMGSZ = 64
+
+
+class DetectMultiBackendTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.dir = Path(cls.tmp.name)
+        torch.manual_seed(0)
+        cls.weights = cls.dir / "tiny.pt"
+        torch.save({"model": tiny_detector()}, cls.weights)
+        cls.im = torch.rand(2, 3, IMGSZ, IMGSZ)
+        cls.expected = cls.backend()(cls.im)[0]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+        super().tearDownClass()
+
+    @classmethod
+    def backend(cls, weights=None, **kwargs):
+        from models.common import DetectMultiBackend
+
+        return DetectMultiBackend(weights or cls.weights, device=torch.device("cpu"), **kwargs)
+
+    def assert_matches(self, y):
+        self.assertEqual(y.shape, self.expected.shape)
+        torch.testing.assert_close(y, self.expected, rtol=1e-3, atol=1e-2)
+
+    def test_cpu_optimize_jit(self):
+        cache_dir = self.dir / "jit-cache"
+        model = self.backend(cpu_optimize="jit", cache_dir=cache_dir)
+        model.warmup(imgsz=[(2, 3, IMGSZ, IMGSZ)])
+        with torch.no_grad():
+            self.assert_matches(model(self.im)[0])
+        self.assertEqual(len(list(cache_dir.glob("*.torchscript"))), 1)
+
+        reloaded = self.backend(cpu_optimize="jit", cache_dir=cache_dir)  # loads the cached graph
+        with torch.no_grad():
+            self.assert_matches(reloaded(self.im)[0])
+
+    def test_cpu_optimize_compile(self):
+        model = self.backend(cpu_optimize="compile", cache_dir=self.dir / "inductor-cache")
+        with torch.no_grad():
+            self.assert_matches(model(self.im)[0])
+
+    def test_cpu_optimize_rejects_unknown_mode(self):
+        with self.assertRaises(AssertionError):
+            self.backend(cpu_optimize="tensorrt")
+
+    def autoshape(self, prefilter):
+        from models.common import AutoShape
+        from models.yolo import set_detect_prefilter
+
+        backend = self.backend()
+        model = AutoShape(backend, verbose=False)
+        model.conf = 0.01
+        set_detect_prefilter(backend.model, conf_thres=model.conf if prefilter else None, topk=1000)
+        preds = []
+        backend.register_forward_hook(lambda m, args, y: preds.append(y[0] if isinstance(y, list) else y))
+        return model, preds
+
+    def test_detect_prefilter_runs_under_autoshape(self):
+        im = np.random.default_rng(0).integers(0, 255, (640, 640, 3), dtype=np.uint8)
+        results = {}
+        for prefilter, anchors in ((False, 25200), (True, 3000)):  # 3 layers x topk 1000
+            model, preds = self.autoshape(prefilter)
+            with torch.no_grad():
+                results[prefilter] = model(im).xyxy[0]
+            self.assertEqual(tuple(preds[0].shape), (1, anchors, 3 + 5))
+        torch.testing.assert_close(results[True], results[False])  # lossless when no layer exceeds topk
+
+
+@unittest.skipUnless(importlib.util.find_spec("onnxruntime"), "onnxruntime is not installed")
+class OrtBackendTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        import export
+
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.dir = Path(cls.tmp.name)
+        torch.manual_seed(0)
+        model = tiny_detector()
+        cls.onnx = {}
+        for name, kwargs in (("dynamic", {"dynamic": True}), ("static", {"batch_size": 2})):
+            (cls.dir / name).mkdir()
+            weights = cls.dir / name / "tiny.pt"
+            torch.save({"model": model}, weights)
+            f = export.run(weights=weights, include=("onnx",), imgsz=(IMGSZ, IMGSZ), **kwargs)
+            if not f:
+                cls.tmp.cleanup()
+                raise unittest.SkipTest("ONNX export is not available")
+            cls.onnx[name] = f[0]
+        cls.im = torch.rand(3, 3, IMGSZ, IMGSZ)
+        cls.expected = DetectMultiBackendTests.backend(weights)(cls.im)[0]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+        super().tearDownClass()
+
+    def backend(self, name="dynamic", **ort_options):
+        from models.common import DetectMultiBackend
+
+        return DetectMultiBackend(self.onnx[name], device=torch.device("cpu"), ort_options=ort_options,
+                                  cache_dir=self.dir / "ort-cache")
+
+    def assert_matches(self, y):
+        self.assertEqual(y.shape, self.expected.shape)
+        torch.testing.assert_close(y, self.expected, rtol=1e-3, atol=1e-2)
+
+    def test_ort_options(self):
+        modes = (
+            {},
+            {"io_binding": True},
+            {"graph_optimization": "disable"},
+            {"graph_optimization": "basic", "intra_op_threads": 1, "inter_op_threads": 2},
+            {"shared_arena": True, "arena_max_bytes": 64 * 1024 * 1024, "arena_extend_strategy": "same_as_requested"},
+            {"cpu_mem_arena": False, "mem_pattern": False},
+        )
+        for options in modes:
+            with self.subTest(**options):
+                self.assert_matches(self.backend(**options)(self.im))
+        self.assertTrue(list((self.dir / "ort-cache").glob("tiny-*.onnx")))  # optimized graph cached
+
+    def test_io_binding_returns_bound_buffers(self):
+        model = self.backend(io_binding=True)
+        first = model(self.im)
+        self.assert_matches(first)
+        first_ptr = first.data_ptr()
+        second = model(self.im)  # same shape: same bound output buffers, no per-call copy
+        self.assertEqual(second.data_ptr(), first_ptr)
+        self.assert_matches(second)
+
+    def test_static_batch_runs_in_chunks(self):
+        for io_binding in (False, True):
+            with self.subTest(io_binding=io_binding):
+                model = self.backend("static", io_binding=io_binding)
+                self.assertEqual(model.ort_batch, 2)
+                self.assert_matches(model(self.im))  # batch 3: one full chunk + one zero-padded chunk
+
+    def test_export_with_detect_prefilter(self):
+        import export
+        from models.common import DetectMultiBackend
+        from models.yolo import set_detect_prefilter
+
+        torch.manual_seed(0)
+        model = tiny_detector()
+        set_detect_prefilter(model, conf_thres=0.001, topk=20)
+        (self.dir / "prefilter").mkdir()
+        weights = self.dir / "prefilter" / "tiny.pt"
+        torch.save({"model": model}, weights)
+        expected = DetectMultiBackendTests.backend(weights)(self.im)[0]
+        # k = min(topk, na * ny * nx) per layer: strides 8/16/32 at 64 px give 192, 48 and 12 anchors
+        self.assertEqual(expected.shape, (3, 20 + 20 + 12, model.model[-1].no))
+
+        f = export.run(weights=weights, include=("onnx",), imgsz=(IMGSZ, IMGSZ), dynamic=True)
+        y = DetectMultiBackend(f[0], device=torch.device("cpu"))(self.im)
+        self.assertEqual(y.shape, expected.shape)
+        # the random test model has near-equal objectness logits, so TopK tie order differs between torch and ORT
+        torch.testing.assert_close(y[..., 4].sort(1).values, expected[..., 4].sort(1).values, rtol=1e-3, atol=1e-3)
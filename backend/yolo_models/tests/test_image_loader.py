@@ -0,0 +1,108 @@
+import asyncio
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+import httpx
+from django.test import SimpleTestCase
+from PIL import Image
+
+from yolo_models import image_loader
+from yolo_models.image_loader import CacheEntry, ImageCache
+
+
+def jpeg_bytes(size=(64, 48)):
+    buffer = BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, data):
+        self.data = data
+        self.headers = {"Content-Length": str(len(data)), "ETag": '"v1"'}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.data), chunk_size):
+            yield self.data[i:i + chunk_size]
+
+
+class ImageLoaderTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache = ImageCache(memory_bytes=1024 * 1024, disk_dir=tmp.name)
+        patcher = mock.patch.object(image_loader, "cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.data = jpeg_bytes()
+
+    def test_load_image_from_url(self):
+        session = mock.Mock()
+        session.get.return_value = FakeResponse(self.data)
+        with mock.patch.object(image_loader, "get_session", return_value=session):
+            image = image_loader.load_image_from_url("https://example.com/a.jpg")
+            self.assertEqual((image.mode, image.size), ("RGB", (64, 48)))
+            image_loader.load_image_from_url("https://example.com/a.jpg")  # TTL içinde önbellekten
+        self.assertEqual(session.get.call_count, 1)
+        self.assertEqual(self.cache.get("https://example.com/a.jpg").data, self.data)
+
+    def test_async_fetch_keeps_disk_io_off_the_event_loop(self):
+        requests_seen = []
+
+        def handler(request):
+            requests_seen.append(request)
+            return httpx.Response(200, content=self.data, headers={"ETag": '"v1"'})
+
+        async def fetch_twice():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            with mock.patch.object(image_loader, "get_async_client", return_value=client):
+                first = await image_loader.fetch_image_bytes_async("https://example.com/b.jpg")
+                self.cache._entries.clear()  # ikinci okuma disk katmanından
+                second = await image_loader.fetch_image_bytes_async("https://example.com/b.jpg")
+            await client.aclose()
+            return first, second
+
+        with mock.patch.object(image_loader.asyncio, "to_thread", wraps=asyncio.to_thread) as to_thread:
+            first, second = asyncio.run(fetch_twice())
+        self.assertEqual((first, second), (self.data, self.data))
+        self.assertEqual(len(requests_seen), 1)
+        called = [call.args[0] for call in to_thread.call_args_list]
+        self.assertEqual(called, [self.cache.get, self.cache.put, self.cache.get])
+
+    def test_memory_tier_is_off_by_default(self):
+        self.assertEqual(image_loader.CACHE_MEMORY_BYTES, 0)
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ImageCache(disk_dir=tmp)
+            cache.put("https://example.com/c.jpg", CacheEntry(self.data, '"v1"'))
+            self.assertEqual((len(cache._entries), cache._size), (0, 0))
+            self.assertEqual(cache.get("https://example.com/c.jpg").data, self.data)  # disk katmanından
+            self.assertEqual(len(cache._entries), 0)
+
+
+class DecodeImageTests(SimpleTestCase):
+    def test_long_side_is_capped(self):
+        for size, crop, detect in (((4000, 3000), (1600, 1200), (640, 480)),
+                                   ((4032, 3024), (1600, 1200), (640, 480)),
+                                   ((6000, 4000), (1600, 1067), (640, 427))):
+            data = jpeg_bytes(size)
+            with self.subTest(size=size):
+                image = image_loader.decode_image(data, image_loader.CROP_MAX_SIDE)
+                self.assertEqual((image.mode, image.size), ("RGB", crop))
+                self.assertEqual(image.info["source_size"], size)
+                self.assertEqual(image_loader.decode_image(data, image_loader.DETECT_SIZE).size, detect)
+
+    def test_small_image_is_not_upscaled(self):
+        image = image_loader.decode_image(jpeg_bytes((1200, 900)), 1600)
+        self.assertEqual(image.size, (1200, 900))
@@ -0,0 +1,62 @@
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
+
+import torch
+from django.test import SimpleTestCase
+
+from yolo_models import model_registry as registry
+from .helpers import tiny_detector
+
+
+class ModelRegistryTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.weights = Path(tmp.name)
+        for name, value in (("WEIGHTS_DIR", self.weights), ("CPU_OPTIMIZE", ""), ("MODEL_FORMAT", "pt"),
+                            ("_models", {}), ("_stats", {}), ("_file_hashes", {})):
+            patcher = mock.patch.object(registry, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        torch.manual_seed(0)
+        torch.save({"model": tiny_detector()}, self.weights / registry.PLATE_MODEL)
+
+    def test_concurrent_loads_build_once(self):
+        results = []
+        with mock.patch.object(registry, "_build", wraps=registry._build) as build:
+            threads = [threading.Thread(target=lambda: results.append(registry.get_plate_model())) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(build.call_count, 1)
+        self.assertTrue(all(model is results[0] for model in results))
+        stats = registry.model_stats()[registry.PLATE_MODEL]
+        self.assertTrue(stats["loaded"])
+        self.assertGreater(stats["tensor_bytes"], 0)
+
+    def test_detector_is_wrapped_with_prefilter(self):
+        from models.common import AutoShape
+        from models.yolo import Detect
+
+        model = registry.get_plate_model()
+        self.assertIsInstance(model, AutoShape)
+        [head] = [m for m in model.model.model.modules() if isinstance(m, Detect)]
+        self.assertEqual((head.prefilter_conf, head.prefilter_topk), (model.conf, registry.DETECT_PREFILTER_TOPK))
+
+    def test_missing_weights(self):
+        with self.assertRaises(FileNotFoundError):
+            registry.load_model(registry.TYPE_MODELS["corba"])
+        self.assertFalse(registry.is_loaded(registry.TYPE_MODELS["corba"]))
+
+    def test_fused_model_replaces_pair(self):
+        self.assertIn(registry.TYPE_MODELS["corba"], registry.serving_models())
+        fingerprint = registry.model_fingerprint()
+        (self.weights / registry.FUSED_MODELS["corba"]).write_bytes(b"fused")
+        models = registry.serving_models()
+        self.assertIn(registry.FUSED_MODELS["corba"], models)
+        self.assertNotIn(registry.TYPE_MODELS["corba"], models)
+        self.assertNotIn(registry.WASTE_MODELS["corba"], models)
+        self.assertNotEqual(registry.model_fingerprint(), fingerprint)
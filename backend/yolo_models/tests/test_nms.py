@@ -0,0 +1,109 @@
+from unittest import mock
+
+import torch
+import torchvision
+from django.test import SimpleTestCase
+
+
+def reference_nms(prediction, conf_thres=0.25, iou_thres=0.45, classes=None, agnostic=False, multi_label=False,
+                  labels=(), max_det=300, nm=0):
+    """Per-image non_max_suppression as shipped by upstream YOLOv5, without the time limit."""
+    from utils.general import xywh2xyxy
+
+    bs = prediction.shape[0]
+    nc = prediction.shape[2] - nm - 5
+    xc = prediction[..., 4] > conf_thres
+    max_wh, max_nms = 7680, 30000
+    multi_label &= nc > 1
+    mi = 5 + nc
+    output = [torch.zeros((0, 6 + nm))] * bs
+    for xi, x in enumerate(prediction):
+        x = x[xc[xi]]
+        if labels and len(labels[xi]):
+            lb = labels[xi]
+            v = torch.zeros((len(lb), nc + nm + 5))
+            v[:, :4] = lb[:, 1:5]
+            v[:, 4] = 1.0
+            v[range(len(lb)), lb[:, 0].long() + 5] = 1.0
+            x = torch.cat((x, v), 0)
+        if not x.shape[0]:
+            continue
+        x[:, 5:] *= x[:, 4:5]
+        box = xywh2xyxy(x[:, :4])
+        mask = x[:, mi:]
+        if multi_label:
+            i, j = (x[:, 5:mi] > conf_thres).nonzero(as_tuple=False).T
+            x = torch.cat((box[i], x[i, 5 + j, None], j[:, None].float(), mask[i]), 1)
+        else:
+            conf, j = x[:, 5:mi].max(1, keepdim=True)
+            x = torch.cat((box, conf, j.float(), mask), 1)[conf.view(-1) > conf_thres]
+        if classes is not None:
+            x = x[(x[:, 5:6] == torch.tensor(classes)).any(1)]
+        if not x.shape[0]:
+            continue
+        x = x[x[:, 4].argsort(descending=True)[:max_nms]]
+        c = x[:, 5:6] * (0 if agnostic else max_wh)
+        i = torchvision.ops.nms(x[:, :4] + c, x[:, 4], iou_thres)
+        output[xi] = x[i[:max_det]]
+    return output
+
+
+def predictions(bs, n=2000, nc=5, nm=0, seed=0):
+    """
+    Random raw head output (bs, n, 5 + nc + nm) with boxes clustered so that NMS has overlaps to suppress.
+
+    float64 keeps obj * cls scores free of ties, whose order both implementations leave unspecified.
+    """
+    g = torch.Generator().manual_seed(seed)
+    p = torch.rand(bs, n, 5 + nc + nm, generator=g, dtype=torch.float64)
+    centers = torch.rand(bs, 20, 2, generator=g, dtype=torch.float64) * 600 + 20
+    p[..., :2] = centers[:, torch.randint(0, 20, (n,), generator=g)] + torch.randn(bs, n, 2, generator=g, dtype=torch.float64) * 8
+    p[..., 2:4] = p[..., 2:4] * 60 + 20
+    return p
+
+
+class NonMaxSuppressionTests(SimpleTestCase):
+    def assert_parity(self, prediction, **kwargs):
+        from utils.general import non_max_suppression
+
+        expected = reference_nms(prediction.clone(), **kwargs)
+        output = non_max_suppression(prediction.clone(), **kwargs)
+        self.assertEqual(len(output), len(expected))
+        for o, e in zip(output, expected, strict=True):
+            torch.testing.assert_close(o, e, rtol=0, atol=0)
+
+    def test_parity_best_class(self):
+        self.assert_parity(predictions(11), conf_thres=0.25, iou_thres=0.45)  # 11 images: two chunks
+
+    def test_parity_validation_settings(self):
+        self.assert_parity(predictions(9, seed=1), conf_thres=0.001, iou_thres=0.6, multi_label=True, max_det=300)
+
+    def test_parity_options(self):
+        p = predictions(10, nm=4, seed=2)
+        self.assert_parity(p, conf_thres=0.1, agnostic=True, nm=4)
+        self.assert_parity(p, conf_thres=0.1, classes=[0, 3], max_det=5, nm=4)
+        labels = [torch.tensor([[1, 100.0, 100, 40, 40]]) if i % 3 == 0 else torch.zeros((0, 5)) for i in range(10)]
+        self.assert_parity(p, conf_thres=0.3, labels=labels, nm=4)
+
+    def test_empty_images(self):
+        from utils.general import non_max_suppression
+
+        p = predictions(10, seed=3)
+        p[::2, :, 4] = 0  # no candidates in even images
+        self.assert_parity(p)
+        output = non_max_suppression(p)
+        self.assertTrue(all(len(o) == 0 for o in output[::2]))
+        self.assertTrue(all(o.shape[1] == 6 for o in output))
+
+    def test_batch_at_validation_settings(self):
+        p = predictions(20, n=6300, nc=3, seed=4)  # 320 px anchors, three candidate chunks
+        self.assert_parity(p, conf_thres=0.001, iou_thres=0.6, multi_label=True, max_det=300)
+
+    def test_one_nms_call_per_chunk(self):
+        from utils.general import non_max_suppression
+
+        p = predictions(8, seed=5)  # tek parça: 8 görüntü
+        with mock.patch("torchvision.ops.nms", wraps=torchvision.ops.nms) as nms:
+            output = non_max_suppression(p.clone(), conf_thres=0.25, iou_thres=0.45)
+        self.assertEqual(nms.call_count, 1)
+        self.assertTrue(all(len(o) for o in output))
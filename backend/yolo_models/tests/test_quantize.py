@@ -0,0 +1,61 @@
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import torch
+from django.test import SimpleTestCase
+from PIL import Image
+
+from .helpers import tiny_detector
+
+IMGSZ = 64
+
+
+class QuantizeTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.dir = Path(cls.tmp.name)
+        (cls.dir / "calib").mkdir()
+        rng = np.random.default_rng(0)
+        for i in range(3):
+            Image.fromarray(rng.integers(0, 255, (48, 64, 3), dtype=np.uint8)).save(cls.dir / "calib" / f"{i}.jpg")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+        super().tearDownClass()
+
+    def test_quantized_detector_loads_through_detect_multi_backend(self):
+        import quantize
+        from models.common import DetectMultiBackend
+        from models.yolo import QuantizedModel
+
+        torch.manual_seed(0)
+        weights = self.dir / "tiny.pt"
+        torch.save({"model": tiny_detector()}, weights)
+        f = quantize.run(weights=weights, source=self.dir / "calib", imgsz=IMGSZ, max_images=3)
+        self.assertEqual(f, self.dir / "tiny-int8.pt")
+
+        backend = DetectMultiBackend(f, device=torch.device("cpu"))
+        self.assertIsInstance(backend.model, QuantizedModel)
+        self.assertEqual(backend.stride, 32)
+        self.assertEqual(len(backend.names), 3)
+
+        im = torch.rand(1, 3, IMGSZ, IMGSZ)
+        with torch.no_grad():
+            y = backend(im)[0]
+            expected = DetectMultiBackend(weights, device=torch.device("cpu"))(im)[0]
+        self.assertEqual(y.shape, expected.shape)  # (1, anchors, nc + 5)
+        self.assertEqual(y.dtype, torch.float32)
+        self.assertLess((y[..., :4] - expected[..., :4]).abs().mean().item(), 8.0)  # INT8 boxes stay close in pixels
+
+    def test_quantized_classifier(self):
+        import quantize
+        from models.yolo import ClassificationModel
+
+        model = ClassificationModel(model=tiny_detector(), nc=4, cutoff=5).eval()
+        qmodel = quantize.quantize(model, self.dir / "calib", 32, max_images=3)
+        with torch.no_grad():
+            self.assertEqual(qmodel(torch.rand(2, 3, 32, 32)).shape, (2, 4))
@@ -8,6 +8,9 @@ Usage - Single-GPU training:
 Usage - Multi-GPU DDP training:
     $ python -m torch.distributed.run --nproc_per_node 4 --master_port 2022 classify/train.py --model yolov5s-cls.pt --data imagenet --epochs 5 --img 224 --device 0,1,2,3
 
+Usage - Shared-backbone type + waste classifier:
+    $ python classify/train.py --model wiseMainTypeCls-yolo5.pt --data path/to/type --aux-model wiseMainCls-yolo5.pt --aux-data path/to/waste
+
 Datasets:           --data mnist, fashion-mnist, cifar10, cifar100, imagenette, imagewoof, imagenet, or 'path/to/data'
 YOLOv5-cls models:  --model yolov5n-cls.pt, yolov5s-cls.pt, yolov5m-cls.pt, yolov5l-cls.pt, yolov5x-cls.pt
 Torchvision models: --model resnet50, efficientnet_b0, etc. See https://pytorch.org/vision/stable/models.html
@@ -38,7 +41,7 @@ ROOT = Path(os.path.relpath(ROOT, Path.cwd()))  # relative
 
 from classify import val as validate
 from models.experimental import attempt_load
-from models.yolo import ClassificationModel, DetectionModel
+from models.yolo import ClassificationModel, DetectionModel, MultiHeadClassificationModel
 from utils.dataloaders import create_classification_dataloader
 from utils.general import (
     DATASETS_DIR,
@@ -138,6 +141,33 @@ def train(opt, device):
             workers=nw,
         )
 
+    # Auxiliary dataset (second head on a shared backbone, i.e. type + waste)
+    aux_trainloader = aux_testloader = None
+    if opt.aux_data:
+        aux_dir = Path(opt.aux_data)
+        assert aux_dir.is_dir(), f"--aux-data {aux_dir} not found"
+        nc_aux = len([x for x in (aux_dir / "train").glob("*") if x.is_dir()])  # number of aux classes
+        aux_trainloader = create_classification_dataloader(
+            path=aux_dir / "train",
+            imgsz=imgsz,
+            batch_size=bs // WORLD_SIZE,
+            augment=True,
+            cache=opt.cache,
+            rank=LOCAL_RANK,
+            workers=nw,
+        )
+        if RANK in {-1, 0}:
+            aux_test_dir = aux_dir / "test" if (aux_dir / "test").exists() else aux_dir / "val"
+            aux_testloader = create_classification_dataloader(
+                path=aux_test_dir,
+                imgsz=imgsz,
+                batch_size=bs // WORLD_SIZE * 2,
+                augment=False,
+                cache=opt.cache,
+                rank=-1,
+                workers=nw,
+            )
+
     # Model
     with torch_distributed_zero_first(LOCAL_RANK), WorkingDirectory(ROOT):
         if Path(opt.model).is_file() or opt.model.endswith(".pt"):
@@ -151,6 +181,14 @@ def train(opt, device):
             LOGGER.warning("WARNING ⚠️ pass YOLOv5 classifier model with '-cls' suffix, i.e. '--model yolov5s-cls.pt'")
             model = ClassificationModel(model=model, nc=nc, cutoff=opt.cutoff or 10)  # convert to classification model
         reshape_classifier_output(model, nc)  # update class count
+        if opt.aux_data and not isinstance(model, MultiHeadClassificationModel):
+            assert isinstance(model, ClassificationModel), "--aux-data requires a YOLOv5 classifier --model"
+            if opt.aux_model:  # head 1 initialized from a trained classifier, its backbone is discarded
+                aux_model = attempt_load(opt.aux_model, device="cpu", fuse=False)
+                reshape_classifier_output(aux_model, nc_aux)
+                model = MultiHeadClassificationModel.from_pair(model, aux_model)
+            else:
+                model = MultiHeadClassificationModel(model=model, nc=(nc, nc_aux))
     for m in model.modules():
         if not pretrained and hasattr(m, "reset_parameters"):
             m.reset_parameters()
@@ -163,6 +201,8 @@ def train(opt, device):
     # Info
     if RANK in {-1, 0}:
         model.names = trainloader.dataset.classes  # attach class names
+        if aux_trainloader:
+            model.head_names = [trainloader.dataset.classes, aux_trainloader.dataset.classes]
         model.transforms = testloader.dataset.torch_transforms  # attach inference transforms
         model_info(model)
         if opt.verbose:
@@ -212,6 +252,9 @@ def train(opt, device):
         model.train()
         if RANK != -1:
             trainloader.sampler.set_epoch(epoch)
+            if aux_trainloader:
+                aux_trainloader.sampler.set_epoch(epoch)
+        aux_iter = iter(aux_trainloader) if aux_trainloader else None
         pbar = enumerate(trainloader)
         if RANK in {-1, 0}:
             pbar = tqdm(enumerate(trainloader), total=len(trainloader), bar_format=TQDM_BAR_FORMAT)
@@ -220,7 +263,18 @@ def train(opt, device):
 
             # Forward
             with amp.autocast(enabled=cuda):  # stability issues when enabled
-                loss = criterion(model(images), labels)
+                if aux_iter:  # one forward pass over both datasets, each head scored on its own samples
+                    try:
+                        aux_images, aux_labels = next(aux_iter)
+                    except StopIteration:
+                        aux_iter = iter(aux_trainloader)
+                        aux_images, aux_labels = next(aux_iter)
+                    aux_images, aux_labels = aux_images.to(device, non_blocking=True), aux_labels.to(device)
+                    n = images.shape[0]
+                    y = model(torch.cat((images, aux_images)))
+                    loss = criterion(y[0][:n], labels) + criterion(y[1][n:], aux_labels)
+                else:
+                    loss = criterion(model(images), labels)
 
             # Backward
             scaler.scale(loss).backward()
@@ -246,6 +300,11 @@ def train(opt, device):
                         model=ema.ema, dataloader=testloader, criterion=criterion, pbar=pbar
                     )  # test accuracy, loss
                     fitness = top1  # define fitness as top1 accuracy
+                    if aux_testloader:
+                        aux_top1, aux_top5, aux_vloss = validate.run(
+                            model=ema.ema, dataloader=aux_testloader, criterion=criterion, head=1
+                        )  # aux head accuracy, loss
+                        fitness = (top1 + aux_top1) / 2  # mean top1 over both heads
 
         # Scheduler
         scheduler.step()
@@ -264,6 +323,14 @@ def train(opt, device):
                 "metrics/accuracy_top5": top5,
                 "lr/0": optimizer.param_groups[0]["lr"],
             }  # learning rate
+            if aux_testloader:
+                metrics.update(
+                    {
+                        f"{val}/aux_loss": aux_vloss,
+                        "metrics/aux_accuracy_top1": aux_top1,
+                        "metrics/aux_accuracy_top5": aux_top5,
+                    }
+                )
             logger.log_metrics(metrics, epoch)
 
             # Save model
@@ -301,7 +368,8 @@ def train(opt, device):
 
         # Plot examples
         images, labels = (x[:25] for x in next(iter(testloader)))  # first 25 images and labels
-        pred = torch.max(ema.ema(images.to(device)), 1)[1]
+        y = ema.ema(images.to(device))
+        pred = torch.max(y[0] if isinstance(y, tuple) else y, 1)[1]
         file = imshow_cls(images, labels, pred, de_parallel(model).names, verbose=False, f=save_dir / "test_images.jpg")
 
         # Log results
@@ -317,6 +385,8 @@ def parse_opt(known=False):
     parser = argparse.ArgumentParser()
     parser.add_argument("--model", type=str, default="yolov5s-cls.pt", help="initial weights path")
     parser.add_argument("--data", type=str, default="imagenette160", help="cifar10, cifar100, mnist, imagenet, ...")
+    parser.add_argument("--aux-data", type=str, default=None, help="second dataset for a shared-backbone head")
+    parser.add_argument("--aux-model", type=str, default="", help="classifier weights to initialize the aux head")
     parser.add_argument("--epochs", type=int, default=10, help="total training epochs")
     parser.add_argument("--batch-size", type=int, default=64, help="total batch size for all GPUs")
     parser.add_argument("--imgsz", "--img", "--img-size", type=int, default=224, help="train, val image size (pixels)")
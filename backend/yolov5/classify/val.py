@@ -67,6 +67,7 @@ def run(
     dataloader=None,
     criterion=None,
     pbar=None,
+    head=0,  # output head index for MultiHeadClassificationModel
 ):
     """Validates a YOLOv5 classification model on a dataset, computing metrics like top1 and top5 accuracy."""
     # Initialize/load model and set device
@@ -115,6 +116,8 @@ def run(
 
             with dt[1]:
                 y = model(images)
+                if isinstance(y, (list, tuple)):  # MultiHeadClassificationModel
+                    y = y[head]
 
             with dt[2]:
                 pred.append(y.argsort(1, descending=True)[:, :5])
@@ -133,7 +136,11 @@ def run(
     if verbose:  # all classes
         LOGGER.info(f"{'Class':>24}{'Images':>12}{'top1_acc':>12}{'top5_acc':>12}")
         LOGGER.info(f"{'all':>24}{targets.shape[0]:>12}{top1:>12.3g}{top5:>12.3g}")
-        for i, c in model.names.items():
+        names = model.names
+        if head:  # secondary head names
+            m = model.model if isinstance(model, DetectMultiBackend) else model
+            names = dict(enumerate(m.head_names[head]))
+        for i, c in names.items():
             acc_i = acc[targets == i]
             top1i, top5i = acc_i.mean(0).tolist()
             LOGGER.info(f"{c:>24}{acc_i.shape[0]:>12}{top1i:>12.3g}{top5i:>12.3g}")
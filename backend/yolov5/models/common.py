@@ -3,9 +3,13 @@
 
 import ast
 import contextlib
+import hashlib
+import importlib
 import json
 import math
+import os
 import platform
+import threading
 import warnings
 import zipfile
 from collections import OrderedDict, namedtuple
@@ -456,11 +460,51 @@ class Concat(nn.Module):
         return torch.cat(x, self.d)
 
 
+_ort_arena_registered = False
+_ort_arena_lock = threading.Lock()
+
+
+def _ort_shared_arena(ort, options):
+    """Registers one process-wide ONNX Runtime CPU arena, used by sessions with session.use_env_allocators=1."""
+    global _ort_arena_registered
+    with _ort_arena_lock:
+        if _ort_arena_registered:
+            return
+        strategies = {"next_power_of_two": 0, "same_as_requested": 1}
+        strategy = strategies[options.get("arena_extend_strategy", "same_as_requested")]
+        cfg = ort.OrtArenaCfg(int(options.get("arena_max_bytes", 0)), strategy, -1, -1)  # 0 / -1 = ORT defaults
+        mem = ort.OrtMemoryInfo("Cpu", ort.OrtAllocatorType.ORT_ARENA_ALLOCATOR, 0, ort.OrtMemType.DEFAULT)
+        ort.create_and_register_allocator(mem, cfg)
+        _ort_arena_registered = True
+
+
 class DetectMultiBackend(nn.Module):
     """YOLOv5 MultiBackend class for inference on various backends including PyTorch, ONNX, TensorRT, and more."""
 
-    def __init__(self, weights="yolov5s.pt", device=torch.device("cpu"), dnn=False, data=None, fp16=False, fuse=True):
-        """Initializes DetectMultiBackend with support for various inference backends, including PyTorch and ONNX."""
+    cpu_max_shapes = 16  # CPU-optimized mode: traced graphs kept per model, other input shapes run eagerly
+
+    def __init__(
+        self,
+        weights="yolov5s.pt",
+        device=torch.device("cpu"),
+        dnn=False,
+        data=None,
+        fp16=False,
+        fuse=True,
+        cpu_optimize=None,
+        cache_dir=None,
+        ort_options=None,
+    ):
+        """
+        Initializes DetectMultiBackend with support for various inference backends, including PyTorch and ONNX.
+
+        cpu_optimize ('jit' or 'compile') enables an opt-in CPU path for *.pt weights: channels_last memory format plus
+        either per-shape torch.jit.freeze + optimize_for_inference (oneDNN fusion) or torch.compile (inductor). Frozen
+        graphs are cached in cache_dir keyed by weights hash, torch version and input shape.
+
+        ort_options configures ONNX Runtime (see _ort_session): threads, graph optimization level, memory arena and
+        IO-binding; the optimized graph is cached in cache_dir. Static-batch *.onnx models accept any batch size.
+        """
         #   PyTorch:              weights = *.pt
         #   TorchScript:                    *.torchscript
         #   ONNX Runtime:                   *.onnx
@@ -509,11 +553,14 @@ class DetectMultiBackend(nn.Module):
         elif onnx:  # ONNX Runtime
             LOGGER.info(f"Loading {w} for ONNX Runtime inference...")
             check_requirements(("onnx", "onnxruntime-gpu" if cuda else "onnxruntime"))
-            import onnxruntime
-
             providers = ["CUDAExecutionProvider", "CPUExecutionProvider"] if cuda else ["CPUExecutionProvider"]
-            session = onnxruntime.InferenceSession(w, providers=providers)
+            ort_options = ort_options or {}
+            session = self._ort_session(w, providers, ort_options, cache_dir)
             output_names = [x.name for x in session.get_outputs()]
+            input_name = session.get_inputs()[0].name
+            ort_batch = session.get_inputs()[0].shape[0]  # int if exported without --dynamic
+            ort_batch = ort_batch if isinstance(ort_batch, int) else None
+            ort_io_binding = bool(ort_options.get("io_binding"))
             meta = session.get_modelmeta().custom_metadata_map  # metadata
             if "stride" in meta:
                 stride, names = int(meta["stride"]), eval(meta["names"])
@@ -687,6 +734,74 @@ class DetectMultiBackend(nn.Module):
             names = yaml_load(ROOT / "data/ImageNet.yaml")["names"]  # human-readable names
 
         self.__dict__.update(locals())  # assign all variables to self
+        self.cpu_optimize = cpu_optimize if pt and device.type == "cpu" and not fp16 else None
+        self._cpu_graphs = {}  # input shape -> frozen TorchScript module, or "compiled" -> torch.compile module
+        self._cpu_lock = threading.Lock()
+        self._ort_local = threading.local()  # per-thread IO binding + output buffers
+        if self.cpu_optimize:
+            self._init_cpu_optimize(w, cache_dir)
+
+    def _init_cpu_optimize(self, w, cache_dir):
+        """Prepares the CPU-optimized path: channels_last weights and the on-disk artifact cache."""
+        assert self.cpu_optimize in {"jit", "compile"}, f"cpu_optimize must be 'jit' or 'compile', not {self.cpu_optimize}"
+        self.model.to(memory_format=torch.channels_last)
+        self.cpu_cache, self.weights_hash = None, None
+        if cache_dir and Path(w).is_file():
+            try:
+                Path(cache_dir).mkdir(parents=True, exist_ok=True)
+                self.cpu_cache = Path(cache_dir)
+                self.weights_hash = hashlib.sha256(Path(w).read_bytes()).hexdigest()[:16]
+            except OSError as e:
+                LOGGER.warning(f"WARNING ⚠️ CPU graph cache disabled, {cache_dir} is not writable: {e}")
+        if self.cpu_optimize == "compile":
+            check_version(torch.__version__, "2.0.0", "torch.compile requires torch", hard=True)
+            inductor_config = importlib.import_module("torch._inductor.config")  # `import torch.x` would shadow torch
+
+            if self.cpu_cache:  # inductor keys its FX graph cache on graph + torch version; weights stay inputs
+                os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", str(self.cpu_cache / f"inductor-{torch.__version__}"))
+            inductor_config.fx_graph_cache = True
+            self._cpu_graphs["compiled"] = torch.compile(self.model, backend="inductor")
+
+    def _cpu_forward(self, im):
+        """Runs the CPU-optimized model on a channels_last input, tracing a frozen graph on first sight of a shape."""
+        im = im.contiguous(memory_format=torch.channels_last)
+        if self.cpu_optimize == "compile":
+            return self._cpu_graphs["compiled"](im)
+        shape = tuple(im.shape)
+        graph = self._cpu_graphs.get(shape)
+        if graph is None:
+            with self._cpu_lock:
+                graph = self._cpu_graphs.get(shape)
+                if graph is None and len(self._cpu_graphs) < self.cpu_max_shapes:
+                    graph = self._cpu_graphs[shape] = self._cpu_graph(shape)
+        return self.model(im) if graph is None else graph(im)
+
+    def _cpu_graph(self, shape):
+        """Loads or traces + freezes the model for one input shape, then applies oneDNN inference optimizations."""
+        f = None
+        if self.cpu_cache:
+            # Detect prefilter settings are baked into the trace, so they are part of the key
+            heads = [(m.prefilter_conf, m.prefilter_topk) for m in self.model.modules() if hasattr(m, "prefilter_topk")]
+            variant = hashlib.sha256(repr(heads).encode()).hexdigest()[:8]
+            dims = "x".join(map(str, shape))
+            f = self.cpu_cache / f"{self.weights_hash}-{variant}-torch{torch.__version__}-{dims}.torchscript"
+        if f and f.is_file():
+            frozen = torch.jit.load(f, map_location="cpu")
+        else:
+            LOGGER.info(f"Tracing {shape} for CPU-optimized inference...")
+            im = torch.zeros(shape).contiguous(memory_format=torch.channels_last)
+            with torch.no_grad():
+                # check_trace would re-run the model, and Detect() grids cached by the first run change the graph
+                frozen = torch.jit.freeze(torch.jit.trace(self.model.eval(), im, strict=False, check_trace=False))
+            if f:
+                tmp = f.with_suffix(f".{os.getpid()}.tmp")
+                try:
+                    torch.jit.save(frozen, tmp)
+                    os.replace(tmp, f)  # atomic: concurrent workers never load a partial file
+                except OSError as e:
+                    LOGGER.warning(f"WARNING ⚠️ could not cache {f}: {e}")
+        # oneDNN conv/bn/activation fusion and prepacked weights; not serializable, so applied after loading
+        return torch.jit.optimize_for_inference(frozen)
 
     def forward(self, im, augment=False, visualize=False):
         """Performs YOLOv5 inference on input images with options for augmentation and visualization."""
@@ -697,7 +812,10 @@ class DetectMultiBackend(nn.Module):
             im = im.permute(0, 2, 3, 1)  # torch BCHW to numpy BHWC shape(1,320,192,3)
 
         if self.pt:  # PyTorch
-            y = self.model(im, augment=augment, visualize=visualize) if augment or visualize else self.model(im)
+            if augment or visualize:
+                y = self.model(im, augment=augment, visualize=visualize)
+            else:
+                y = self._cpu_forward(im) if self.cpu_optimize else self.model(im)
         elif self.jit:  # TorchScript
             y = self.model(im)
         elif self.dnn:  # ONNX OpenCV DNN
@@ -706,7 +824,10 @@ class DetectMultiBackend(nn.Module):
             y = self.net.forward()
         elif self.onnx:  # ONNX Runtime
             im = im.cpu().numpy()  # torch to numpy
-            y = self.session.run(self.output_names, {self.session.get_inputs()[0].name: im})
+            if self.ort_batch and b != self.ort_batch:
+                y = self._ort_chunks(im)
+            else:
+                y = self._ort_run(im)  # io_binding: bound buffers, valid until this thread's next forward()
         elif self.xml:  # OpenVINO
             im = im.cpu().numpy()  # FP32
             y = list(self.ov_compiled_model(im).values())
@@ -772,17 +893,116 @@ class DetectMultiBackend(nn.Module):
         else:
             return self.from_numpy(y)
 
+    @staticmethod
+    def _ort_session(w, providers, options, cache_dir=None):
+        """
+        Creates an ONNX Runtime session configured from `options`, caching the optimized graph in `cache_dir`.
+
+        options: intra_op_threads / inter_op_threads (0 = ORT default), graph_optimization ('disable', 'basic',
+        'extended', 'all'), cpu_mem_arena, mem_pattern, shared_arena (one process-wide CPU arena for all sessions, with
+        arena_max_bytes and arena_extend_strategy 'same_as_requested' or 'next_power_of_two') and io_binding (forward
+        then returns the pre-allocated output buffers without a copy; they are only valid until the next forward() from
+        the same thread, so callers must consume or copy them first, as AutoShape NMS and classify softmax do).
+        """
+        import onnxruntime as ort
+
+        levels = {
+            "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+            "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+            "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+            "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+        }
+        level = options.get("graph_optimization", "all")
+        so = ort.SessionOptions()
+        so.intra_op_num_threads = int(options.get("intra_op_threads", 0))
+        so.inter_op_num_threads = int(options.get("inter_op_threads", 0))
+        if so.inter_op_num_threads > 1:
+            so.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+        so.graph_optimization_level = levels[level]
+        so.enable_cpu_mem_arena = bool(options.get("cpu_mem_arena", True))
+        so.enable_mem_pattern = bool(options.get("mem_pattern", True))
+        if options.get("shared_arena"):
+            _ort_shared_arena(ort, options)
+            so.add_session_config_entry("session.use_env_allocators", "1")
+
+        f = None
+        if cache_dir and level != "disable":
+            # 'all' adds layout transforms specific to this CPU, so the key covers machine, ORT version and providers
+            key = hashlib.sha256(Path(w).read_bytes())
+            key.update(repr((level, providers, ort.__version__, platform.machine())).encode())
+            f = Path(cache_dir) / f"{Path(w).stem}-{key.hexdigest()[:16]}.onnx"
+            if f.is_file():
+                so.graph_optimization_level = levels["disable"]  # already optimized
+                return ort.InferenceSession(str(f), so, providers=providers)
+            try:
+                f.parent.mkdir(parents=True, exist_ok=True)
+                so.optimized_model_filepath = str(f.with_suffix(f".{os.getpid()}.tmp"))
+            except OSError as e:
+                LOGGER.warning(f"WARNING ⚠️ ONNX Runtime model cache disabled, {cache_dir} is not writable: {e}")
+                f = None
+        session = ort.InferenceSession(w, so, providers=providers)
+        if f and Path(so.optimized_model_filepath).is_file():
+            os.replace(so.optimized_model_filepath, f)  # atomic: concurrent workers never load a partial file
+        return session
+
+    def _ort_run(self, im):
+        """
+        Runs the ONNX Runtime session on numpy `im`.
+
+        With io_binding, outputs are written into per-thread buffers allocated once per input shape; the returned arrays
+        are those buffers and are overwritten by the next call from the same thread.
+        """
+        if not self.ort_io_binding:
+            return self.session.run(self.output_names, {self.input_name: im})
+        local = self._ort_local
+        if not hasattr(local, "binding"):
+            local.binding, local.outputs = self.session.io_binding(), {}
+        im = np.ascontiguousarray(im)
+        local.binding.bind_cpu_input(self.input_name, im)
+        outputs = local.outputs.get(im.shape)
+        if outputs is None:  # first call at this shape: ORT allocates, the results become the buffers
+            for name in self.output_names:
+                local.binding.bind_output(name, "cpu")
+            self.session.run_with_iobinding(local.binding)
+            outputs = local.binding.copy_outputs_to_cpu()
+            if len(local.outputs) >= 8:
+                local.outputs.clear()
+            local.outputs[im.shape] = outputs
+            return outputs
+        for name, x in zip(self.output_names, outputs):
+            local.binding.bind_output(name, "cpu", 0, x.dtype.type, x.shape, x.ctypes.data)
+        self.session.run_with_iobinding(local.binding)
+        return outputs
+
+    def _ort_chunks(self, im):
+        """Runs a static-batch ONNX model over any batch size in model-sized chunks, zero-padding the last one."""
+        n, ys = self.ort_batch, []
+        for i in range(0, len(im), n):
+            x = im[i : i + n]
+            k = len(x)
+            if k < n:
+                x = np.concatenate((x, np.zeros((n - k, *x.shape[1:]), dtype=x.dtype)))
+            ys.append([y[:k].copy() for y in self._ort_run(x)])  # copy: IO-binding buffers are reused
+        return [np.concatenate(y) for y in zip(*ys)]
+
     def from_numpy(self, x):
         """Converts a NumPy array to a torch tensor, maintaining device compatibility."""
         return torch.from_numpy(x).to(self.device) if isinstance(x, np.ndarray) else x
 
     def warmup(self, imgsz=(1, 3, 640, 640)):
-        """Performs a single inference warmup to initialize model weights, accepting an `imgsz` tuple for image size."""
+        """
+        Performs inference warmup to initialize model weights, accepting an `imgsz` tuple or a list of tuples.
+
+        CPU is skipped unless cpu_optimize is set, in which case every listed shape is traced/compiled ahead of traffic.
+        """
+        shapes = imgsz if isinstance(imgsz[0], (list, tuple)) else [imgsz]
         warmup_types = self.pt, self.jit, self.onnx, self.engine, self.saved_model, self.pb, self.triton
-        if any(warmup_types) and (self.device.type != "cpu" or self.triton):
-            im = torch.empty(*imgsz, dtype=torch.half if self.fp16 else torch.float, device=self.device)  # input
-            for _ in range(2 if self.jit else 1):  #
-                self.forward(im)  # warmup
+        if any(warmup_types) and (self.device.type != "cpu" or self.triton or self.cpu_optimize):
+            for shape in shapes:
+                im = torch.empty(*shape, dtype=torch.half if self.fp16 else torch.float, device=self.device)  # input
+                with torch.no_grad():
+                    for _ in range(2 if self.jit or self.cpu_optimize else 1):  # profiling executor optimizes on run 2
+                        self.forward(im)  # warmup
 
     @staticmethod
     def _model_type(p="path/to/model.pt"):
@@ -1121,3 +1341,16 @@ class Classify(nn.Module):
         if isinstance(x, list):
             x = torch.cat(x, 1)
         return self.linear(self.drop(self.pool(self.conv(x)).flatten(1)))
+
+
+class MultiClassify(nn.Module):
+    """YOLOv5 multi-task classification head running one Classify() head per task over a shared backbone."""
+
+    def __init__(self, c1, nc=(1000,), k=1, s=1, p=None, g=1, dropout_p=0.0):
+        """Initializes one Classify() head per entry in `nc`, all fed by the same `c1`-channel backbone output."""
+        super().__init__()
+        self.m = nn.ModuleList(Classify(c1, c2, k, s, p, g, dropout_p) for c2 in nc)
+
+    def forward(self, x):
+        """Returns a tuple with one (b, nc_i) logits tensor per head."""
+        return tuple(m(x) for m in self.m)
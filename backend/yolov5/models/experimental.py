@@ -95,7 +95,9 @@ def attempt_load(weights, device=None, inplace=True, fuse=True):
 
     model = Ensemble()
     for w in weights if isinstance(weights, list) else [weights]:
-        ckpt = torch.load(attempt_download(w), map_location="cpu")  # load
+        ckpt = torch.load(attempt_download(w), map_location="cpu", weights_only=False)  # load pickled model
+        if ckpt.get("quantized"):  # INT8 checkpoint from quantize.py, CPU only
+            torch.backends.quantized.engine = ckpt["quantized"]
         ckpt = (ckpt.get("ema") or ckpt["model"]).to(device).float()  # FP32 model
 
         # Model compatibility updates
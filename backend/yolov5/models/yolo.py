@@ -47,6 +47,7 @@ from models.common import (
     Focus,
     GhostBottleneck,
     GhostConv,
+    MultiClassify,
     Proto,
 )
 from models.experimental import MixConv2d
@@ -75,6 +76,8 @@ class Detect(nn.Module):
     stride = None  # strides computed during build
     dynamic = False  # force grid reconstruction
     export = False  # export mode
+    prefilter_conf = None  # inference only: objectness threshold applied before decode (None = decode every anchor)
+    prefilter_topk = 1000  # inference only: candidates kept per image per detection layer when prefiltering
 
     def __init__(self, nc=80, anchors=(), ch=(), inplace=True):
         """Initializes YOLOv5 detection layer with specified classes, anchors, channels, and inplace operations."""
@@ -101,6 +104,10 @@ class Detect(nn.Module):
                 if self.dynamic or self.grid[i].shape[2:4] != x[i].shape[2:4]:
                     self.grid[i], self.anchor_grid[i] = self._make_grid(nx, ny, i)
 
+                # AutoShape and DetectMultiBackend set export=True, so the prefilter is gated on its own setting only
+                if self.prefilter_conf is not None and not isinstance(self, Segment):
+                    z.append(self._decode_topk(x[i], i))  # decode surviving candidates only
+                    continue
                 if isinstance(self, Segment):  # (boxes + masks)
                     xy, wh, conf, mask = x[i].split((2, 2, self.nc + 1, self.no - self.nc - 5), 4)
                     xy = (xy.sigmoid() * 2 + self.grid[i]) * self.stride[i]  # xy
@@ -115,6 +122,25 @@ class Detect(nn.Module):
 
         return x if self.training else (torch.cat(z, 1),) if self.export else (torch.cat(z, 1), x)
 
+    def _decode_topk(self, xi, i):
+        """
+        Selects the top-k anchors of layer i by raw objectness logit and decodes only those, returning (bs, k, no).
+
+        Anchors whose objectness is below prefilter_conf get conf 0 so non_max_suppression discards them; comparing
+        logits avoids a sigmoid over every anchor. Lossless for NMS conf_thres >= prefilter_conf unless a layer has
+        more than prefilter_topk candidates.
+        """
+        bs = xi.shape[0]
+        p = xi.view(bs, -1, self.no)  # (bs, na*ny*nx, no)
+        k = min(self.prefilter_topk, p.shape[1])
+        top, idx = p[..., 4].topk(k, dim=1)  # (bs, k) raw objectness logits
+        y = p.gather(1, idx[..., None].expand(-1, -1, self.no)).sigmoid()
+        xy = (y[..., :2] * 2 + self.grid[i].reshape(-1, 2)[idx]) * self.stride[i]  # xy
+        wh = (y[..., 2:4] * 2) ** 2 * self.anchor_grid[i].reshape(-1, 2)[idx]  # wh
+        c = min(max(self.prefilter_conf, 1e-6), 1 - 1e-6)
+        conf = y[..., 4:] * (top > math.log(c / (1 - c)))[..., None]  # zero objectness below threshold
+        return torch.cat((xy, wh, conf), 2)
+
     def _make_grid(self, nx=20, ny=20, i=0, torch_1_10=check_version(torch.__version__, "1.10.0")):
         """Generates a mesh grid for anchor boxes with optional compatibility for torch versions < 1.10."""
         d = self.anchors[i].device
@@ -127,6 +153,14 @@ class Detect(nn.Module):
         return grid, anchor_grid
 
 
+def set_detect_prefilter(model, conf_thres=0.25, topk=1000):
+    """Enables (conf_thres=None disables) the Detect head top-k / objectness prefilter on every Detect layer."""
+    for m in model.modules():
+        if type(m) is Detect:
+            m.prefilter_conf, m.prefilter_topk = conf_thres, topk
+    return model
+
+
 class Segment(Detect):
     """YOLOv5 Segment head for segmentation models, extending Detect with mask and prototype layers."""
 
@@ -374,6 +408,82 @@ class ClassificationModel(BaseModel):
         self.model = None
 
 
+class MultiHeadClassificationModel(ClassificationModel):
+    """YOLOv5 classification model with a shared backbone and one Classify() head per task, e.g. (type, waste)."""
+
+    def __init__(self, model=None, nc=(1000, 1000), cutoff=10):
+        """Initializes a multi-head classifier from a detection or classification `model`, one head per `nc` entry."""
+        super().__init__(model=model, nc=tuple(nc), cutoff=cutoff)
+
+    def _from_detection_model(self, model, nc=(1000, 1000), cutoff=10):
+        """Builds the shared backbone from a YOLOv5 detection or classification model and attaches a MultiClassify()."""
+        if isinstance(model, DetectMultiBackend):
+            model = model.model  # unwrap DetectMultiBackend
+        if isinstance(model, ClassificationModel):
+            trunk, m = model.model[:-1], model.model[-1]  # drop existing Classify() head
+            ch = (m.m[0] if isinstance(m, MultiClassify) else m).conv.conv.in_channels  # ch into head
+        else:
+            trunk = model.model[:cutoff]
+            m = trunk[-1]  # last layer, replaced by the heads
+            ch = m.conv.in_channels if hasattr(m, "conv") else m.cv1.conv.in_channels  # ch into module
+            trunk = trunk[:-1]
+        c = MultiClassify(ch, nc)  # MultiClassify()
+        c.i, c.f, c.type = m.i, m.f, "models.common.MultiClassify"  # index, from, type
+        self.model = nn.Sequential(*trunk, c)
+        self.stride = model.stride
+        self.save = []
+        self.nc = nc[0]  # primary head class count
+        self.head_nc = tuple(nc)
+        self.names = getattr(model, "names", [str(i) for i in range(nc[0])])
+        self.head_names = [self.names] + [[str(i) for i in range(n)] for n in nc[1:]]
+
+    @classmethod
+    def from_pair(cls, model, aux_model):
+        """Combines two trained classifiers: backbone and head 0 from `model`, head 1 from `aux_model`."""
+        model, aux_model = (m.model if isinstance(m, DetectMultiBackend) else m for m in (model, aux_model))
+        heads = [model.model[-1], aux_model.model[-1]]  # Classify() heads
+        mh = cls(model=deepcopy(model), nc=[h.linear.out_features for h in heads])
+        mh.model[-1].m = nn.ModuleList(deepcopy(h) for h in heads)
+        names = [
+            getattr(m, "names", None) or [str(i) for i in range(h.linear.out_features)]
+            for m, h in zip((model, aux_model), heads)
+        ]
+        mh.head_names = [list(n.values()) if isinstance(n, dict) else list(n) for n in names]  # dict to list
+        mh.names = mh.head_names[0]
+        return mh
+
+
+def rebuild_quantized_module(cls, state):
+    """Unpickles a torch.ao.nn.quantized module the way its __deepcopy__ copies it: nn.Module init, then __setstate__."""
+    m = cls.__new__(cls)
+    nn.Module.__init__(m)
+    m.__setstate__(state)
+    return m
+
+
+class QuantizedModel(nn.Module):
+    """Static INT8 (FX graph mode) YOLOv5 model written by quantize.py, loadable by attempt_load/DetectMultiBackend."""
+
+    def __init__(self, qmodel, model, engine="x86"):
+        """
+        Wraps the converted GraphModule `qmodel` of float `model`, keeping the attributes inference code reads.
+
+        Detect()/Segment() heads stay float inside `qmodel`; `model` lists them again so `model[-1]` lookups (AutoShape)
+        resolve to the shared head module.
+        """
+        super().__init__()
+        self.qmodel = qmodel
+        self.model = nn.Sequential(*(m for m in qmodel.modules() if isinstance(m, Detect)))
+        self.engine = engine  # torch.backends.quantized.engine used for calibration
+        for k in "names", "nc", "yaml", "stride", "head_nc", "head_names":
+            if hasattr(model, k):
+                setattr(self, k, getattr(model, k))
+
+    def forward(self, x, augment=False, profile=False, visualize=False):
+        """Runs the quantized graph; augmented, profiled and visualized inference are not supported."""
+        return self.qmodel(x)
+
+
 def parse_model(d, ch):
     """Parses a YOLOv5 model from a dict `d`, configuring layers based on input channels `ch` and model architecture."""
     LOGGER.info(f"\n{'':>3}{'from':>18}{'n':>3}{'params':>10}  {'module':<40}{'arguments':<30}")
@@ -0,0 +1,217 @@
+# Ultralytics 🚀 AGPL-3.0 License - https://ultralytics.com/license
+"""
+Post-training static INT8 quantization (FX graph mode, x86/fbgemm) of YOLOv5 PyTorch checkpoints for CPU inference.
+
+Calibrates on a folder of representative images, writes `<weights stem>-int8.pt` next to the weights and, when `--data`
+is given, validates FP32 and INT8 side by side with val.py / classify/val.py and reports the accuracy and latency delta.
+The INT8 checkpoint loads through attempt_load/DetectMultiBackend like any other *.pt (CPU only). Detect() heads stay
+FP32; SiLU activations have no INT8 kernel and run in FP32 between quantized convolutions, so every convolution is
+bracketed by quantize/dequantize steps. Whether INT8 is faster therefore depends on the model size, input size and the
+CPU (VNNI/AMX). Decide from the printed median latency rows (batch 1 and 8, this machine) together with the accuracy
+delta before serving an INT8 checkpoint.
+
+Usage - detection:
+    $ python quantize.py --weights wisePlate.pt --source calib/plates --data data/plates.yaml --imgsz 640
+
+Usage - classification (224px crops, --data is a classify/val.py dataset dir with val/ or test/):
+    $ python quantize.py --weights wiseMainCls-yolo5.pt --source calib/crops --data ../datasets/main --imgsz 224
+"""
+
+import argparse
+import copy
+import os
+import pickle
+import platform
+import sys
+import time
+import types
+from datetime import datetime
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[0]  # YOLOv5 root directory
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))  # add ROOT to PATH
+if platform.system() != "Windows":
+    ROOT = Path(os.path.relpath(ROOT, Path.cwd()))  # relative
+
+from models.experimental import attempt_load
+from models.yolo import ClassificationModel, Detect, QuantizedModel, rebuild_quantized_module
+from utils.augmentations import classify_transforms
+from utils.dataloaders import LoadImages
+from utils.general import LOGGER, check_img_size, check_version, colorstr, file_size, print_args
+
+
+class TraceableModel(nn.Module):
+    """FX-traceable view of a YOLOv5 model: forward(x) is _forward_once(x), without the augment/profile/visualize args."""
+
+    def __init__(self, model):
+        """Wraps `model`; FX traces Python control flow, so the defaulted forward() flags must not reach the tracer."""
+        super().__init__()
+        self.model = model
+
+    def forward(self, x):
+        """Single-scale inference pass."""
+        return self.model._forward_once(x)
+
+
+class QuantizedPickler(pickle.Pickler):
+    """
+    Checkpoint pickler for torch.save(): torch.ao.nn.quantized modules pickle their own state tuple but unpickle without
+    the nn.Module internals, so they are written as rebuild_quantized_module() calls instead.
+    """
+
+    def reducer_override(self, obj):
+        """Reduces quantized modules to (rebuild_quantized_module, (cls, state)), everything else pickles as usual."""
+        if isinstance(obj, nn.Module) and type(obj).__module__.startswith("torch.ao.nn.quantized"):
+            return rebuild_quantized_module, (type(obj), obj.__getstate__())
+        return NotImplemented
+
+
+def save(ckpt, f):
+    """Saves an INT8 checkpoint with QuantizedPickler; attempt_load() reads it with plain torch.load()."""
+    pickle_module = types.ModuleType("quantized_pickle")  # torch.save() only reads .Pickler and __name__
+    pickle_module.Pickler = QuantizedPickler
+    torch.save(ckpt, f, pickle_module=pickle_module)
+
+
+def calibrate(model, source, imgsz, stride, classify, max_images):
+    """Feeds up to `max_images` images from `source` through an observed model, preprocessed as at inference time."""
+    dataset = LoadImages(source, img_size=imgsz, stride=stride, transforms=classify_transforms(imgsz) if classify else None)
+    n = 0
+    with torch.no_grad():
+        for _, im, *_ in dataset:
+            im = torch.Tensor(im) if classify else torch.from_numpy(im).float() / 255  # uint8 to 0.0 - 1.0
+            model(im[None])  # add batch dim
+            n += 1
+            if n >= max_images:
+                break
+    assert n, f"no calibration images found in {source}"
+    return n
+
+
+def quantize(model, source, imgsz, engine="x86", max_images=256):
+    """Returns a QuantizedModel for float `model`: FX prepare, calibration on `source`, convert."""
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.fx.custom_config import PrepareCustomConfig
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    assert engine in torch.backends.quantized.supported_engines, f"quantized engine {engine} not supported on this CPU"
+    torch.backends.quantized.engine = engine
+    classify = isinstance(model, ClassificationModel)
+    stride = max(int(model.stride.max()), 32)
+
+    # Detect() decodes with shape-dependent grids: keep it a float leaf module, FX dequantizes its inputs
+    qconfig_mapping = get_default_qconfig_mapping(engine).set_object_type(Detect, None)
+    prepare_config = PrepareCustomConfig().set_non_traceable_module_classes([Detect])
+    example = torch.zeros(1, 3, imgsz, imgsz)
+    traceable = TraceableModel(copy.deepcopy(model))
+    prepared = prepare_fx(traceable, qconfig_mapping, (example,), prepare_custom_config=prepare_config)
+
+    n = calibrate(prepared, source, imgsz, stride, classify, max_images)
+    LOGGER.info(f"{colorstr('quantize:')} calibrated on {n} images from {source}")
+    return QuantizedModel(convert_fx(prepared), model, engine).eval()
+
+
+def benchmark(model, imgsz, batch_size=1, n=30):
+    """Returns median CPU inference time in ms for `model` at (batch_size, 3, imgsz, imgsz)."""
+    im = torch.rand(batch_size, 3, imgsz, imgsz)
+    times = []
+    with torch.no_grad():
+        for _ in range(3):
+            model(im)  # warmup
+        for _ in range(n):
+            t = time.perf_counter()
+            model(im)
+            times.append(time.perf_counter() - t)
+    return sorted(times)[n // 2] * 1e3
+
+
+def compare(weights, f, data, imgsz, batch_size, workers, classify, heads):
+    """Validates FP32 `weights` and INT8 `f` on `data` and returns [(metric, fp32, int8)] rows."""
+    project, rows = ROOT / "runs/quantize", []
+    if classify:
+        from classify import val as validate
+
+        for head in range(heads):
+            scores = [
+                validate.run(data=data, weights=w, imgsz=imgsz, batch_size=batch_size, device="cpu", workers=workers,
+                             verbose=False, head=head, project=project, name=Path(w).stem, exist_ok=True)
+                for w in (weights, f)
+            ]
+            suffix = f" (head {head})" if heads > 1 else ""
+            rows += [(f"top1{suffix}", scores[0][0], scores[1][0]), (f"top5{suffix}", scores[0][1], scores[1][1])]
+    else:
+        import val as validate
+
+        scores = [
+            validate.run(data=data, weights=w, imgsz=imgsz, batch_size=batch_size, device="cpu", workers=workers,
+                         half=False, plots=False, project=project, name=Path(w).stem, exist_ok=True)[0]
+            for w in (weights, f)
+        ]
+        for i, k in enumerate(("P", "R", "mAP50", "mAP50-95")):
+            rows.append((k, scores[0][i], scores[1][i]))
+    return rows
+
+
+def run(
+    weights=ROOT / "yolov5s.pt",  # model.pt path
+    source=ROOT / "data/images",  # calibration images dir
+    data=None,  # dataset.yaml (detection) or dataset dir (classification) for the accuracy comparison
+    imgsz=640,  # calibration/validation size (pixels)
+    engine="x86",  # torch quantized engine, x86 or fbgemm
+    max_images=256,  # max calibration images
+    batch_size=32,  # validation batch size
+    workers=8,  # validation dataloader workers
+):
+    """Quantizes `weights` to static INT8, saves `<stem>-int8.pt` and optionally reports the FP32 vs INT8 delta."""
+    check_version(torch.__version__, "2.0.0", "FX static quantization requires torch", hard=True)
+    weights = Path(weights)
+    model = attempt_load(weights, device=torch.device("cpu"), inplace=True, fuse=True)  # fused FP32 model
+    assert not isinstance(model, QuantizedModel), f"{weights} is already quantized"
+    classify = isinstance(model, ClassificationModel)
+    imgsz = check_img_size(imgsz, s=max(int(model.stride.max()), 32))
+
+    qmodel = quantize(model, source, imgsz, engine=engine, max_images=max_images)
+    f = weights.with_name(f"{weights.stem}-int8.pt")
+    ckpt = {"model": qmodel, "ema": None, "quantized": engine, "date": datetime.now().isoformat()}
+    save(ckpt, f)
+    LOGGER.info(f"{colorstr('quantize:')} saved {f} ({file_size(f):.1f} MB, FP32 {file_size(weights):.1f} MB)")
+
+    rows = [(f"ms/batch {bs}", benchmark(model, imgsz, bs), benchmark(qmodel, imgsz, bs)) for bs in (1, 8)]
+    if data:
+        heads = len(getattr(model, "head_nc", (None,)))
+        rows = compare(weights, f, data, imgsz, batch_size, workers, classify, heads) + rows
+    LOGGER.info(f"\n{'Metric':>20}{'FP32':>12}{'INT8':>12}{'Delta':>12}")
+    for k, fp32, int8 in rows:
+        LOGGER.info(f"{k:>20}{fp32:>12.4g}{int8:>12.4g}{int8 - fp32:>+12.4g}")
+    return f
+
+
+def parse_opt():
+    """Parses command-line arguments for INT8 post-training quantization."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights", type=str, default=ROOT / "yolov5s.pt", help="model.pt path")
+    parser.add_argument("--source", type=str, default=ROOT / "data/images", help="calibration images dir")
+    parser.add_argument("--data", type=str, default=None, help="dataset.yaml or classification dataset dir to compare")
+    parser.add_argument("--imgsz", "--img", "--img-size", type=int, default=640, help="image size (pixels)")
+    parser.add_argument("--engine", default="x86", choices=["x86", "fbgemm"], help="quantized engine")
+    parser.add_argument("--max-images", type=int, default=256, help="max calibration images")
+    parser.add_argument("--batch-size", type=int, default=32, help="validation batch size")
+    parser.add_argument("--workers", type=int, default=8, help="max validation dataloader workers")
+    opt = parser.parse_args()
+    print_args(vars(opt))
+    return opt
+
+
+def main(opt):
+    """Executes INT8 quantization with parsed command-line options."""
+    run(**vars(opt))
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    main(opt)
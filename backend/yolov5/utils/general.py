@@ -1021,6 +1021,10 @@ def non_max_suppression(
     """
     Non-Maximum Suppression (NMS) on inference results to reject overlapping detections.
 
+    Candidates are gathered, scored and capped at max_nms per image for up to nms_batch images at a time, which bounds
+    memory at low conf_thres (validation) regardless of batch size. Boxes are offset by image and class so one NMS call
+    covers the whole chunk (split into calls of at most max_nms boxes).
+
     Returns:
          list of detections, on (n,6) tensor per image [xyxy, conf, cls]
     """
@@ -1041,30 +1045,35 @@ def non_max_suppression(
     # Settings
     # min_wh = 2  # (pixels) minimum box width and height
     max_wh = 7680  # (pixels) maximum box width and height
-    max_nms = 30000  # maximum number of boxes into torchvision.ops.nms()
-    time_limit = 0.5 + 0.05 * bs  # seconds to quit after
+    max_nms = 30000  # maximum number of boxes per image into NMS
+    nms_batch = 8  # images per candidate pass
     redundant = True  # require redundant detections
     multi_label &= nc > 1  # multiple labels per box (adds 0.5ms/img)
     merge = False  # use merge-NMS
 
-    t = time.time()
     mi = 5 + nc  # mask start index
-    output = [torch.zeros((0, 6 + nm), device=prediction.device)] * bs
-    for xi, x in enumerate(prediction):  # image index, image inference
-        # Apply constraints
-        # x[((x[..., 2:4] < min_wh) | (x[..., 2:4] > max_wh)).any(1), 4] = 0  # width-height
-        x = x[xc[xi]]  # confidence
+    output = [torch.zeros((0, 6 + nm), device=device)] * bs
+    for b0 in range(0, bs, nms_batch):
+        n_img = min(nms_batch, bs - b0)
+
+        # Candidates of this chunk; bi holds the image index (within the chunk) of every row
+        bi, ai = xc[b0 : b0 + n_img].nonzero(as_tuple=True)
+        x = prediction[b0 + bi, ai]
 
         # Cat apriori labels if autolabelling
-        if labels and len(labels[xi]):
-            lb = labels[xi]
-            v = torch.zeros((len(lb), nc + nm + 5), device=x.device)
-            v[:, :4] = lb[:, 1:5]  # box
-            v[:, 4] = 1.0  # conf
-            v[range(len(lb)), lb[:, 0].long() + 5] = 1.0  # cls
-            x = torch.cat((x, v), 0)
-
-        # If none remain process next image
+        if labels and any(len(lb) for lb in labels[b0 : b0 + n_img]):
+            v, vi = [x], [bi]
+            for xi, lb in enumerate(labels[b0 : b0 + n_img]):
+                if len(lb):
+                    lv = torch.zeros((len(lb), nc + nm + 5), device=x.device)
+                    lv[:, :4] = lb[:, 1:5]  # box
+                    lv[:, 4] = 1.0  # conf
+                    lv[range(len(lb)), lb[:, 0].long() + 5] = 1.0  # cls
+                    v.append(lv)
+                    vi.append(torch.full((len(lb),), xi, device=x.device, dtype=bi.dtype))
+            x, bi = torch.cat(v, 0), torch.cat(vi, 0)
+
+        # If none remain process next chunk
         if not x.shape[0]:
             continue
 
@@ -1078,14 +1087,16 @@ def non_max_suppression(
         # Detections matrix nx6 (xyxy, conf, cls)
         if multi_label:
             i, j = (x[:, 5:mi] > conf_thres).nonzero(as_tuple=False).T
-            x = torch.cat((box[i], x[i, 5 + j, None], j[:, None].float(), mask[i]), 1)
+            x, bi = torch.cat((box[i], x[i, 5 + j, None], j[:, None].float(), mask[i]), 1), bi[i]
         else:  # best class only
             conf, j = x[:, 5:mi].max(1, keepdim=True)
-            x = torch.cat((box, conf, j.float(), mask), 1)[conf.view(-1) > conf_thres]
+            keep = conf.view(-1) > conf_thres
+            x, bi = torch.cat((box, conf, j.float(), mask), 1)[keep], bi[keep]
 
         # Filter by class
         if classes is not None:
-            x = x[(x[:, 5:6] == torch.tensor(classes, device=x.device)).any(1)]
+            keep = (x[:, 5:6] == torch.tensor(classes, device=x.device)).any(1)
+            x, bi = x[keep], bi[keep]
 
         # Apply finite constraint
         # if not torch.isfinite(x).all():
@@ -1095,31 +1106,60 @@ def non_max_suppression(
         n = x.shape[0]  # number of boxes
         if not n:  # no boxes
             continue
-        x = x[x[:, 4].argsort(descending=True)[:max_nms]]  # sort by confidence and remove excess boxes
-
-        # Batched NMS
-        c = x[:, 5:6] * (0 if agnostic else max_wh)  # classes
-        boxes, scores = x[:, :4] + c, x[:, 4]  # boxes (offset by class), scores
-        i = torchvision.ops.nms(boxes, scores, iou_thres)  # NMS
-        i = i[:max_det]  # limit detections
-        if merge and (1 < n < 3e3):  # Merge NMS (boxes merged using weighted mean)
-            # update boxes as boxes(i,4) = weights(i,n) * boxes(n,4)
-            iou = box_iou(boxes[i], boxes) > iou_thres  # iou matrix
-            weights = iou * scores[None]  # box weights
-            x[i, :4] = torch.mm(weights, x[:, :4]).float() / weights.sum(1, keepdim=True)  # merged boxes
-            if redundant:
-                i = i[iou.sum(1) > 1]  # require redundancy
-
-        output[xi] = x[i]
-        if mps:
-            output[xi] = output[xi].to(device)
-        if (time.time() - t) > time_limit:
-            LOGGER.warning(f"WARNING ⚠️ NMS time limit {time_limit:.3f}s exceeded")
-            break  # time limit exceeded
-
+        x, bi = _topk_per_image(x, bi, x[:, 4], max_nms, n_img)  # sort by confidence and remove excess boxes
+
+        # Boxes offset by (image, class) group so a single NMS call never compares boxes across images or classes;
+        # float64 because the offsets reach ~1e7 px. Images are packed into calls of up to max_nms boxes, as NMS cost
+        # grows with the square of the boxes in one call.
+        group = bi[:, None] * (nc + 1) + (0 if agnostic else x[:, 5:6])  # (image, class) groups
+        boxes, scores = x[:, :4].double() + group.double() * max_wh, x[:, 4].double()
+        keep = []
+        for s, e in _nms_spans(torch.bincount(bi, minlength=n_img).tolist(), max_nms):
+            i = torchvision.ops.nms(boxes[s:e], scores[s:e], iou_thres) + s  # NMS
+            if merge and (1 < e - s < 3e3):  # Merge NMS (boxes merged using weighted mean)
+                # update boxes as boxes(i,4) = weights(i,n) * boxes(n,4)
+                iou = box_iou(boxes[i], boxes[s:e]) > iou_thres  # iou matrix
+                weights = iou * scores[None, s:e]  # box weights
+                x[i, :4] = (torch.mm(weights, x[s:e, :4].double()) / weights.sum(1, keepdim=True)).to(x.dtype)
+                if redundant:
+                    i = i[iou.sum(1) > 1]  # require redundancy
+            keep.append(i)
+
+        # Split kept indices by image, NMS (score) order within each image, and limit detections
+        i = torch.cat(keep)
+        i = i[torch.sort(bi[i], stable=True)[1]]
+        counts = torch.bincount(bi[i], minlength=n_img)
+        rank = torch.arange(len(i), device=i.device) - (counts.cumsum(0) - counts)[bi[i]]
+        i = i[rank < max_det]
+        for xi, det in enumerate(x[i].split(torch.bincount(bi[i], minlength=n_img).tolist())):
+            if len(det):
+                output[b0 + xi] = det.to(device) if mps else det
     return output
 
 
+def _nms_spans(counts, max_boxes):
+    """Packs consecutive per-image box counts into (start, end) row spans of at most max_boxes rows (or one image)."""
+    start = end = 0
+    for n in counts:
+        if end > start and end - start + n > max_boxes:
+            yield start, end
+            start = end
+        end += n
+    if end > start:
+        yield start, end
+
+
+def _topk_per_image(x, bi, scores, k, bs):
+    """Keeps the k highest-scoring rows of every image; rows come back grouped by image, by descending score."""
+    order = scores.argsort(descending=True)
+    order = order[torch.sort(bi[order], stable=True)[1]]
+    x, bi = x[order], bi[order]
+    counts = torch.bincount(bi, minlength=bs)
+    rank = torch.arange(len(bi), device=bi.device) - (counts.cumsum(0) - counts)[bi]
+    keep = rank < k
+    return x[keep], bi[keep]
+
+
 def strip_optimizer(f="best.pt", s=""):
     """
     Strips optimizer and optionally saves checkpoint to finalize training; arguments are file path 'f' and save path